@@ -0,0 +1,58 @@
+from datetime import date, datetime
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from models import AuditLog
+from versioning import AUDIT, policy
+
+# 버전 정책이 audit 인 모델은 continuum 버전 테이블/트랜잭션 행 대신
+# flush 마다 audit_logs 에 한 번의 INSERT(executemany)로 변경 내용을 추가한다.
+# 이전 버전의 end_transaction_id 갱신이나 버전 테이블 인덱스 갱신이 없다.
+
+INSERT, UPDATE, DELETE = 0, 1, 2
+
+
+def _audited(obj):
+    return policy(getattr(obj, "__tablename__", None)) == AUDIT
+
+
+def _json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _entry(obj, operation_type, keys):
+    return dict(
+        table_name=obj.__tablename__,
+        row_id=obj.id,
+        operation_type=operation_type,
+        data={key: _json(getattr(obj, key)) for key in keys},
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def write_audit_logs(session, flush_context):
+    entries = []
+
+    for obj in session.new:
+        if _audited(obj):
+            keys = [column.key for column in inspect(obj).mapper.column_attrs]
+            entries.append(_entry(obj, INSERT, keys))
+
+    for obj in session.dirty:
+        if _audited(obj) and session.is_modified(obj, include_collections=False):
+            state = inspect(obj)
+            keys = [
+                attr.key
+                for attr in state.mapper.column_attrs
+                if state.attrs[attr.key].history.has_changes()
+            ]
+            if keys:
+                entries.append(_entry(obj, UPDATE, keys))
+
+    for obj in session.deleted:
+        if _audited(obj):
+            entries.append(_entry(obj, DELETE, []))
+
+    if entries:
+        session.connection().execute(insert(AuditLog), entries)
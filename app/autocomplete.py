@@ -0,0 +1,177 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from threading import Lock
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models import Category, MainCategory, AccountCard, Statement
+from .cache import register
+
+# 내역 이름 자동완성용 메모리 인덱스 (프로세스 단위)
+# 이름마다 가장 최근 내역 하나와 사용 횟수를 보관하고,
+# 이름(및 이름 안의 각 단어)의 앞부분으로 찾는다
+
+
+def _latest_statements(names=None):
+    ranked = select(
+        Statement.id,
+        func.row_number()
+        .over(
+            partition_by=Statement.name,
+            order_by=[Statement.created_at.desc(), Statement.id.desc()],
+        )
+        .label("rank"),
+        func.count().over(partition_by=Statement.name).label("count"),
+    )
+    if names is not None:
+        ranked = ranked.filter(Statement.name.in_(names))
+    ranked = ranked.subquery()
+
+    return (
+        select(
+            Statement.name,
+            Statement.amount,
+            Statement.category_id.label("category"),
+            Category.name.label("category_name"),
+            MainCategory.name.label("main_category_name"),
+            Statement.account_card_id.label("account_card"),
+            AccountCard.name.label("account_card_name"),
+            Statement.discount,
+            Statement.saving,
+            Statement.created_at,
+            Statement.description,
+            Statement.is_fixed,
+            ranked.c.count,
+        )
+        .join(ranked, ranked.c.id == Statement.id)
+        .outerjoin(Category, Statement.category_id == Category.id)
+        .outerjoin(MainCategory)
+        .outerjoin(AccountCard)
+        .filter(ranked.c.rank == 1)
+    )
+
+
+def _keys(name):
+    # 이름 전체와 공백 뒤의 각 단어
+    words = name.lower().split()
+    keys = {name.lower()}
+    for i in range(1, len(words)):
+        keys.add(" ".join(words[i:]))
+    return keys
+
+
+class NameIndex:
+    # 이름 정보가 바뀔 수 있는 테이블 (변경 시 전체 다시 읽기)
+    tables = {"categories", "main_categories", "account_cards"}
+    # 다른 워커의 내역 변경은 바뀐 이름을 알 수 없으므로 전체 다시 읽기
+    remote_tables = tables | {"statements"}
+
+    def __init__(self):
+        self._entries = {}
+        self._keys = []
+        self._loaded = False
+        self._stale = set()
+        self._lock = Lock()
+        register(self)
+
+    def clear(self):
+        with self._lock:
+            self._loaded = False
+
+    def mark_stale(self, names):
+        with self._lock:
+            self._stale |= set(names)
+
+    def _add_keys(self, name):
+        for key in _keys(name):
+            insort(self._keys, (key, name))
+
+    def _remove_keys(self, name):
+        for key in _keys(name):
+            i = bisect_left(self._keys, (key, name))
+            if i < len(self._keys) and self._keys[i] == (key, name):
+                del self._keys[i]
+
+    def _rebuild_keys(self):
+        self._keys = sorted(
+            (key, name) for name in self._entries for key in _keys(name)
+        )
+
+    async def refresh(self, db: AsyncSession):
+        # 처음이거나 전체 무효화된 경우 전체, 그 외에는 바뀐 이름만 다시 읽음
+        with self._lock:
+            loaded, stale = self._loaded, self._stale
+            self._stale = set()
+
+        if not loaded:
+            rows = (await db.execute(_latest_statements())).all()
+            with self._lock:
+                self._entries = {row.name: row._asdict() for row in rows}
+                self._rebuild_keys()
+                self._loaded = True
+        elif stale:
+            rows = (await db.execute(_latest_statements(stale))).all()
+            found = {row.name: row._asdict() for row in rows}
+            with self._lock:
+                for name in stale:
+                    if name in self._entries:
+                        self._remove_keys(name)
+                        del self._entries[name]
+                    if name in found:
+                        self._entries[name] = found[name]
+                        self._add_keys(name)
+
+    def search(self, q: str, limit: int):
+        prefix = q.lower()
+        names = set()
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+                names.add(self._keys[i][1])
+                i += 1
+            matches = [self._entries[name] for name in names]
+
+        # 많이 쓴 이름, 최근에 쓴 이름 순
+        matches.sort(key=lambda entry: entry["name"])
+        matches.sort(
+            key=lambda entry: (entry["count"], entry["created_at"] or datetime.min),
+            reverse=True,
+        )
+        return matches[:limit]
+
+
+name_index = NameIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def record_changed_names(session, flush_context):
+    changed = session.info.setdefault("changed_statement_names", set())
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, Statement):
+            changed.add(obj.name)
+            # 이름이 바뀐 경우 이전 이름도 갱신
+            changed.update(inspect(obj).attrs.name.history.deleted)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def record_bulk_changes(orm_execute_state):
+    # flush 를 거치지 않는 일괄 변경은 어떤 이름이 바뀌었는지 알 수 없음
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        if state.statement.table.name == Statement.__tablename__:
+            state.session.info["reload_statement_names"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def refresh_changed_names(session):
+    changed = session.info.pop("changed_statement_names", None)
+    if session.info.pop("reload_statement_names", False):
+        name_index.clear()
+    elif changed:
+        name_index.mark_stale(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_names(session):
+    session.info.pop("changed_statement_names", None)
+    session.info.pop("reload_statement_names", None)
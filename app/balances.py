@@ -0,0 +1,108 @@
+from collections import defaultdict
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models import Asset, Loan
+from app.consts import TYPE_INCOME, TYPE_OUTCOME, TYPE_SAVING
+from app.networth import add_net_worth
+
+
+def input_amount(category_type: int, amount: int):
+    # 저장된 금액을 입력 금액으로 (수입이 아니면 양수로 입력받아 마이너스로 저장)
+    if category_type != TYPE_INCOME and amount < 0:
+        return -amount
+    return amount
+
+
+def existing_ids(db: Session, model, ids):
+    ids = {id for id in ids if id is not None}
+    if not ids:
+        return set()
+    return set(db.scalars(select(model.id).filter(model.id.in_(ids))))
+
+
+def missing_balance_target(db: Session, asset_ids=(), loan_ids=()):
+    # 없는 자산/대출 id 가 있으면 오류 메시지, 모두 있으면 None
+    for model, ids in ((Asset, asset_ids), (Loan, loan_ids)):
+        ids = {id for id in ids if id is not None}
+        if ids - existing_ids(db, model, ids):
+            return f"{model.__name__} not found"
+    return None
+
+
+class BalanceDeltas:
+    # 자산/대출 잔액 변경을 모아서 자산/대출마다 UPDATE 한 번으로 적용
+    # (파이썬에서 읽고 쓰지 않으므로 동시에 요청이 와도 변경이 사라지지 않음)
+    def __init__(self):
+        self.assets = defaultdict(int)
+        self.loans = defaultdict(int)
+
+    def __bool__(self):
+        return any(self.assets.values()) or any(self.loans.values())
+
+    def add(
+        self,
+        category_type: int,
+        amount: int,
+        discount: int,
+        saving: int,
+        asset_id: int | None,
+        loan_id: int | None,
+        sign: int = 1,
+    ):
+        # create_statement 의 규칙 (amount 는 입력 금액)
+        if asset_id is not None:
+            if category_type == TYPE_SAVING:
+                self.assets[asset_id] += sign * amount
+            elif category_type == TYPE_OUTCOME:
+                self.assets[asset_id] -= sign * (amount - (discount or 0))
+        if loan_id is not None:
+            self.loans[loan_id] -= sign * (saving or 0)
+
+    def add_created(self, category_type: int, statement_in):
+        # 수입이 아닌데 음수로 들어온 금액은 이미 부호가 붙은 값으로 보고 저장될 금액
+        # (-|amount|)에서 되돌린 입력 금액을 사용 (add_removed 와 같은 기준)
+        self.add(
+            category_type,
+            input_amount(category_type, statement_in.amount),
+            statement_in.discount,
+            statement_in.saving,
+            statement_in.asset_id,
+            statement_in.loan_id,
+        )
+
+    def add_removed(self, category_type: int, statement):
+        # 저장된 내역이 잔액에 반영했던 만큼 되돌림
+        # (카테고리를 알 수 없으면 되돌릴 금액을 모르므로 건너뛰지 않고 실패)
+        if category_type is None and statement.category_id is not None:
+            raise LookupError(f"Unknown category {statement.category_id}")
+        self.add(
+            category_type,
+            input_amount(category_type, statement.amount),
+            statement.discount,
+            statement.saving,
+            statement.asset_id,
+            statement.loan_id,
+            sign=-1,
+        )
+
+    def apply(self, db: Session):
+        # UPDATE ... SET amount = amount + :delta RETURNING amount
+        # (없는 자산/대출은 호출하는 쪽에서 먼저 거르고, 여기서는 바뀐 행만 반영)
+        amounts = {}
+        net_worth = 0
+        for model, deltas, sign in ((Asset, self.assets, 1), (Loan, self.loans, -1)):
+            for id, delta in deltas.items():
+                if not delta:
+                    continue
+                amount = db.scalar(
+                    update(model)
+                    .where(model.id == id)
+                    .values(amount=model.amount + delta)
+                    .returning(model.amount)
+                )
+                if amount is not None:
+                    amounts[model, id] = amount
+                    net_worth += sign * delta
+        # ORM 을 거치지 않으므로 순자산 누적값도 직접 갱신
+        add_net_worth(db, net_worth)
+        return amounts
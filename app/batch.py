@@ -0,0 +1,96 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Asset, Loan, Statement
+from .balances import BalanceDeltas, existing_ids
+from .reference import category_types
+from .in_schema import StatementBatchIn
+from .schema import StatementBatchResultSchema
+from .utils import convert_message, set_statement_fields
+
+
+def apply_batch(db: Session, items: list[StatementBatchIn]):
+    # 모든 항목을 한 트랜잭션으로 적용
+    # (결과 목록, 알림 메시지 목록, 잔액 변경 여부) 반환
+    # 하나라도 실패하면 메시지 목록은 None 이고 아무것도 커밋하지 않음
+    ids = {item.id for item in items if item.id is not None}
+    statements = {
+        statement.id: statement
+        for statement in db.scalars(select(Statement).filter(Statement.id.in_(ids)))
+    }
+    types = category_types(
+        db,
+        [item.data.category_id for item in items if item.data is not None]
+        + [statement.category_id for statement in statements.values()],
+    )
+
+    inputs = [item.data for item in items if item.data is not None]
+    assets = existing_ids(db, Asset, [data.asset_id for data in inputs])
+    loans = existing_ids(db, Loan, [data.loan_id for data in inputs])
+
+    results = []
+    created = []
+    alerts = []
+    balances = BalanceDeltas()
+    failed = False
+
+    for index, item in enumerate(items):
+        result = StatementBatchResultSchema(index=index, op=item.op, id=item.id)
+        results.append(result)
+
+        statement = None
+        if item.op != "create":
+            statement = statements.get(item.id)
+            if statement is None:
+                result.status, result.detail = "error", "Statement not found"
+            elif (
+                statement.category_id is not None and statement.category_id not in types
+            ):
+                result.status, result.detail = "error", "Statement category not found"
+        if item.op != "delete":
+            if item.data is None:
+                result.status, result.detail = "error", "data is required"
+            elif item.data.category_id not in types:
+                result.status, result.detail = "error", "Category not found"
+            elif item.data.asset_id is not None and item.data.asset_id not in assets:
+                result.status, result.detail = "error", "Asset not found"
+            elif item.data.loan_id is not None and item.data.loan_id not in loans:
+                result.status, result.detail = "error", "Loan not found"
+
+        if result.status != "ok":
+            failed = True
+            continue
+        if failed:
+            continue
+
+        # 수정/삭제는 이전 내역이 반영했던 잔액을 되돌리고, 추가/수정은 새로 반영
+        if item.op != "create":
+            balances.add_removed(types.get(statement.category_id), statement)
+        if item.op != "delete":
+            balances.add_created(types[item.data.category_id], item.data)
+
+        if item.op == "create":
+            statement = Statement()
+            set_statement_fields(statement, item.data, types[item.data.category_id])
+            db.add(statement)
+            created.append((result, statement))
+            if item.data.is_alert:
+                alerts.append(statement)
+        elif item.op == "update":
+            set_statement_fields(statement, item.data, types[item.data.category_id])
+        else:
+            db.delete(statement)
+            del statements[item.id]
+
+    if failed:
+        db.rollback()
+        return results, None, False
+
+    db.flush()
+    for result, statement in created:
+        result.id = statement.id
+
+    balances.apply(db)
+    db.commit()
+
+    messages = [convert_message(db, statement) for statement in alerts]
+    return results, messages, bool(balances)
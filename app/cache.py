@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# 조회 결과 캐시 (프로세스 단위)
+# 의존하는 테이블에 커밋이 일어나면 해당 캐시를 비움
+_caches = []
+
+
+def register(cache):
+    # tables 속성과 clear() 메서드가 있으면 등록 가능
+    # remote_tables: 다른 워커의 변경으로 비울 테이블 (없으면 tables)
+    _caches.append(cache)
+
+
+class QueryCache:
+    # version 은 비울 때마다 1씩 증가
+    # (조회 전에 읽은 version 을 set 에 넘기면 조회 도중에 비워진 경우 저장하지 않음)
+    def __init__(self, *tables: str, maxsize: int = 256):
+        self.tables = set(tables)
+        self.maxsize = maxsize
+        self.version = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+        register(self)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value, version: int | None = None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+
+def invalidate(*tables: str, remote: bool = False):
+    for cache in _caches:
+        cache_tables = cache.tables
+        if remote:
+            cache_tables = getattr(cache, "remote_tables", cache_tables)
+        if cache_tables & set(tables):
+            cache.clear()
+
+
+def invalidate_remote(*tables: str):
+    invalidate(*tables, remote=True)
+
+
+def invalidate_all():
+    for cache in _caches:
+        cache.clear()
+
+
+def _table_names(objects):
+    return {obj.__table__.name for obj in objects if hasattr(obj, "__table__")}
+
+
+@event.listens_for(Session, "after_flush")
+def record_changed_tables(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    changed |= _table_names(session.new)
+    changed |= _table_names(session.dirty)
+    changed |= _table_names(session.deleted)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def record_bulk_changes(orm_execute_state):
+    # session.execute(update(...)) 처럼 flush 를 거치지 않는 변경
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        changed = state.session.info.setdefault("changed_tables", set())
+        changed.add(state.statement.table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_tables(session):
+    changed = session.info.pop("changed_tables", None)
+    if changed:
+        invalidate(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_tables(session):
+    session.info.pop("changed_tables", None)
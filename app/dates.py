@@ -0,0 +1,45 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_
+
+MONDAY = 0
+SUNDAY = 6
+
+
+# 모든 범위는 [start, end) 반열린 구간의 datetime 쌍
+# 컬럼에 extract() 를 씌우지 않아야 statements(date) 인덱스를 사용할 수 있다
+
+
+def _midnight(d: date):
+    return datetime(d.year, d.month, d.day)
+
+
+def day_range(d: date):
+    start = _midnight(d)
+    return start, start + timedelta(days=1)
+
+
+def week_range(d: date, first_weekday: int = SUNDAY):
+    start = _midnight(d) - timedelta(days=(d.weekday() - first_weekday) % 7)
+    return start, start + timedelta(days=7)
+
+
+def month_range(d: date):
+    start = datetime(d.year, d.month, 1)
+    if d.month == 12:
+        return start, datetime(d.year + 1, 1, 1)
+    return start, datetime(d.year, d.month + 1, 1)
+
+
+def year_range(d: date):
+    return datetime(d.year, 1, 1), datetime(d.year + 1, 1, 1)
+
+
+def in_range(column, date_range):
+    start, end = date_range
+    return and_(column >= start, column < end)
+
+
+def as_days(date_range):
+    # 일 단위 컬럼(Date) 비교용
+    start, end = date_range
+    return start.date(), end.date()
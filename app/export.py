@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import AccountCard, Category, MainCategory, Statement
+from .filters import StatementFilter, filter_statements, statement_ordering
+
+YIELD_PER = 1000
+
+# 가져오기(app.importer)에서 그대로 읽을 수 있는 컬럼 이름 사용
+EXPORT_COLUMNS = (
+    Statement.id,
+    Statement.date,
+    Statement.name,
+    Statement.category_id,
+    Category.name.label("category_name"),
+    MainCategory.name.label("main_category_name"),
+    Statement.amount,
+    Statement.discount,
+    Statement.saving,
+    Statement.account_card_id,
+    AccountCard.name.label("account_card_name"),
+    Statement.asset_id,
+    Statement.loan_id,
+    Statement.is_fixed,
+    Statement.description,
+    Statement.created_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def export_query(filters: StatementFilter, sort: str, order: str):
+    statement_list = (
+        select(*EXPORT_COLUMNS)
+        .join(Category, Statement.category_id == Category.id)
+        .join(MainCategory)
+        .outerjoin(AccountCard, Statement.account_card_id == AccountCard.id)
+    )
+    statement_list = filter_statements(statement_list, filters)
+    return statement_list.order_by(*statement_ordering(sort, order))
+
+
+def _value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _csv(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([[_value(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+
+def _ndjson(rows):
+    return "".join(
+        json.dumps(
+            {key: _value(value) for key, value in row._mapping.items()},
+            ensure_ascii=False,
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+async def stream_statements(db: AsyncSession, query, format: str):
+    # 서버 측 커서로 YIELD_PER 행씩 읽어서 바로 내보냄 (메모리 사용량 일정)
+    if format == "csv":
+        yield _csv([], header=True)
+
+    result = await db.stream(query.execution_options(yield_per=YIELD_PER))
+    async for rows in result.partitions():
+        if format == "csv":
+            yield _csv(rows)
+        else:
+            yield _ndjson(rows)
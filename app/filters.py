@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import and_, text
+from models import Category, MainCategory, Statement
+
+
+# /statement 목록과 /statement/summary 가 같은 조건을 쓰도록 공유
+# frozen 이라 해시 가능 -> 캐시 키로 사용
+@dataclass(frozen=True)
+class StatementFilter:
+    type: Optional[int] = None
+    q: Optional[str] = None
+    date_lte: Optional[date] = None
+    date_gte: Optional[date] = None
+    category_id: Optional[int] = None
+    main_category_id: Optional[int] = None
+    is_fixed: Optional[bool] = None
+
+
+def name_contains(q: str, ignore_case: bool = False):
+    # 패턴을 바인드 값 하나로 만들어야 postgresql 에서 trigram 인덱스를 사용
+    # (sqlite 는 인덱스 없이 LIKE 스캔, 대신 호출하는 쪽에서 LIMIT)
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if ignore_case:
+        return Statement.name.ilike(f"%{escaped}%", escape="\\")
+    return Statement.name.like(f"%{escaped}%", escape="\\")
+
+
+def filter_statements(statement_list, filters: StatementFilter):
+    # statement_list 는 Category, MainCategory 가 조인된 쿼리
+    if filters.q is not None:
+        statement_list = statement_list.filter(name_contains(filters.q))
+    if filters.date_lte is not None:
+        statement_list = statement_list.filter(
+            Statement.date < filters.date_lte + timedelta(days=1)
+        )
+    if filters.date_gte is not None:
+        statement_list = statement_list.filter(Statement.date >= filters.date_gte)
+    if filters.type is not None:
+        if filters.type < 3:
+            statement_list = statement_list.filter(
+                MainCategory.category_type == filters.type
+            )
+
+        # 지출을 제외한 순수 저축
+        elif filters.type == 3:
+            statement_list = statement_list.filter(
+                and_(
+                    MainCategory.category_type == 3,
+                    and_(Statement.category_id != 57, Statement.category_id != 58),
+                )
+            )
+
+        # 모든 저축 항목
+        elif filters.type == 4:
+            statement_list = statement_list.filter(MainCategory.category_type == 3)
+
+        # 고정 지출
+        elif filters.type == 5:
+            statement_list = statement_list.filter(
+                and_(MainCategory.category_type == 2, Statement.is_fixed == True)
+            )
+    if filters.category_id is not None:
+        statement_list = statement_list.filter(
+            Statement.category_id == filters.category_id
+        )
+    if filters.main_category_id is not None:
+        statement_list = statement_list.filter(
+            Category.main_category_id == filters.main_category_id
+        )
+    if filters.is_fixed is not None:
+        statement_list = statement_list.filter(Statement.is_fixed == filters.is_fixed)
+
+    return statement_list
+
+
+def statement_ordering(sort: str, order: str):
+    # /statement 목록과 같은 순서 (정렬 컬럼, id 역순)
+    if sort in Statement.__table__.c:
+        column = Statement.__table__.c[sort]
+        column = column.desc() if order.upper() == "DESC" else column.asc()
+    else:
+        column = text(f"{sort} {order}")
+    return [column, Statement.id.desc()]
@@ -0,0 +1,149 @@
+import os
+from datetime import date
+from sqlalchemy import Date, and_, delete, extract, func, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy_continuum import version_class
+from models import AssetHistory
+
+# 자산 기록 보관 단계
+# - 최근 ASSET_HISTORY_DAILY_MONTHS 개월: 하루 한 행 (new_asset_history 가 day 로 upsert)
+# - 그 이전: 한 달 한 행 (그 달의 마지막 행만 남김)
+ASSET_HISTORY_DAILY_MONTHS = int(os.getenv("ASSET_HISTORY_DAILY_MONTHS", 3))
+
+
+def daily_cutoff(today: date, months: int):
+    # months 개월 전 달의 1일 (이 날짜 이전은 월 단위로 압축)
+    month = today.year * 12 + today.month - 1 - months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _month_rank():
+    # 달마다 마지막 날이 1
+    return func.row_number().over(
+        partition_by=(
+            extract("year", AssetHistory.day),
+            extract("month", AssetHistory.day),
+        ),
+        order_by=AssetHistory.day.desc(),
+    )
+
+
+def _in_days(start: date, end: date):
+    return and_(AssetHistory.day >= start, AssetHistory.day < end)
+
+
+def daily_history(start: date, end: date):
+    # [start, end) 의 날짜별 마지막 값 (하루 한 행이므로 그대로 읽음)
+    return (
+        select(AssetHistory.day, AssetHistory.amount)
+        .filter(_in_days(start, end))
+        .order_by(AssetHistory.day)
+    )
+
+
+def monthly_history(start: date, end: date):
+    # [start, end) 의 달별 마지막 값
+    ranked = (
+        select(AssetHistory.day, AssetHistory.amount, _month_rank().label("rank"))
+        .filter(_in_days(start, end))
+        .subquery()
+    )
+    return (
+        select(ranked.c.day, ranked.c.amount)
+        .filter(ranked.c.rank == 1)
+        .order_by(ranked.c.day)
+    )
+
+
+def first_and_last(start: date, end: date):
+    # [start, end) 의 처음 값과 마지막 값 (기록이 없으면 None)
+    def edge(order_by):
+        return (
+            select(AssetHistory.amount)
+            .filter(_in_days(start, end))
+            .order_by(order_by)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    return select(edge(AssetHistory.day), edge(AssetHistory.day.desc()))
+
+
+def version_history(model, id: int, limit: int = 20):
+    # continuum 버전 테이블에서 금액이 바뀐 버전만, 하루 한 점(그날의 마지막 값)으로
+    # (id, transaction_id) 기본 키 순서로 읽으므로 해당 자산/대출의 버전만 훑는다
+    version = version_class(model)
+    day = func.date(
+        func.coalesce(version.updated_at, version.created_at), type_=Date
+    ).label("day")
+
+    changed = (
+        select(
+            day,
+            version.amount,
+            version.transaction_id,
+            func.lag(version.amount)
+            .over(order_by=version.transaction_id)
+            .label("prev_amount"),
+        )
+        .filter(version.id == id)
+        .subquery()
+    )
+    ranked = (
+        select(
+            changed.c.day,
+            changed.c.amount,
+            func.row_number()
+            .over(partition_by=changed.c.day, order_by=changed.c.transaction_id.desc())
+            .label("rank"),
+        )
+        .filter(
+            or_(
+                changed.c.prev_amount.is_(None),
+                changed.c.amount != changed.c.prev_amount,
+            )
+        )
+        .subquery()
+    )
+    # 최근 limit 개를 고른 뒤 날짜순으로
+    latest = (
+        select(ranked.c.day, ranked.c.amount)
+        .filter(ranked.c.rank == 1)
+        .order_by(ranked.c.day.desc())
+        .limit(limit)
+        .subquery()
+    )
+    return select(latest.c.day, latest.c.amount).order_by(latest.c.day)
+
+
+def compact_asset_history(
+    db: Session, months: int = ASSET_HISTORY_DAILY_MONTHS, today: date | None = None
+):
+    cutoff = daily_cutoff(today or date.today(), months)
+
+    # 달마다 마지막 날의 행을 제외한 나머지
+    ranked = (
+        select(AssetHistory.id, _month_rank().label("rank"))
+        .filter(AssetHistory.day < cutoff)
+        .subquery()
+    )
+    result = db.execute(
+        delete(AssetHistory)
+        .where(AssetHistory.id.in_(select(ranked.c.id).filter(ranked.c.rank > 1)))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    # python -m app.history [개월 수] : 오래된 자산 기록을 월 단위로 압축
+    import sys
+    from database import SessionLocal
+
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else ASSET_HISTORY_DAILY_MONTHS
+    db = SessionLocal()
+    try:
+        print(f"삭제한 행: {compact_asset_history(db, months)}")
+    finally:
+        db.close()
@@ -0,0 +1,216 @@
+import codecs
+import csv
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models import Asset, Loan, Statement
+from app.consts import TYPE_INCOME
+from .balances import BalanceDeltas, existing_ids
+from . import reference
+from . import invalidation  # noqa: F401 (다른 워커에 변경 테이블 알림)
+from .in_schema import StatementImportIn
+from .rollup import add_values, apply_session_deltas, new_deltas
+from .utils import new_asset_history
+
+CHUNK_SIZE = 1000
+FORMATS = ("csv", "ndjson")
+
+
+class StatementImportError(ValueError):
+    # status_code: 없는 카테고리/자산/대출은 404, 그 외 형식 오류는 400
+    def __init__(self, line: int, message: str, status_code: int = 400):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.status_code = status_code
+
+
+class RowParser:
+    # 한 줄씩 받아서 StatementImportIn 으로 변환 (CSV 는 첫 줄이 헤더)
+    # CSV 의 따옴표 안 줄바꿈은 따옴표가 닫힐 때까지 다음 줄과 합쳐 한 행으로 읽음
+    def __init__(self, format: str):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format}")
+        self.format = format
+        self.header = None
+        self.line = 0
+        self._record = ""
+
+    def feed(self, line: str):
+        self.line += 1
+        if self.format == "csv":
+            record = self._record + line
+            # 따옴표 개수가 홀수면 필드가 아직 닫히지 않음 ("" 는 두 개로 셈)
+            if record.count('"') % 2:
+                self._record = record + "\n"
+                return None
+            self._record = ""
+            line = record
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            return None
+
+        try:
+            if self.format == "ndjson":
+                values = json.loads(line)
+            elif self.header is None:
+                self.header = [name.strip() for name in next(csv.reader([line]))]
+                return None
+            else:
+                # 빈 칸은 기본값 사용
+                values = {
+                    key: value
+                    for key, value in zip(self.header, next(csv.reader([line])))
+                    if value != ""
+                }
+            return StatementImportIn.model_validate(values)
+        except (ValueError, ValidationError) as e:
+            raise StatementImportError(self.line, str(e))
+
+    def close(self):
+        if self._record:
+            raise StatementImportError(self.line, "unterminated quoted field")
+
+
+def iter_lines(chunks):
+    # 바이트 조각을 줄 단위로 (BOM 제거)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + decoder.decode(chunk)).split("\n")
+        rest = lines.pop()
+        yield from lines
+    rest += decoder.decode(b"", final=True)
+    if rest:
+        yield rest
+
+
+async def aiter_lines(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    rest = ""
+    async for chunk in chunks:
+        lines = (rest + decoder.decode(chunk)).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line
+    rest += decoder.decode(b"", final=True)
+    if rest:
+        yield rest
+
+
+class StatementImporter:
+    # 조각 단위로 statements 에 일괄 INSERT 하고,
+    # 자산/대출 잔액 변경은 모아서 마지막에 한 번씩 UPDATE
+    def __init__(self):
+        self.balances = BalanceDeltas()
+        self.count = 0
+
+    def add(self, db: Session, rows: list[tuple[int, StatementImportIn]]):
+        # rows: (줄 번호, 행) 목록
+        values = []
+        deltas = new_deltas()
+        assets = existing_ids(db, Asset, [row.asset_id for _, row in rows])
+        loans = existing_ids(db, Loan, [row.loan_id for _, row in rows])
+        for line, row in rows:
+            # category id -> category_type 은 기준 정보 캐시에서
+            category_type = reference.category_type(db, row.category_id)
+            if category_type is None:
+                raise StatementImportError(
+                    line, f"Unknown category {row.category_id}", 404
+                )
+            if row.asset_id is not None and row.asset_id not in assets:
+                raise StatementImportError(line, f"Unknown asset {row.asset_id}", 404)
+            if row.loan_id is not None and row.loan_id not in loans:
+                raise StatementImportError(line, f"Unknown loan {row.loan_id}", 404)
+
+            statement = row.model_dump()
+            statement["date"] = row.date.replace(second=0, microsecond=0)
+
+            # create_statement 와 같은 규칙
+            # 지출일 때 마이너스
+            if category_type != TYPE_INCOME and row.amount > 0:
+                statement["amount"] = -row.amount
+            self.balances.add_created(category_type, row)
+
+            values.append(statement)
+            add_values(deltas, statement)
+
+        if values:
+            db.execute(insert(Statement), values)
+            apply_session_deltas(db, deltas)
+            self.count += len(values)
+
+    def finish(self, db: Session):
+        if self.balances:
+            self.balances.apply(db)
+            # 잔액이 바뀐 경우 자산 기록은 마지막에 한 번만
+            new_asset_history(db)
+        else:
+            db.commit()
+        return dict(imported=self.count)
+
+
+def import_lines(db: Session, lines, format: str):
+    parser = RowParser(format)
+    importer = StatementImporter()
+    chunk = []
+    try:
+        for line in lines:
+            row = parser.feed(line)
+            if row is not None:
+                chunk.append((parser.line, row))
+            if len(chunk) >= CHUNK_SIZE:
+                importer.add(db, chunk)
+                chunk = []
+        parser.close()
+        importer.add(db, chunk)
+        return importer.finish(db)
+    except Exception:
+        db.rollback()
+        raise
+
+
+async def aimport_lines(db: AsyncSession, lines, format: str):
+    # 업로드를 받는 동안 조각마다 INSERT (전체를 메모리에 올리지 않음)
+    parser = RowParser(format)
+    importer = StatementImporter()
+    chunk = []
+    try:
+        async for line in lines:
+            row = parser.feed(line)
+            if row is not None:
+                chunk.append((parser.line, row))
+            if len(chunk) >= CHUNK_SIZE:
+                await db.run_sync(importer.add, chunk)
+                chunk = []
+        parser.close()
+        await db.run_sync(importer.add, chunk)
+        return await db.run_sync(importer.finish)
+    except Exception:
+        await db.rollback()
+        raise
+
+
+if __name__ == "__main__":
+    # python -m app.importer statements.csv [--format ndjson]
+    import argparse
+    import sys
+    from database import SessionLocal
+
+    argparser = argparse.ArgumentParser(description="Import statements")
+    argparser.add_argument("path")
+    argparser.add_argument("--format", choices=FORMATS)
+    args = argparser.parse_args()
+
+    format = args.format or ("ndjson" if args.path.endswith(".ndjson") else "csv")
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            chunks = iter(lambda: f.read(64 * 1024), b"")
+            result = import_lines(db, iter_lines(chunks), format)
+        print(f"imported {result['imported']} statements")
+    except StatementImportError as e:
+        sys.exit(str(e))
+    finally:
+        db.close()
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, Field
 
 
@@ -52,3 +53,24 @@ class StatementIn(BaseModel):
     loan_id: int | None = Field(default=None)
     is_alert: bool = Field(default=False)
     is_fixed: bool = Field(default=False)
+
+
+# 일괄 가져오기 한 줄 (알림은 보내지 않음)
+class StatementImportIn(BaseModel):
+    name: str
+    category_id: int
+    amount: int
+    date: datetime
+    discount: int = 0
+    saving: int = 0
+    description: str | None = Field(default=None)
+    account_card_id: int | None = Field(default=None)
+    asset_id: int | None = Field(default=None)
+    loan_id: int | None = Field(default=None)
+    is_fixed: bool = Field(default=False)
+
+
+class StatementBatchIn(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: int | None = Field(default=None)  # update, delete
+    data: StatementIn | None = Field(default=None)  # create, update
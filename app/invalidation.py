@@ -0,0 +1,143 @@
+import asyncio
+import os
+import uuid
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from database import SQLALCHEMY_DATABASE_URL
+from .cache import invalidate_all, invalidate_remote
+
+# 여러 uvicorn 워커 사이의 캐시 무효화
+# - 커밋 직전에 바뀐 테이블 목록을 NOTIFY (커밋될 때만 전달, 롤백되면 사라짐)
+# - 워커마다 LISTEN 연결을 두고, 다른 워커가 보낸 목록으로 app.cache 를 비움
+# - LISTEN 연결이 끊긴 동안에는 FALLBACK_TTL 초마다 모든 캐시를 비우고 재접속 시도
+
+CHANNEL = "cache_invalidation"
+# 자기 워커가 보낸 알림은 이미 after_commit 에서 처리했으므로 건너뜀
+WORKER_ID = uuid.uuid4().hex
+FALLBACK_TTL = float(os.getenv("CACHE_FALLBACK_TTL", 5))
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+
+def changed_tables(session):
+    tables = set(session.info.get("changed_tables", ()))
+    # 일별 합계는 Core 문으로 갱신하므로 app.rollup 의 변경분으로 확인
+    if session.info.get("daily_total_deltas"):
+        tables.add("statement_daily_totals")
+    return tables
+
+
+@event.listens_for(Session, "before_commit")
+def publish_changed_tables(session):
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    # commit 의 flush 는 before_commit 이후이므로 먼저 flush 해서 변경 테이블을 모음
+    session.flush()
+    tables = changed_tables(session)
+    if tables:
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            dict(channel=CHANNEL, payload=f"{WORKER_ID}:{','.join(sorted(tables))}"),
+        )
+
+
+class InvalidationBus:
+    def __init__(
+        self,
+        dsn: str = SQLALCHEMY_DATABASE_URL,
+        channel: str = CHANNEL,
+        worker_id: str = WORKER_ID,
+        ttl: float = FALLBACK_TTL,
+        on_invalidate=invalidate_remote,
+        on_expire=invalidate_all,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.on_invalidate = on_invalidate
+        self.on_expire = on_expire
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def _notify(self, connection, pid, channel, payload):
+        worker_id, _, tables = payload.partition(":")
+        if worker_id == self.worker_id or not tables:
+            return
+        self.received += 1
+        self.on_invalidate(*tables.split(","))
+
+    async def _expire(self, seconds: float):
+        # 연결이 없는 동안: ttl 초마다 모든 캐시를 비움
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + seconds
+        while True:
+            self.on_expire()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(self.ttl, remaining))
+
+    async def _listen(self, connection):
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        await connection.add_listener(self.channel, self._notify)
+        # 연결이 없던 동안 놓친 알림이 있을 수 있음
+        self.on_expire()
+        self.connected = True
+        while not closed.is_set():
+            try:
+                await asyncio.wait_for(closed.wait(), self.ttl)
+            except asyncio.TimeoutError:
+                # 조용히 끊긴 연결을 알아채기 위한 확인
+                await connection.execute("SELECT 1")
+
+    async def _run(self):
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (
+                OSError,
+                ValueError,
+                asyncio.TimeoutError,
+                asyncpg.PostgresError,
+            ) as e:
+                print(f"캐시 무효화 LISTEN 연결 실패: {e!r}")
+                await self._expire(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+
+            delay = RECONNECT_DELAY
+            try:
+                await self._listen(connection)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                print(f"캐시 무효화 LISTEN 연결 끊김: {e!r}")
+            finally:
+                self.connected = False
+                self.reconnects += 1
+                if not connection.is_closed():
+                    connection.terminate()
+            await self._expire(delay)
+
+
+invalidation_bus = InvalidationBus()
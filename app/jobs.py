@@ -0,0 +1,130 @@
+import asyncio
+import os
+from database import AsyncSessionLocal
+from .utils import new_asset_history
+from .networth import verify_net_worth
+from .history import compact_asset_history
+from .retention import prune_versions
+from .telegram import telegram_sender
+
+# 커밋 이후의 부가 작업(자산 기록, 텔레그램 알림)을 요청 밖에서 처리하는 작업 큐
+
+
+class JobQueue:
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        workers: int = 2,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.session_factory = AsyncSessionLocal
+        self.processed = 0
+        self.failed = 0
+        self._queue = None
+        self._tasks = []
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def drain(self, timeout: float = 10):
+        # 종료 시 남은 작업을 기다린 뒤 워커 정리
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"작업 {self._queue.qsize()}개를 처리하지 못하고 종료")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def schedule(self, interval: float, func, *args):
+        # interval 초마다 작업을 큐에 넣음 (start 이후 호출, drain 시 함께 정리)
+        async def repeat():
+            while True:
+                await asyncio.sleep(interval)
+                await self.enqueue(func, *args)
+
+        self._tasks.append(asyncio.create_task(repeat()))
+
+    async def enqueue(self, func, *args):
+        # 워커가 없으면 (startup 이벤트 없이 실행된 경우) 바로 실행
+        if not self.running:
+            await self._run(func, args)
+            return
+        # 큐가 가득 차면 자리가 날 때까지 대기
+        await self._queue.put((func, args))
+
+    async def _run(self, func, args):
+        for attempt in range(self.retries + 1):
+            try:
+                await func(*args)
+                self.processed += 1
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    self.failed += 1
+                    print(f"작업 실패: {func.__name__} {e!r}")
+                    return
+                await asyncio.sleep(self.backoff * 2**attempt)
+
+    async def _worker(self):
+        while True:
+            func, args = await self._queue.get()
+            try:
+                await self._run(func, args)
+            finally:
+                self._queue.task_done()
+
+
+job_queue = JobQueue()
+
+# 누적 순자산 검증 주기 (초)
+NET_WORTH_VERIFY_INTERVAL = float(os.getenv("NET_WORTH_VERIFY_INTERVAL", 3600))
+# 자산 기록 압축 주기 (초)
+HISTORY_COMPACT_INTERVAL = float(os.getenv("HISTORY_COMPACT_INTERVAL", 86400))
+# 오래된 버전 정리 주기 (초), 배치 단위로 나눠 남은 작업이 없을 때까지 처리
+VERSION_PRUNE_INTERVAL = float(os.getenv("VERSION_PRUNE_INTERVAL", 3600))
+
+
+async def record_asset_history():
+    async with job_queue.session_factory() as db:
+        await db.run_sync(new_asset_history)
+
+
+async def send_notification(message):
+    await telegram_sender.send(message)
+
+
+async def check_net_worth():
+    async with job_queue.session_factory() as db:
+        await db.run_sync(verify_net_worth)
+
+
+async def compact_history():
+    async with job_queue.session_factory() as db:
+        await db.run_sync(compact_asset_history)
+
+
+async def prune_old_versions():
+    # 워커 안에서 같은 큐에 다시 넣으면 큐가 가득 찼을 때 멈추므로 여기서 반복
+    # (한 번에 배치 한도만큼 지우고 커밋하므로 사이사이 다른 작업에 양보)
+    async with job_queue.session_factory() as db:
+        while True:
+            result = await db.run_sync(prune_versions)
+            if not result["remaining"]:
+                break
+            await asyncio.sleep(0)
@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import get_args
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import MANYTOONE, joinedload, selectinload
+
+
+def _nested_schema(annotation):
+    # CategorySchema | None 같은 타입에서 pydantic 모델만 꺼냄
+    for candidate in (annotation, *get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+@lru_cache
+def schema_loader_options(model, schema):
+    # 응답 스키마가 직렬화할 relationship 을 미리 로딩하는 옵션을 만든다.
+    # N:1 은 같은 쿼리에 JOIN, 1:N 은 IN 쿼리 한 번으로 가져옴
+    mapper = inspect(model)
+    options = []
+
+    for name, field in schema.model_fields.items():
+        if name not in mapper.relationships:
+            continue
+
+        nested = _nested_schema(field.annotation)
+        if nested is None:
+            continue
+
+        relationship = mapper.relationships[name]
+        attribute = getattr(model, name)
+
+        if relationship.direction is MANYTOONE:
+            loader = joinedload(attribute)
+        else:
+            loader = selectinload(attribute)
+
+        sub_options = schema_loader_options(relationship.mapper.class_, nested)
+        options.append(loader.options(*sub_options) if sub_options else loader)
+
+    return tuple(options)
@@ -0,0 +1,148 @@
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from models import Asset, Loan, NetWorth
+
+# 순자산 = 자산 합계 - 대출 합계
+# 자산 기록마다 두 테이블을 SUM 하지 않도록 net_worth 한 행에 누적값을 두고
+# 잔액이 바뀔 때마다 같은 트랜잭션에서 변경분만큼 더한다.
+# 누적값이 어긋나도 verify_net_worth 가 주기적으로 전체 합계와 비교해 바로잡는다.
+
+NET_WORTH_ID = 1
+SIGNS = {Asset: 1, Loan: -1}
+
+
+def _full_sum(connection):
+    asset_sum = connection.scalar(select(func.coalesce(func.sum(Asset.amount), 0)))
+    loan_sum = connection.scalar(select(func.coalesce(func.sum(Loan.amount), 0)))
+    return asset_sum - loan_sum
+
+
+def _reset(connection):
+    # 행이 없으면 (최초 실행) 전체 합계로 생성
+    amount = _full_sum(connection)
+    connection.execute(
+        NetWorth.__table__.insert().values(
+            id=NET_WORTH_ID, amount=amount, verified_at=datetime.now()
+        )
+    )
+    return amount
+
+
+def _add(connection, delta: int):
+    amount = connection.scalar(
+        update(NetWorth)
+        .where(NetWorth.id == NET_WORTH_ID)
+        .values(amount=NetWorth.amount + delta)
+        .returning(NetWorth.amount)
+    )
+    if amount is None:
+        amount = _reset(connection)
+    return amount
+
+
+def add_net_worth(db: Session, delta: int):
+    # UPDATE 문으로 직접 바꾼 잔액(BalanceDeltas, 대출 상환)의 변경분
+    if delta:
+        _add(db.connection(), delta)
+
+
+def current_net_worth(db: Session):
+    connection = db.connection()
+    amount = connection.scalar(
+        select(NetWorth.amount).where(NetWorth.id == NET_WORTH_ID)
+    )
+    if amount is None:
+        amount = _reset(connection)
+    return amount
+
+
+def net_worth_subquery():
+    # 다른 문 안에서 누적값을 읽을 때 (파이썬으로 읽은 뒤 쓰면 그 사이에 바뀔 수 있음)
+    return (
+        select(NetWorth.amount).where(NetWorth.id == NET_WORTH_ID).scalar_subquery()
+    )
+
+
+def verify_net_worth(db: Session):
+    # 전체 합계와 비교해 어긋난 만큼 바로잡고 그 차이를 반환
+    # 누적 행을 먼저 잠가야 합계를 구하는 동안 커밋된 변경분을 덮어쓰지 않음
+    connection = db.connection()
+    amount = connection.scalar(
+        select(NetWorth.amount).where(NetWorth.id == NET_WORTH_ID).with_for_update()
+    )
+    expected = _full_sum(connection)
+    if amount is None:
+        _reset(connection)
+        db.commit()
+        return 0
+
+    connection.execute(
+        update(NetWorth)
+        .where(NetWorth.id == NET_WORTH_ID)
+        .values(amount=expected, verified_at=datetime.now())
+    )
+    db.commit()
+    if amount != expected:
+        print(f"순자산 보정: {amount} -> {expected}")
+    return expected - amount
+
+
+def _committed_amount(obj):
+    # flush 전 값 (None: 불러오지 않은 채로 바뀌어서 알 수 없음)
+    history = inspect(obj).attrs.amount.history
+    if history.deleted:
+        return history.deleted[0] or 0
+    if history.unchanged:
+        return history.unchanged[0] or 0
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def update_net_worth(session, flush_context):
+    # ORM 으로 추가/수정/삭제된 자산, 대출의 잔액 변경분
+    # (after_flush 에서는 속성 history 가 아직 flush 전 상태)
+    delta = 0
+    unknown = False
+
+    for obj in session.new:
+        if type(obj) in SIGNS:
+            delta += SIGNS[type(obj)] * (obj.amount or 0)
+
+    for obj in session.dirty:
+        if type(obj) in SIGNS and inspect(obj).attrs.amount.history.has_changes():
+            committed = _committed_amount(obj)
+            if committed is None:
+                unknown = True
+            else:
+                delta += SIGNS[type(obj)] * ((obj.amount or 0) - committed)
+
+    for obj in session.deleted:
+        if type(obj) in SIGNS:
+            committed = _committed_amount(obj)
+            if committed is None:
+                unknown = True
+            else:
+                delta -= SIGNS[type(obj)] * committed
+
+    connection = session.connection()
+    if unknown:
+        # 이전 값을 모르면 flush 된 상태에서 전체 합계로 다시 계산
+        connection.execute(
+            update(NetWorth)
+            .where(NetWorth.id == NET_WORTH_ID)
+            .values(amount=_full_sum(connection))
+        )
+    elif delta:
+        _add(connection, delta)
+
+
+if __name__ == "__main__":
+    # python -m app.networth : 누적 순자산을 전체 합계로 검증/보정
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"보정 금액: {verify_net_worth(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import datetime
+from fastapi.exceptions import HTTPException
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Statement
+
+# 커서 페이지네이션에서 정렬 가능한 컬럼
+# (NULL 이 있을 수 있는 컬럼은 sort_key 로 가장 작은 값으로 바꿔 정렬/비교)
+CURSOR_SORT_COLUMNS = {
+    "id": Statement.id,
+    "statements_id": Statement.id,
+    "date": Statement.date,
+    "name": Statement.name,
+    "amount": Statement.amount,
+    "discount": Statement.discount,
+    "saving": Statement.saving,
+    "created_at": Statement.created_at,
+}
+
+
+NULL_SORT_VALUES = {int: -(2**31), datetime: datetime.min}
+
+
+def sort_key(column):
+    if not column.expression.nullable:
+        return column
+    value = NULL_SORT_VALUES[column.type.python_type]
+    return func.coalesce(column, literal(value, column.type))
+
+
+def cursor_value(item, column):
+    value = getattr(item, column.key)
+    if value is None:
+        return NULL_SORT_VALUES[column.type.python_type]
+    return value
+
+
+def encode_cursor(value, id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, id], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, column):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, id = json.loads(raw)
+        python_type = column.type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        # 정렬 컬럼과 타입이 다른 값은 DB 에서 오류가 나므로 여기서 거름
+        if type(value) is not python_type or type(id) is not int:
+            raise ValueError(value)
+        return value, id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def keyset_paginate(
+    db: AsyncSession,
+    query,
+    sort: str,
+    order: str,
+    size: int,
+    cursor: str | None = None,
+    with_total: bool = True,
+):
+    column = CURSOR_SORT_COLUMNS.get(sort)
+    if column is None:
+        raise HTTPException(status_code=400, detail=f"Cannot use cursor with {sort}")
+
+    descending = order.upper() == "DESC"
+
+    total = None
+    if with_total:
+        total = await db.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+
+    key = sort_key(column)
+    if cursor:
+        value, id = decode_cursor(cursor, column)
+        if descending:
+            query = query.filter(tuple_(key, Statement.id) < tuple_(value, id))
+        else:
+            query = query.filter(tuple_(key, Statement.id) > tuple_(value, id))
+
+    if descending:
+        query = query.order_by(key.desc(), Statement.id.desc())
+    else:
+        query = query.order_by(key.asc(), Statement.id.asc())
+
+    # 다음 페이지 존재 여부를 알기 위해 하나 더 가져옴
+    items = (await db.scalars(query.limit(size + 1))).all()
+
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        last = items[-1]
+        next_cursor = encode_cursor(cursor_value(last, column), last.id)
+
+    return dict(items=items, size=size, next_cursor=next_cursor, total=total)
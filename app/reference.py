@@ -0,0 +1,197 @@
+from collections import defaultdict
+from threading import Lock
+from pydantic import TypeAdapter
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from models import AccountCard, Asset, Category, MainCategory, StatementDailyTotal
+from .cache import register
+from .schema import AccountCardSchema, AssetSchema, CategorySchema, MainCategorySchema
+from .dates import as_days, month_range, in_range
+
+# 알림 메시지 등에서 쓰는 기준 정보 캐시 (프로세스 단위)
+# 테이블별로 id -> 값 dict 를 보관하고, 해당 테이블에 커밋이 일어나면 다시 읽음
+
+
+class ReferenceTable:
+    # version 은 비울 때마다 1씩 증가 (읽는 도중에 커밋이 일어나면 읽은 값은 저장하지 않음)
+    def __init__(self, model, *columns):
+        self.model = model
+        self.columns = columns
+        self.tables = {model.__tablename__}
+        self.version = 0
+        self._rows = None
+        self._lock = Lock()
+        register(self)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._rows = None
+
+    def cached(self):
+        # DB 를 읽지 않고 캐시된 값만 (없으면 None)
+        return self._rows
+
+    def get(self, db: Session):
+        rows = self._rows
+        if rows is None:
+            version = self.version
+            query = select(self.model.id, *self.columns)
+            rows = {row.id: row._asdict() for row in db.execute(query)}
+            with self._lock:
+                if self.version == version:
+                    self._rows = rows
+        return rows
+
+    def row(self, db: Session, id):
+        # 없는 id 는 다른 워커에서 방금 추가되었고 알림이 아직 오지 않았을 수 있으므로
+        # 한 번 다시 읽은 뒤에도 없으면 None
+        if id is None:
+            return None
+        row = self.get(db).get(id)
+        if row is None:
+            self.clear()
+            row = self.get(db).get(id)
+        return row
+
+
+class JsonCache:
+    # /all 조회 응답을 직렬화한 JSON bytes 로 보관
+    # version 은 ReferenceTable 과 같이 비울 때마다 증가
+    def __init__(self, schema, *tables: str):
+        self.adapter = TypeAdapter(list[schema])
+        self.tables = set(tables)
+        self.version = 0
+        self._body = None
+        self._lock = Lock()
+        register(self)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._body = None
+
+    async def get(self, load):
+        # load: 모델 목록을 반환하는 코루틴 함수 (캐시가 없을 때만 호출)
+        body = self._body
+        if body is None:
+            version = self.version
+            rows = self.adapter.validate_python(await load(), from_attributes=True)
+            body = self.adapter.dump_json(rows)
+            with self._lock:
+                if self.version == version:
+                    self._body = body
+        return body
+
+
+categories = ReferenceTable(Category, Category.name, Category.main_category_id)
+main_categories = ReferenceTable(
+    MainCategory,
+    MainCategory.name,
+    MainCategory.category_type,
+    MainCategory.weekly_limit,
+    MainCategory.asset_id,
+)
+account_cards = ReferenceTable(AccountCard, AccountCard.name)
+# 잔액이 바뀔 때마다 다시 읽지만 한 번의 쿼리
+assets = ReferenceTable(Asset, Asset.name, Asset.amount)
+
+
+def category_type(db: Session, category_id):
+    category = categories.row(db, category_id)
+    if category is None:
+        return None
+    main_category = main_categories.row(db, category["main_category_id"])
+    if main_category is None:
+        return None
+    return main_category["category_type"]
+
+
+def category_types(db: Session, category_ids):
+    # category id -> category_type (없는 id 는 빠짐)
+    types = {}
+    for category_id in set(category_ids):
+        type = category_type(db, category_id)
+        if type is not None:
+            types[category_id] = type
+    return types
+
+
+main_categories_json = JsonCache(MainCategorySchema, "main_categories")
+categories_json = JsonCache(CategorySchema, "categories", "main_categories")
+account_cards_json = JsonCache(AccountCardSchema, "account_cards")
+assets_json = JsonCache(AssetSchema, "assets")
+
+
+class MonthlyTotals:
+    # 월별 / category_type 별 금액 합계
+    # 처음에 statement_daily_totals 에서 읽고, 이후에는 일별 합계 변경분만 더함
+    # version 은 비우거나 변경분을 더할 때마다 증가
+    # (읽는 도중에 바뀌면 읽은 값은 저장하지 않음)
+    tables = {"categories", "main_categories", "statement_daily_totals"}
+
+    def __init__(self):
+        self.version = 0
+        self._months = {}
+        self._lock = Lock()
+        register(self)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._months = {}
+
+    def get(self, db: Session, day, type: int):
+        key = (day.year, day.month)
+        totals = self._months.get(key)
+        if totals is None:
+            version = self.version
+            rows = db.execute(
+                select(MainCategory.category_type, func.sum(StatementDailyTotal.amount))
+                .select_from(StatementDailyTotal)
+                .join(Category, StatementDailyTotal.category_id == Category.id)
+                .join(MainCategory)
+                .filter(in_range(StatementDailyTotal.day, as_days(month_range(day))))
+                .group_by(MainCategory.category_type)
+            )
+            totals = defaultdict(int, {row[0]: row[1] or 0 for row in rows})
+            with self._lock:
+                if self.version == version:
+                    self._months[key] = totals
+        return totals[type]
+
+    def apply(self, deltas):
+        # 카테고리 정보가 없으면 변경분을 알 수 없으므로 비움
+        category_rows = categories.cached()
+        main_category_rows = main_categories.cached()
+        if category_rows is None or main_category_rows is None:
+            self.clear()
+            return
+
+        with self._lock:
+            # 읽는 도중인 달은 변경분을 놓칠 수 있으므로 저장하지 않게 함
+            self.version += 1
+            for (day, category_id), delta in deltas.items():
+                totals = self._months.get((day.year, day.month))
+                if totals is None:
+                    continue
+                category = category_rows.get(category_id)
+                if category is None:
+                    self._months.pop((day.year, day.month))
+                    continue
+                main_category = main_category_rows[category["main_category_id"]]
+                totals[main_category["category_type"]] += delta["amount"]
+
+
+monthly_totals = MonthlyTotals()
+
+
+@event.listens_for(Session, "after_commit")
+def apply_daily_total_deltas(session):
+    for deltas in session.info.pop("daily_total_deltas", []):
+        monthly_totals.apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_daily_total_deltas(session):
+    session.info.pop("daily_total_deltas", None)
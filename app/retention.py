@@ -0,0 +1,226 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, func, not_, exists, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy_continuum import versioning_manager
+
+# continuum 버전/트랜잭션 테이블 보관 기간
+# - 보관 기간 이전에 다음 버전으로 바뀐 버전만 지움 (엔티티마다 최신 버전은 항상 남음)
+# - 보관 기간을 설정한 테이블만 지움 (기본값은 지우지 않음)
+# - 지우기 전에 VERSION_ARCHIVE_DIR 에 gzip JSON Lines 로 보관 (설정하지 않으면 지우지 않음)
+#   컨테이너 안의 경로라면 볼륨을 연결해야 재배포 후에도 남음
+# - batch_size 개씩 지우고 바로 커밋해서 잠금을 오래 잡지 않고,
+#   한 번에 max_batches 까지만 처리한 뒤 나머지는 다음 실행에서 이어감
+# - 여러 워커가 동시에 실행해도 배치마다 advisory lock 을 잡은 한 곳만 지움
+#
+# VERSION_RETENTION_DAYS=365 VERSION_RETENTION="statements=180,assets=off"
+# VERSION_ARCHIVE_DIR=/data/archive/versions
+
+VERSION_RETENTION_DAYS = (
+    int(os.getenv("VERSION_RETENTION_DAYS"))
+    if os.getenv("VERSION_RETENTION_DAYS")
+    else None
+)
+VERSION_ARCHIVE_DIR = os.getenv("VERSION_ARCHIVE_DIR") or None
+BATCH_SIZE = 1000
+MAX_BATCHES = 10
+# pg_try_advisory_xact_lock 키
+PRUNE_LOCK_KEY = 0x76657273
+
+
+def parse_retention(value: str):
+    # 테이블별 보관 일수 (off: 지우지 않음)
+    retention = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        table, _, days = item.partition("=")
+        days = days.strip()
+        retention[table.strip()] = None if days == "off" else int(days)
+    return retention
+
+
+VERSION_RETENTION = parse_retention(os.getenv("VERSION_RETENTION", ""))
+
+
+def retention_days(table: str, days: int | None = VERSION_RETENTION_DAYS):
+    # None: 지우지 않음
+    return VERSION_RETENTION.get(table, days)
+
+
+def retention_enabled(days: int | None = VERSION_RETENTION_DAYS):
+    return days is not None or any(
+        value is not None for value in VERSION_RETENTION.values()
+    )
+
+
+class VersionArchive:
+    # 테이블마다 한 파일, 배치마다 gzip 멤버를 덧붙임
+    def __init__(self, directory: str, now: datetime):
+        self.directory = directory
+        self.stamp = now.strftime("%Y%m%d%H%M%S")
+
+    def write(self, table: str, rows):
+        if not rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{table}-{self.stamp}.jsonl.gz")
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(dict(row), ensure_ascii=False, default=str))
+                f.write("\n")
+
+
+def _cutoff_transaction(db: Session, cutoff: datetime):
+    # cutoff 이전에 발행된 마지막 트랜잭션 id
+    transaction = versioning_manager.transaction_cls
+    return db.scalar(
+        select(func.max(transaction.id)).filter(transaction.issued_at < cutoff)
+    )
+
+
+def _lock(db: Session):
+    # 다른 워커가 배치를 처리 중이면 False (트랜잭션이 끝나면 풀림)
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return db.scalar(select(func.pg_try_advisory_xact_lock(PRUNE_LOCK_KEY)))
+
+
+def _prune_table(db, table, cutoff_transaction, archive, batch_size, max_batches):
+    pruned = 0
+    for _ in range(max_batches):
+        if not _lock(db):
+            db.rollback()
+            return pruned, False
+        rows = (
+            db.execute(
+                select(table)
+                .filter(table.c.end_transaction_id <= cutoff_transaction)
+                .order_by(table.c.end_transaction_id)
+                .limit(batch_size)
+            )
+            .mappings()
+            .all()
+        )
+        if not rows:
+            return pruned, False
+
+        archive.write(table.name, rows)
+        db.execute(
+            delete(table).where(
+                tuple_(table.c.id, table.c.transaction_id).in_(
+                    [(row["id"], row["transaction_id"]) for row in rows]
+                )
+            )
+        )
+        db.commit()
+        pruned += len(rows)
+        if len(rows) < batch_size:
+            return pruned, False
+    return pruned, True
+
+
+def _prune_transactions(db, cutoff_transaction, archive, batch_size, max_batches):
+    # 어떤 버전도 가리키지 않는 오래된 트랜잭션 행
+    transaction = versioning_manager.transaction_cls.__table__
+    referenced = [
+        exists().where(column == transaction.c.id)
+        for version_cls in versioning_manager.version_class_map.values()
+        for column in (
+            version_cls.__table__.c.transaction_id,
+            version_cls.__table__.c.end_transaction_id,
+        )
+    ]
+    pruned = 0
+    for _ in range(max_batches):
+        if not _lock(db):
+            db.rollback()
+            return pruned, False
+        rows = (
+            db.execute(
+                select(transaction)
+                .filter(transaction.c.id <= cutoff_transaction)
+                .filter(and_(*(not_(clause) for clause in referenced)))
+                .order_by(transaction.c.id)
+                .limit(batch_size)
+            )
+            .mappings()
+            .all()
+        )
+        if not rows:
+            return pruned, False
+
+        archive.write(transaction.name, rows)
+        db.execute(
+            delete(transaction).where(transaction.c.id.in_([row["id"] for row in rows]))
+        )
+        db.commit()
+        pruned += len(rows)
+        if len(rows) < batch_size:
+            return pruned, False
+    return pruned, True
+
+
+def prune_versions(
+    db: Session,
+    now: datetime | None = None,
+    archive_dir: str | None = VERSION_ARCHIVE_DIR,
+    batch_size: int = BATCH_SIZE,
+    max_batches: int = MAX_BATCHES,
+    days: int | None = VERSION_RETENTION_DAYS,
+):
+    # 테이블별로 지운 행 수와 남은 작업이 있는지 반환
+    if not archive_dir:
+        raise ValueError("VERSION_ARCHIVE_DIR 없이 버전을 지우지 않음")
+    now = now or datetime.now()
+    archive = VersionArchive(archive_dir, now)
+    result = dict(pruned={}, remaining=False)
+
+    horizons = []
+    for model, version_cls in versioning_manager.version_class_map.items():
+        table_days = retention_days(model.__tablename__, days)
+        if table_days is None:
+            continue
+        horizons.append(table_days)
+        cutoff_transaction = _cutoff_transaction(db, now - timedelta(days=table_days))
+        if cutoff_transaction is None:
+            continue
+        pruned, remaining = _prune_table(
+            db,
+            version_cls.__table__,
+            cutoff_transaction,
+            archive,
+            batch_size,
+            max_batches,
+        )
+        result["pruned"][version_cls.__table__.name] = pruned
+        result["remaining"] |= remaining
+
+    # 트랜잭션은 가장 긴 보관 기간 기준 (버전이 가리키는 행은 남김)
+    if horizons:
+        cutoff_transaction = _cutoff_transaction(
+            db, now - timedelta(days=max(horizons))
+        )
+        if cutoff_transaction is not None:
+            pruned, remaining = _prune_transactions(
+                db, cutoff_transaction, archive, batch_size, max_batches
+            )
+            result["pruned"]["transaction"] = pruned
+            result["remaining"] |= remaining
+
+    return result
+
+
+if __name__ == "__main__":
+    # python -m app.retention : 남은 작업이 없을 때까지 오래된 버전 정리
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        while True:
+            result = prune_versions(db)
+            print(result["pruned"])
+            if not result["remaining"]:
+                break
+    finally:
+        db.close()
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import Statement, StatementDailyTotal
+
+ROLLUP_FIELDS = ("amount", "discount", "saving")
+
+
+def _insert(connection):
+    if connection.dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+def _values(statement):
+    return {
+        key: getattr(statement, key) for key in ("date", "category_id", *ROLLUP_FIELDS)
+    }
+
+
+def _committed_values(connection, ids):
+    # flush 전이므로 DB 에는 아직 수정/삭제 전 값이 남아 있음
+    columns = [
+        getattr(Statement, key) for key in ("date", "category_id", *ROLLUP_FIELDS)
+    ]
+    rows = connection.execute(
+        select(Statement.id, *columns).filter(Statement.id.in_(ids))
+    )
+    return {row.id: row._asdict() for row in rows}
+
+
+def add_values(deltas, values, sign=1):
+    # values: date, category_id, amount, discount, saving 를 가진 dict
+    if values["date"] is None or values["category_id"] is None:
+        return
+
+    day = values["date"]
+    if isinstance(day, datetime):
+        day = day.date()
+
+    delta = deltas[(day, values["category_id"])]
+    for key in ROLLUP_FIELDS:
+        delta[key] += sign * (values[key] or 0)
+    delta["count"] += sign
+
+
+def new_deltas():
+    return defaultdict(lambda: dict(amount=0, discount=0, saving=0, count=0))
+
+
+def apply_deltas(connection, deltas):
+    insert = _insert(connection)
+    for (day, category_id), delta in deltas.items():
+        statement = insert(StatementDailyTotal).values(
+            day=day, category_id=category_id, **delta
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[StatementDailyTotal.day, StatementDailyTotal.category_id],
+            set_={
+                key: getattr(StatementDailyTotal, key) + statement.excluded[key]
+                for key in delta
+            },
+        )
+        connection.execute(statement)
+
+
+def apply_session_deltas(session: Session, deltas):
+    apply_deltas(session.connection(), deltas)
+    # 커밋 후 메모리의 월별 합계(app.reference)에도 반영
+    session.info.setdefault("daily_total_deltas", []).append(deltas)
+
+
+@event.listens_for(Session, "before_flush")
+def update_daily_totals(session, flush_context, instances):
+    # 내역이 추가/수정/삭제될 때 같은 트랜잭션 안에서 일별 합계를 갱신
+    deltas = new_deltas()
+
+    for obj in session.new:
+        if isinstance(obj, Statement):
+            add_values(deltas, _values(obj), 1)
+
+    changed = [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, Statement) and session.is_modified(obj)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Statement)]
+
+    if changed or deleted:
+        committed = _committed_values(
+            session.connection(), [obj.id for obj in changed + deleted]
+        )
+        for obj in changed + deleted:
+            if obj.id in committed:
+                add_values(deltas, committed[obj.id], -1)
+        for obj in changed:
+            add_values(deltas, _values(obj), 1)
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if deltas:
+        apply_session_deltas(session, deltas)
+
+
+def rebuild_daily_totals(db: Session):
+    day = func.date(Statement.date)
+    db.execute(delete(StatementDailyTotal))
+    db.execute(
+        StatementDailyTotal.__table__.insert().from_select(
+            ["day", "category_id", "amount", "discount", "saving", "count"],
+            select(
+                day,
+                Statement.category_id,
+                func.coalesce(func.sum(Statement.amount), 0),
+                func.coalesce(func.sum(Statement.discount), 0),
+                func.coalesce(func.sum(Statement.saving), 0),
+                func.count(),
+            )
+            .filter(Statement.category_id.is_not(None))
+            .group_by(day, Statement.category_id),
+        )
+    )
+    db.commit()
+
+
+if __name__ == "__main__":
+    # python -m app.rollup : statement_daily_totals 전체 재계산
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuild_daily_totals(db)
+    finally:
+        db.close()
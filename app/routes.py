@@ -1,20 +1,20 @@
-import calendar
-from collections import defaultdict
 from datetime import timedelta
 from typing import Optional, Union
-from fastapi import Form, Query
+from fastapi import Query, Request
 from fastapi.exceptions import HTTPException
-from fastapi.responses import Response
-from fastapi.types import Any
+from fastapi.responses import Response, StreamingResponse
 from fastapi.routing import APIRouter
 from fastapi.param_functions import Depends
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
-from database import get_db
+from fastapi_pagination import Page, Params, pagination_ctx
+from fastapi_pagination.ext.sqlalchemy import apaginate
+from database import get_async_db
 from datetime import datetime, date
-from sqlalchemy.orm import Session
-from sqlalchemy import select, text, func, extract, and_, or_
-from app.consts import TYPE_INCOME, CURRENT_TIMEZONE, TYPE_SAVING, TYPE_OUTCOME
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import select, update, text, func, case
+from sqlalchemy import LABEL_STYLE_TABLENAME_PLUS_COL
+from sqlalchemy_continuum.utils import is_versioned
+from app.consts import TYPE_INCOME, CURRENT_TIMEZONE
 from models import (
     Category,
     MainCategory,
@@ -22,6 +22,7 @@ from models import (
     Loan,
     AccountCard,
     Statement,
+    StatementDailyTotal,
     AssetHistory,
 )
 from .schema import (
@@ -31,8 +32,10 @@ from .schema import (
     LoanSchema,
     AccountCardSchema,
     StatementSchema,
+    StatementCursorPage,
     StatementSummarySchema,
     StatementCategorySumSchema,
+    StatementBatchResultSchema,
     AssetSchema2,
 )
 from .in_schema import (
@@ -42,24 +45,51 @@ from .in_schema import (
     LoanIn,
     AccountCardIn,
     StatementIn,
+    StatementBatchIn,
 )
-from .utils import new_asset_history, convert_message, push_notification
+from .utils import convert_message, set_statement_fields
+from .jobs import job_queue, record_asset_history, send_notification
+from .telegram import telegram_sender
+from .balances import BalanceDeltas, missing_balance_target
+from .reference import category_types
+from . import reference
+from .networth import add_net_worth, current_net_worth
+from .history import daily_history, monthly_history, first_and_last, version_history
+from .pagination import keyset_paginate
+from .loaders import schema_loader_options
+from .dates import week_range, month_range, year_range, in_range, as_days
+from .filters import (
+    StatementFilter,
+    filter_statements,
+    statement_ordering,
+    name_contains,
+)
+from .cache import QueryCache
+from .autocomplete import name_index
+from .importer import StatementImportError, aimport_lines, aiter_lines
+from .export import export_query, stream_statements
+from .batch import apply_batch
+from . import rollup  # noqa: F401 (statement_daily_totals 갱신 리스너 등록)
+from . import audit  # noqa: F401 (버전 정책이 audit 인 모델의 변경 기록)
+from . import invalidation  # noqa: F401 (다른 워커에 변경 테이블 알림)
 
 router = APIRouter(prefix="/api", tags=["api"])
 
+summary_cache = QueryCache("statements", "categories", "main_categories")
+
 
 @router.get("/main-category", response_model=Page[MainCategorySchema])
 async def get_main_categories(
     sort: str = "id",
     order: str = "ASC",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return paginate(db, select(MainCategory).order_by(text(f"{sort} {order}")))
+    return await apaginate(db, select(MainCategory).order_by(text(f"{sort} {order}")))
 
 
 @router.post("/main-category")
 async def create_main_category(
-    main_category_in: MainCategoryIn, db: Session = Depends(get_db)
+    main_category_in: MainCategoryIn, db: AsyncSession = Depends(get_async_db)
 ):
     new_main_category = MainCategory(
         name=main_category_in.name,
@@ -68,42 +98,46 @@ async def create_main_category(
         asset_id=main_category_in.asset_id,
     )
     db.add(new_main_category)
-    db.commit()
-    db.refresh(new_main_category)
+    await db.commit()
+    await db.refresh(new_main_category)
     return new_main_category
 
 
 @router.get("/main-category/all", response_model=list[MainCategorySchema])
-async def get_main_categories_all(db: Session = Depends(get_db)):
-    return db.query(MainCategory).order_by("category_type").all()
+async def get_main_categories_all(db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return (await db.scalars(select(MainCategory).order_by("category_type"))).all()
+
+    body = await reference.main_categories_json.get(load)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/main-category/{id}", response_model=MainCategorySchema)
-async def get_main_category(id: int, db: Session = Depends(get_db)):
-    return db.query(MainCategory).filter(MainCategory.id == id).first()
+async def get_main_category(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(MainCategory, id)
 
 
 @router.put("/main-category/{id}", response_model=MainCategorySchema)
 async def update_main_category(
     id: int,
     main_category_in: MainCategoryIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    main_category = db.query(MainCategory).filter(MainCategory.id == id).first()
+    main_category = await db.get(MainCategory, id)
     main_category.name = main_category_in.name
     main_category.weekly_limit = main_category_in.weekly_limit
     main_category.category_type = main_category_in.category_type
     main_category.asset_id = main_category_in.asset_id
-    db.commit()
-    db.refresh(main_category)
+    await db.commit()
+    await db.refresh(main_category)
     return main_category
 
 
 @router.delete("/main-category/{id}")
-async def delete_main_category(id: int, db: Session = Depends(get_db)):
-    main_category = db.query(MainCategory).filter(MainCategory.id == id).first()
-    db.delete(main_category)
-    db.commit()
+async def delete_main_category(id: int, db: AsyncSession = Depends(get_async_db)):
+    main_category = await db.get(MainCategory, id)
+    await db.delete(main_category)
+    await db.commit()
     return {"message": "Main Category deleted successfully"}
 
 
@@ -111,68 +145,87 @@ async def delete_main_category(id: int, db: Session = Depends(get_db)):
 async def get_categories(
     sort: str = "id",
     order: str = "ASC",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return paginate(db, select(Category).order_by(text(f"{sort} {order}")))
+    # main_categories 가 같이 조인되므로 컬럼 이름을 테이블로 한정
+    if sort in Category.__table__.c:
+        sort = f"categories.{sort}"
+
+    return await apaginate(
+        db,
+        select(Category)
+        .options(*schema_loader_options(Category, CategorySchema))
+        .order_by(text(f"{sort} {order}")),
+    )
 
 
 @router.post("/category")
 async def create_category(
     category_in: CategoryIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     new_category = Category(
         name=category_in.name, main_category_id=category_in.main_category_id
     )
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
     return new_category
 
 
 @router.get("/category/all", response_model=list[CategorySchema])
-async def get_categories_all(db: Session = Depends(get_db)):
-    return db.query(Category).order_by("main_category_id").all()
+async def get_categories_all(db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return (
+            await db.scalars(
+                select(Category)
+                .options(*schema_loader_options(Category, CategorySchema))
+                .order_by(Category.main_category_id)
+            )
+        ).all()
+
+    body = await reference.categories_json.get(load)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/category/{id}")
-async def get_category(id: int, db: Session = Depends(get_db)):
-    return db.query(Category).filter(Category.id == id).first()
+async def get_category(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(Category, id)
 
 
 @router.put("/category/{id}")
 async def update_category(
     id: int,
     category_in: CategoryIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    category = db.query(Category).filter(Category.id == id).first()
+    category = await db.get(Category, id)
     category.name = category_in.name
     category.main_category_id = category_in.main_category_id
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
     return category
 
 
 @router.delete("/category/{id}")
-async def delete_category(id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == id).first()
-    db.delete(category)
-    db.commit()
+async def delete_category(id: int, db: AsyncSession = Depends(get_async_db)):
+    category = await db.get(Category, id)
+    await db.delete(category)
+    await db.commit()
     return {"message": "Category deleted successfully"}
 
 
 @router.get("/asset", response_model=Page[AssetSchema])
 async def get_assets(
-    sort: str = "id", order: str = "ASC", db: Session = Depends(get_db)
+    sort: str = "id", order: str = "ASC", db: AsyncSession = Depends(get_async_db)
 ):
-    return paginate(db, select(Asset).order_by(text(f"{sort} {order}")))
+    return await apaginate(db, select(Asset).order_by(text(f"{sort} {order}")))
 
 
 @router.post("/asset")
 async def create_asset(
     asset_in: AssetIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     new_asset = Asset(
         name=asset_in.name,
@@ -181,251 +234,157 @@ async def create_asset(
         description=asset_in.description,
     )
     db.add(new_asset)
-    db.commit()
-    db.refresh(new_asset)
+    await db.commit()
+    await db.refresh(new_asset)
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
 
     return new_asset
 
 
 @router.get("/asset/all", response_model=list[AssetSchema])
-async def get_assets_all(db: Session = Depends(get_db)):
-    return db.query(Asset).order_by("asset_type", "name").all()
+async def get_assets_all(db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return (await db.scalars(select(Asset).order_by("asset_type", "name"))).all()
+
+    body = await reference.assets_json.get(load)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/asset/total")
-async def get_assets_total(db: Session = Depends(get_db)):
-    return db.query(func.sum(Asset.amount)).scalar()
+async def get_assets_total(db: AsyncSession = Depends(get_async_db)):
+    return await db.scalar(select(func.sum(Asset.amount)))
 
 
 @router.get("/asset/history")
 async def get_assets_history(
-    date: date, mode: int = Query(1), db: Session = Depends(get_db)
+    date: date, mode: int = Query(1), db: AsyncSession = Depends(get_async_db)
 ):
+    # 날짜/달마다 마지막 값만 DB 에서 골라옴 (asset_histories(day) 인덱스)
     # 주간모드
     if mode == 1:
         prev = date - timedelta(days=date.weekday() + 1)
-        next_date = date + timedelta(days=1)
-
-        query = (
-            db.query(AssetHistory)
-            .filter(AssetHistory.created_at >= prev)
-            .filter(AssetHistory.created_at <= next_date)
-            .order_by(AssetHistory.created_at)
-            .all()
-        )
-
-        # created_at의 day마다 가장 마지막 값만 저장
-        result = {}
-
-        for q in query:
-            result[q.created_at.strftime("%Y-%m-%d")] = q.amount
-
-        response = []
-        for k in result.keys():
-            response.append(dict(name=k, value=result[k]))
-
-        return response
+        query = daily_history(prev, date + timedelta(days=1))
+        name_format = "%Y-%m-%d"
 
     # 월간모드
     elif mode == 2:
-        prev = date.replace(day=1)
-        next_date = date.replace(day=calendar.monthrange(date.year, date.month)[1])
-
-        query = (
-            db.query(AssetHistory)
-            .filter(AssetHistory.created_at >= prev)
-            .filter(AssetHistory.created_at <= next_date)
-            .order_by(AssetHistory.created_at)
-            .all()
-        )
-
-        # created_at의 day마다 가장 마지막 값만 저장
-        result = {}
-
-        for q in query:
-            result[q.created_at.strftime("%Y-%m-%d")] = q.amount
-
-        response = []
-        for k in result.keys():
-            response.append(dict(name=k, value=result[k]))
-
-        return response
+        query = daily_history(*as_days(month_range(date)))
+        name_format = "%Y-%m-%d"
 
     # 년간 모드
     elif mode == 3:
-        prev = date.replace(month=1, day=1)
-        next_date = date.replace(month=12, day=31)
-
-        query = (
-            db.query(AssetHistory)
-            .filter(AssetHistory.created_at >= prev)
-            .filter(AssetHistory.created_at <= next_date)
-            .order_by(AssetHistory.created_at)
-            .all()
-        )
-
-        result = {}
-
-        for q in query:
-            result[q.created_at.strftime("%Y-%m")] = q.amount
-
-        response = []
-        for k in result.keys():
-            response.append(dict(name=k, value=result[k]))
-
-        return response
+        query = monthly_history(*as_days(year_range(date)))
+        name_format = "%Y-%m"
 
     else:
         return None
 
+    rows = await db.execute(query)
+    return [dict(name=day.strftime(name_format), value=amount) for day, amount in rows]
+
 
 @router.get("/asset/history/all")
-async def get_assets_history_all(db: Session = Depends(get_db)):
-    return db.query(AssetHistory).all()
+async def get_assets_history_all(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(AssetHistory))).all()
 
 
 @router.get("/asset/prev")
-async def get_assets_prev(db: Session = Depends(get_db)):
+async def get_assets_prev(db: AsyncSession = Depends(get_async_db)):
     now = datetime.now(CURRENT_TIMEZONE).date()
 
     # 최근 일주일(일~토)
     prev = now - timedelta(days=1 + now.weekday())
-    next_date = now + timedelta(days=1)
-
-    asset_sum = db.query(func.sum(Asset.amount)).scalar()
-    loan_sum = db.query(func.sum(Loan.amount)).scalar()
 
-    total_asset = asset_sum - loan_sum
+    total_asset = await db.run_sync(current_net_worth)
 
-    last_asset = (
-        db.query(AssetHistory)
-        .filter(AssetHistory.created_at >= prev)
-        .filter(AssetHistory.created_at <= next_date)
-        .order_by(AssetHistory.created_at)
-        .all()
-    )
+    # 주간 변화량 = 마지막 값 - 처음 값
+    first_value, last_value = (
+        await db.execute(first_and_last(prev, now + timedelta(days=1)))
+    ).one()
 
-    if last_asset is not None and len(last_asset) > 0:
-        first_value = last_asset[0].amount
-        diff_sum = 0
-        for i in range(1, len(last_asset)):
-            diff = last_asset[i].amount - first_value
-            diff_sum += diff
-            first_value = last_asset[i].amount
-
-        return {
-            "total_asset": total_asset,
-            "diff_asset": diff_sum,
-        }
-    else:
-        return {
-            "total_asset": total_asset,
-            "diff_asset": 0,
-        }
+    return {
+        "total_asset": total_asset,
+        "diff_asset": 0 if first_value is None else last_value - first_value,
+    }
 
 
 @router.get("/asset/{id}")
-async def get_asset(id: int, db: Session = Depends(get_db)):
-    return db.query(Asset).filter(Asset.id == id).first()
+async def get_asset(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(Asset, id)
 
 
 @router.put("/asset/{id}", response_model=AssetSchema)
 async def update_asset(
     id: int,
     asset_in: AssetIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    asset = db.query(Asset).filter(Asset.id == id).first()
+    asset = await db.get(Asset, id)
     asset.name = asset_in.name
     asset.asset_type = asset_in.asset_type
     asset.amount = asset_in.amount
     asset.description = asset_in.description
-    db.commit()
-    db.refresh(asset)
+    await db.commit()
+    await db.refresh(asset)
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
 
     return asset
 
 
 @router.delete("/asset/{id}")
-async def delete_asset(id: int, db: Session = Depends(get_db)):
-    asset = db.query(Asset).filter(Asset.id == id).first()
-    db.delete(asset)
-    db.commit()
+async def delete_asset(id: int, db: AsyncSession = Depends(get_async_db)):
+    asset = await db.get(Asset, id)
+    await db.delete(asset)
+    await db.commit()
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
 
     return {"message": "Asset deleted successfully"}
 
 
 @router.get("/asset/{id}/history", response_model=list[AssetSchema2])
-async def get_asset_detail_history(id: int, db: Session = Depends(get_db)):
-    asset = db.query(Asset).filter(Asset.id == id).first()
+async def get_asset_detail_history(id: int, db: AsyncSession = Depends(get_async_db)):
+    asset = await db.get(Asset, id)
 
     if asset is None:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    data = defaultdict(int)
-    prev_amount = -1
-    for history in asset.versions:
-        if history.updated_at is None:
-            if history.amount != prev_amount:
-                data[history.created_at.strftime("%Y-%m-%d")] = history.amount
-
-        else:
-            if history.amount != prev_amount:
-                data[history.updated_at.strftime("%Y-%m-%d")] = history.amount
-
-        prev_amount = history.amount
-
-    result = []
-    for k, v in data.items():
-        result.append(dict(date=k, amount=v))
+    # 버전 정책이 off/audit 이면 버전 테이블이 없음
+    if not is_versioned(Asset):
+        return []
 
-    return result[-20:]
+    rows = await db.execute(version_history(Asset, id))
+    return [dict(date=day.strftime("%Y-%m-%d"), amount=amount) for day, amount in rows]
 
 
 @router.get("/loan", response_model=Page[LoanSchema])
 async def get_loans(
-    sort: str = "id", order: str = "ASC", db: Session = Depends(get_db)
+    sort: str = "id", order: str = "ASC", db: AsyncSession = Depends(get_async_db)
 ):
-    return paginate(db, select(Loan).order_by(text(f"{sort} {order}")))
+    return await apaginate(db, select(Loan).order_by(text(f"{sort} {order}")))
 
 
 @router.get("/loan/{id}/history", response_model=list[AssetSchema2])
-async def get_loan_detail_history(id: int, db: Session = Depends(get_db)):
-    loan = db.query(Loan).filter(Loan.id == id).first()
+async def get_loan_detail_history(id: int, db: AsyncSession = Depends(get_async_db)):
+    loan = await db.get(Loan, id)
 
     if loan is None:
         raise HTTPException(status_code=404, detail="Loan not found")
 
-    data = defaultdict(int)
-    prev_amount = -1
-    for history in loan.versions:
-        if history.updated_at is None:
-            if history.amount != prev_amount:
-                data[history.created_at.strftime("%Y-%m-%d")] = history.amount
-
-        else:
-            if history.amount != prev_amount:
-                data[history.updated_at.strftime("%Y-%m-%d")] = history.amount
-
-        prev_amount = history.amount
-
-    result = []
-    for k, v in data.items():
-        result.append(dict(date=k, amount=v))
+    # 버전 정책이 off/audit 이면 버전 테이블이 없음
+    if not is_versioned(Loan):
+        return []
 
-    return result[-20:]
+    rows = await db.execute(version_history(Loan, id))
+    return [dict(date=day.strftime("%Y-%m-%d"), amount=amount) for day, amount in rows]
 
 
 @router.post("/loan")
 async def create_loan(
     loan_in: LoanIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     new_loan = Loan(
         name=loan_in.name,
@@ -438,38 +397,50 @@ async def create_loan(
         payment_amount=loan_in.payment_amount,
     )
     db.add(new_loan)
-    db.commit()
-    db.refresh(new_loan)
+    await db.commit()
+    await db.refresh(new_loan)
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
 
     return new_loan
 
 
 @router.get("/loan/all")
-async def get_loans_all(db: Session = Depends(get_db)):
-    return db.query(Loan).all()
+async def get_loans_all(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Loan))).all()
 
 
 @router.get("/loan/total")
-async def get_loans_total(db: Session = Depends(get_db)):
-    return db.query(func.sum(Loan.amount)).scalar()
+async def get_loans_total(db: AsyncSession = Depends(get_async_db)):
+    return await db.scalar(select(func.sum(Loan.amount)))
 
 
 @router.get("/loan/{id}")
-async def get_loan(id: int, db: Session = Depends(get_db)):
-    return db.query(Loan).filter(Loan.id == id).first()
+async def get_loan(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(Loan, id)
 
 
 @router.post("/loan/{id}/payment", summary="상환하기")
-async def loan_payment(id: int, db: Session = Depends(get_db)):
-    loan = db.query(Loan).filter(Loan.id == id).first()
-    loan.current_month += 1
-    loan.amount = loan.amount - loan.payment_amount
-    db.commit()
-    db.refresh(loan)
+async def loan_payment(id: int, db: AsyncSession = Depends(get_async_db)):
+    # 읽고 쓰지 않고 한 번의 UPDATE 로 상환 (동시 요청에도 안전)
+    loan = await db.scalar(
+        update(Loan)
+        .where(Loan.id == id)
+        .values(
+            current_month=Loan.current_month + 1,
+            amount=Loan.amount - func.coalesce(Loan.payment_amount, 0),
+        )
+        .returning(Loan)
+        .execution_options(populate_existing=True)
+    )
+
+    if loan is None:
+        raise HTTPException(status_code=404, detail="Loan not found")
+
+    await db.run_sync(add_net_worth, loan.payment_amount or 0)
+    await db.commit()
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
 
     return loan
 
@@ -478,9 +449,9 @@ async def loan_payment(id: int, db: Session = Depends(get_db)):
 async def update_loan(
     id: int,
     loan_in: LoanIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    loan = db.query(Loan).filter(Loan.id == id).first()
+    loan = await db.get(Loan, id)
     loan.name = loan_in.name
     loan.principal = loan_in.principal
     loan.interest_rate = loan_in.interest_rate
@@ -489,34 +460,34 @@ async def update_loan(
     loan.description = loan_in.description
     loan.amount = loan_in.amount
     loan.payment_amount = loan_in.payment_amount
-    db.commit()
-    db.refresh(loan)
+    await db.commit()
+    await db.refresh(loan)
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
     return loan
 
 
 @router.delete("/loan/{id}")
-async def delete_loan(id: int, db: Session = Depends(get_db)):
-    loan = db.query(Loan).filter(Loan.id == id).first()
-    db.delete(loan)
-    db.commit()
+async def delete_loan(id: int, db: AsyncSession = Depends(get_async_db)):
+    loan = await db.get(Loan, id)
+    await db.delete(loan)
+    await db.commit()
 
-    new_asset_history(db)
+    await job_queue.enqueue(record_asset_history)
     return {"message": "Loan deleted successfully"}
 
 
 @router.get("/account-card", response_model=Page[AccountCardSchema])
 async def get_account_cards(
-    sort: str = "id", order: str = "ASC", db: Session = Depends(get_db)
+    sort: str = "id", order: str = "ASC", db: AsyncSession = Depends(get_async_db)
 ):
-    return paginate(db, select(AccountCard).order_by(text(f"{sort} {order}")))
+    return await apaginate(db, select(AccountCard).order_by(text(f"{sort} {order}")))
 
 
 @router.post("/account-card")
 async def create_account_card(
     account_card_in: AccountCardIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     new_account_card = AccountCard(
         name=account_card_in.name,
@@ -525,119 +496,91 @@ async def create_account_card(
         description=account_card_in.description,
     )
     db.add(new_account_card)
-    db.commit()
-    db.refresh(new_account_card)
+    await db.commit()
+    await db.refresh(new_account_card)
     return new_account_card
 
 
 @router.get("/account-card/all", response_model=list[AccountCardSchema])
-async def get_account_cards_all(db: Session = Depends(get_db)):
-    return db.query(AccountCard).all()
+async def get_account_cards_all(db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return (await db.scalars(select(AccountCard))).all()
+
+    body = await reference.account_cards_json.get(load)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/account-card/{id}")
-async def get_account_card(id: int, db: Session = Depends(get_db)):
-    return db.query(AccountCard).filter(AccountCard.id == id).first()
+async def get_account_card(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.get(AccountCard, id)
 
 
 @router.put("/account-card/{id}")
 async def update_account_card(
     id: int,
     account_card_in: AccountCardIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    account_card = db.query(AccountCard).filter(AccountCard.id == id).first()
+    account_card = await db.get(AccountCard, id)
     account_card.name = account_card_in.name
     account_card.card_type = account_card_in.card_type
     account_card.amount = account_card_in.amount
     account_card.description = account_card_in.description
-    db.commit()
-    db.refresh(account_card)
+    await db.commit()
+    await db.refresh(account_card)
     return account_card
 
 
 @router.delete("/account-card/{id}")
-async def delete_account_card(id: int, db: Session = Depends(get_db)):
-    account_card = db.query(AccountCard).filter(AccountCard.id == id).first()
-    db.delete(account_card)
-    db.commit()
+async def delete_account_card(id: int, db: AsyncSession = Depends(get_async_db)):
+    account_card = await db.get(AccountCard, id)
+    await db.delete(account_card)
+    await db.commit()
     return {"message": "Account card deleted successfully"}
 
 
-@router.get("/statement", response_model=Page[StatementSchema])
+@router.get(
+    "/statement", response_model=Union[Page[StatementSchema], StatementCursorPage]
+)
 async def get_statements(
     sort: str = "id",
     order: str = "ASC",
-    type: int = None,
-    q: Optional[str] = None,
-    date_lte: Optional[date] = None,
-    date_gte: Optional[date] = None,
-    category_id: Optional[int] = None,
-    main_category_id: Optional[int] = None,
-    is_fixed: bool = Query(None),
-    db: Session = Depends(get_db),
+    filters: StatementFilter = Depends(),
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    params: Params = Depends(pagination_ctx(Page[StatementSchema])),
+    db: AsyncSession = Depends(get_async_db),
 ):
     statement_list = (
-        db.query(Statement)
+        select(Statement)
         .join(Category, Statement.category_id == Category.id)
         .join(MainCategory)
+        .options(*schema_loader_options(Statement, StatementSchema))
+        .set_label_style(LABEL_STYLE_TABLENAME_PLUS_COL)
     )
+    statement_list = filter_statements(statement_list, filters)
 
-    if q is not None:
-        statement_list = statement_list.filter(Statement.name.like(f"%{q}%"))
-    if date_lte is not None:
-        date_lte = date_lte + timedelta(days=1)
-        statement_list = statement_list.filter(Statement.date < date_lte)
-    if date_gte is not None:
-        statement_list = statement_list.filter(Statement.date >= date_gte)
-    if type is not None:
-        if type < 3:
-            statement_list = statement_list.filter(MainCategory.category_type == type)
-
-        # 지출을 제외한 순수 저축
-        elif type == 3:
-            statement_list = statement_list.filter(
-                and_(
-                    MainCategory.category_type == 3,
-                    and_(Statement.category_id != 57, Statement.category_id != 58),
-                )
-            )
-
-        # 모든 저축 항목
-        elif type == 4:
-            statement_list = statement_list.filter(MainCategory.category_type == 3)
-
-        # 고정 지출
-        elif type == 5:
-            statement_list = statement_list.filter(
-                and_(MainCategory.category_type == 2, Statement.is_fixed == True)
-            )
-    if category_id is not None:
-        statement_list = statement_list.filter(Statement.category_id == category_id)
-
-    if main_category_id is not None:
-
-        statement_list = statement_list.filter(
-            Category.main_category_id == main_category_id
+    # cursor 파라미터가 있으면 (첫 페이지는 빈 값) keyset 페이지네이션
+    if cursor is not None:
+        return await keyset_paginate(
+            db, statement_list, sort, order, params.size, cursor, with_total
         )
 
-    if is_fixed is not None:
-        statement_list = statement_list.filter(Statement.is_fixed == is_fixed)
-
-    if sort == "id":
-        sort = "statements_id"
+    # 조인된 테이블과 컬럼 이름이 겹치지 않도록 statements 라벨로 정렬
+    if sort in Statement.__table__.c:
+        sort = f"statements_{sort}"
 
     statement_list = statement_list.order_by(
         text(f"{sort} {order}"), text("statements_id desc")
     )
 
-    return paginate(db, statement_list)
+    return await apaginate(db, statement_list, params)
 
 
 @router.post("/statement")
 async def create_statement(
     statement_in: StatementIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     new_statement = Statement(
         name=statement_in.name,
@@ -652,134 +595,161 @@ async def create_statement(
         loan_id=statement_in.loan_id,
         is_fixed=statement_in.is_fixed,
     )
-    category = (
-        db.query(Category).filter(Category.id == statement_in.category_id).first()
+    # 카테고리 -> category_type 은 기준 정보 캐시에서
+    category_type = await db.run_sync(reference.category_type, statement_in.category_id)
+    if category_type is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    missing = await db.run_sync(
+        missing_balance_target, [statement_in.asset_id], [statement_in.loan_id]
     )
-    change_asset = False
+    if missing:
+        raise HTTPException(status_code=404, detail=missing)
 
     # 지출일 때 마이너스
-    if category.main_category.category_type != TYPE_INCOME:
+    if category_type != TYPE_INCOME:
         if statement_in.amount > 0:
             new_statement.amount = -statement_in.amount
 
-    asset = None
-    # asset가 있을 때
-    if statement_in.asset_id is not None:
-        asset = db.query(Asset).filter(Asset.id == statement_in.asset_id).first()
-        if category.main_category.category_type == TYPE_SAVING:
-            asset.amount += statement_in.amount
-            change_asset = True
-        elif category.main_category.category_type == TYPE_OUTCOME:
-            asset.amount -= statement_in.amount - statement_in.discount
-            change_asset = True
-
-    loan = None
-    # loan이 있을 때
-    if statement_in.loan_id is not None:
-        loan = db.query(Loan).filter(Loan.id == statement_in.loan_id).first()
-        loan.amount -= statement_in.saving
-        change_asset = True
+    # asset, loan 잔액은 DB 에서 바로 더하고 빼기 (동시 요청에도 안전)
+    balances = BalanceDeltas()
+    balances.add_created(category_type, statement_in)
 
     db.add(new_statement)
-    db.commit()
-    db.refresh(new_statement)
+    await db.run_sync(balances.apply)
+    await db.commit()
+    await db.refresh(new_statement)
 
-    if change_asset:
-        if asset is not None:
-            db.refresh(asset)
-        if loan is not None:
-            db.refresh(loan)
-        new_asset_history(db)
+    if balances:
+        await job_queue.enqueue(record_asset_history)
 
     if statement_in.is_alert:
-        message = convert_message(db, new_statement)
-        push_notification(message)
+        message = await db.run_sync(convert_message, new_statement)
+        await job_queue.enqueue(send_notification, message)
 
     return new_statement
 
 
+@router.post("/statement/batch", response_model=list[StatementBatchResultSchema])
+async def batch_statements(
+    items: list[StatementBatchIn],
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 여러 건의 추가/수정/삭제를 한 트랜잭션으로 처리 (하나라도 실패하면 전체 취소)
+    results, messages, balances_changed = await db.run_sync(apply_batch, items)
+    if messages is None:
+        raise HTTPException(
+            status_code=400, detail=[result.model_dump() for result in results]
+        )
+
+    # 자산 기록과 알림은 한 번씩
+    if balances_changed:
+        await job_queue.enqueue(record_asset_history)
+    if messages:
+        await job_queue.enqueue(send_notification, "\n\n".join(messages))
+
+    return results
+
+
+@router.post("/statement/import")
+async def import_statements(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 요청 본문(CSV 또는 NDJSON)을 받는 대로 줄 단위로 읽어 일괄 등록
+    try:
+        return await aimport_lines(db, aiter_lines(request.stream()), format)
+    except StatementImportError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.get("/statement/export")
+async def export_statements(
+    sort: str = "id",
+    order: str = "ASC",
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: StatementFilter = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_statements(db, export_query(filters, sort, order), format),
+        media_type=f"{media_type}; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="statements.{format}"'},
+    )
+
+
 @router.get("/statement/summary", response_model=StatementSummarySchema)
 async def get_statement_summary(
     sort: str = "id",
     order: str = "ASC",
-    type: int = None,
-    q: Optional[str] = None,
-    date_lte: date = None,
-    date_gte: date = None,
-    category_id: int = None,
-    main_category_id: int = None,
-    is_fixed: bool = Query(None),
+    filters: StatementFilter = Depends(),
     size: int = Query(50, gt=0, le=100),
     page: int = Query(1, gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    key = (filters, sort, order.upper(), size, page)
+    data = summary_cache.get(key)
+    if data is not None:
+        return data
+    version = summary_cache.version
+
+    # 목록과 같은 순서로 번호를 매겨 페이지/전체 합계를 한 번에 계산
     statement_list = (
-        db.query(Statement)
+        select(
+            Statement.amount,
+            Statement.discount,
+            Statement.saving,
+            func.row_number()
+            .over(order_by=statement_ordering(sort, order))
+            .label("row_number"),
+        )
         .join(Category, Statement.category_id == Category.id)
         .join(MainCategory)
     )
+    statement_list = filter_statements(statement_list, filters).subquery()
 
-    if q is not None:
-        statement_list = statement_list.filter(Statement.name.like(f"%{q}%"))
-    if date_lte is not None:
-        statement_list = statement_list.filter(Statement.date <= date_lte)
-    if date_gte is not None:
-        statement_list = statement_list.filter(Statement.date >= date_gte)
-    if type is not None:
-        if type < 3:
-            statement_list = statement_list.filter(MainCategory.category_type == type)
-        elif type == 3:
-            statement_list = statement_list.filter(
-                and_(
-                    MainCategory.category_type == 3,
-                    and_(Statement.category_id != 57, Statement.category_id != 58),
-                )
-            )
-        elif type == 4:
-            statement_list = statement_list.filter(MainCategory.category_type == 3)
-        elif type == 5:
-            statement_list = statement_list.filter(
-                and_(MainCategory.category_type == 2, Statement.is_fixed == True)
-            )
-    if category_id is not None:
-        statement_list = statement_list.filter(Statement.category_id == category_id)
-    if main_category_id is not None:
-        statement_list = statement_list.filter(
-            Category.main_category_id == main_category_id
-        )
-    if is_fixed is not None:
-        statement_list = statement_list.filter(Statement.is_fixed == is_fixed)
-
-    statement_list = statement_list.order_by(text(f"{sort} {order}"))
+    in_page = statement_list.c.row_number.between((page - 1) * size + 1, page * size)
 
-    # pagination
-    page_statement_list = statement_list.offset((page - 1) * size).limit(size)
-    page_subquery = page_statement_list.subquery()
+    def page_sum(column):
+        return func.coalesce(func.sum(case((in_page, column), else_=0)), 0)
 
-    page_result = db.query(
-        func.sum(page_subquery.c.amount).label("amount"),
-        func.sum(page_subquery.c.discount).label("discount"),
-        func.sum(page_subquery.c.saving).label("saving"),
-    ).all()
+    def total_sum(column):
+        return func.coalesce(func.sum(column), 0)
 
-    # total
-    total_subquery = statement_list.subquery()
-    total_result = db.query(
-        func.sum(total_subquery.c.amount).label("amount"),
-        func.sum(total_subquery.c.discount).label("discount"),
-        func.sum(total_subquery.c.saving).label("saving"),
-    ).all()
+    result = (
+        await db.execute(
+            select(
+                page_sum(statement_list.c.amount).label("page_amount"),
+                page_sum(statement_list.c.discount).label("page_discount"),
+                page_sum(statement_list.c.saving).label("page_saving"),
+                total_sum(statement_list.c.amount).label("total_amount"),
+                total_sum(statement_list.c.discount).label("total_discount"),
+                total_sum(statement_list.c.saving).label("total_saving"),
+            )
+        )
+    ).one()
 
-    data = StatementSummarySchema()
-    data.page_amount = page_result[0][0] if page_result[0][0] else 0
-    data.page_discount = page_result[0][1] if page_result[0][1] else 0
-    data.page_saving = page_result[0][2] if page_result[0][2] else 0
+    data = StatementSummarySchema(**result._asdict())
+    summary_cache.set(key, data, version)
+    return data
 
-    data.total_amount = total_result[0][0] if total_result[0][0] else 0
-    data.total_discount = total_result[0][1] if total_result[0][1] else 0
-    data.total_saving = total_result[0][2] if total_result[0][2] else 0
 
-    return data
+def statement_sum_subquery(group_column, date_range, *filters):
+    # 기간 내 일별 합계를 group_column 별로 합산
+    return (
+        select(
+            group_column.label("id"),
+            func.sum(StatementDailyTotal.amount).label("amount"),
+            func.sum(StatementDailyTotal.discount).label("discount"),
+        )
+        .select_from(StatementDailyTotal)
+        .join(Category, StatementDailyTotal.category_id == Category.id)
+        .join(MainCategory)
+        .filter(in_range(StatementDailyTotal.day, as_days(date_range)), *filters)
+        .group_by(group_column)
+        .subquery()
+    )
 
 
 @router.get("/statement/category", summary="카테고리별 합계", response_model=list)
@@ -788,188 +758,99 @@ async def statement_category(
     date: date,
     category_type: int,
     sub: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # 주간 합계
+    # 주간 합계 (일요일 시작)
     if mode == 1:
-        # 해당 주의 일요일 구하기
-        if date.weekday() == 6:
-            sunday = date
-        else:
-            sunday = date - timedelta(days=date.weekday() + 1)
+        date_range = week_range(date)
 
-        if sub:
-            category_list = (
-                db.query(Category)
-                .join(MainCategory)
-                .filter(MainCategory.category_type == category_type)
-                .all()
-            )
+    # 월간 합계 (메인 카테고리 기준)
+    elif mode == 2:
+        date_range = month_range(date)
+        sub = False
 
-            statement_list = (
-                db.query(
-                    Category.id,
-                    Category.name,
-                    func.sum(Statement.amount).label("amount"),
-                    func.sum(Statement.discount).label("discount"),
-                )
-                .join(Category, Statement.category_id == Category.id)
-                .join(MainCategory)
-                .filter(Statement.date >= sunday)
-                .filter(Statement.date < sunday + timedelta(days=7))
-                .filter(MainCategory.category_type == category_type)
-                .group_by(Category.id)
-            )
+    else:
+        return
 
-        else:
-            category_list = (
-                db.query(MainCategory)
-                .filter(MainCategory.category_type == category_type)
-                .all()
-            )
+    type_filter = MainCategory.category_type == category_type
 
-            statement_list = (
-                db.query(
-                    MainCategory.id,
-                    MainCategory.name,
-                    func.sum(Statement.amount).label("amount"),
-                    func.sum(Statement.discount).label("discount"),
-                )
-                .join(Category, Statement.category_id == Category.id)
-                .join(MainCategory)
-                .filter(Statement.date >= sunday)
-                .filter(Statement.date < sunday + timedelta(days=7))
-                .filter(MainCategory.category_type == category_type)
-                .group_by(MainCategory.id)
+    # 내역이 없는 카테고리도 0 으로 포함되도록 카테고리 기준 LEFT JOIN
+    if sub:
+        statement_sum = statement_sum_subquery(Category.id, date_range, type_filter)
+        query = (
+            select(
+                Category.name,
+                func.coalesce(statement_sum.c.amount, 0),
+                func.coalesce(statement_sum.c.discount, 0),
             )
-
-        data = list()
-        total_amount = 0
-        total_discount = 0
-        for category in category_list:
-            # statement_list의 [0]번째 값에 해당하는 category 업데이트
-            amount = 0
-            discount = 0
-            for statement in statement_list:
-                if category.id == statement[0]:
-                    if category_type == 2 and statement[2] < 0:
-                        amount = statement[2] * -1
-                    else:
-                        amount = statement[2]
-                    discount = statement[3]
-                    break
-
-            total_amount += amount
-            total_discount += discount
-
-            data.append(dict(name=category.name, amount=amount, discount=discount))
-        data.append(dict(name="합계", amount=total_amount, discount=total_discount))
-        return data
-
-    elif mode == 2:
-        category_list = (
-            db.query(MainCategory)
-            .filter(MainCategory.category_type == category_type)
-            .all()
+            .join(MainCategory)
+            .outerjoin(statement_sum, statement_sum.c.id == Category.id)
+            .filter(type_filter)
+            .order_by(Category.id)
         )
 
-        month_start = date.replace(day=1)
-        month_end = date.replace(
-            day=calendar.monthrange(date.year, date.month)[1]
-        ) + timedelta(days=1)
-
-        statement_list = (
-            db.query(
-                MainCategory.id,
+    else:
+        statement_sum = statement_sum_subquery(MainCategory.id, date_range, type_filter)
+        query = (
+            select(
                 MainCategory.name,
-                func.sum(Statement.amount).label("amount"),
-                func.sum(Statement.discount).label("discount"),
+                func.coalesce(statement_sum.c.amount, 0),
+                func.coalesce(statement_sum.c.discount, 0),
             )
-            .join(Category, Statement.category_id == Category.id)
-            .join(MainCategory)
-            .filter(Statement.date >= month_start)
-            .filter(Statement.date <= month_end)
-            .filter(MainCategory.category_type == category_type)
-            .group_by(MainCategory.id)
+            .outerjoin(statement_sum, statement_sum.c.id == MainCategory.id)
+            .filter(type_filter)
+            .order_by(MainCategory.id)
         )
 
-        data = list()
-        total_amount = 0
-        total_discount = 0
-        for category in category_list:
-            # statement_list의 [0]번째 값에 해당하는 category 업데이트
-            amount = 0
-            discount = 0
-            for statement in statement_list:
-                if category.id == statement[0]:
-                    if category_type == 2 and statement[2] < 0:
-                        amount = statement[2] * -1
-                    else:
-                        amount = statement[2]
-                    discount = statement[3]
-                    break
-
-            total_amount += amount
-            total_discount += discount
-
-            data.append(dict(name=category.name, amount=amount, discount=discount))
-        data.append(dict(name="합계", amount=total_amount, discount=total_discount))
-        return data
+    data = list()
+    total_amount = 0
+    total_discount = 0
+    for name, amount, discount in (await db.execute(query)).all():
+        if category_type == 2 and amount < 0:
+            amount = amount * -1
 
-    return
+        total_amount += amount
+        total_discount += discount
+
+        data.append(dict(name=name, amount=amount, discount=discount))
+    data.append(dict(name="합계", amount=total_amount, discount=total_discount))
+    return data
 
 
 @router.get("/statement/subcategory", summary="카테고리별 합계")
 async def statement_subcategory(
-    mode: int, date: date, main_category: int, db: Session = Depends(get_db)
+    mode: int, date: date, main_category: int, db: AsyncSession = Depends(get_async_db)
 ):
-    # 주간 합계
+    # 주간 합계 (일요일 시작)
     if mode == 1:
-        # 해당 주의 일요일 구하기
-        if date.weekday() == 6:
-            sunday = date
-        else:
-            sunday = date - timedelta(days=date.weekday() + 1)
-
-        category_list = (
-            db.query(Category)
-            .join(MainCategory)
-            .filter(MainCategory.id == main_category)
-            .all()
+        statement_sum = statement_sum_subquery(
+            Category.id, week_range(date), Category.main_category_id == main_category
         )
-
-        statement_list = (
-            db.query(
-                Category.id,
+        query = (
+            select(
                 Category.name,
-                func.sum(Statement.amount).label("amount"),
+                MainCategory.category_type,
+                func.coalesce(statement_sum.c.amount, 0),
             )
-            .join(Category, Statement.category_id == Category.id)
             .join(MainCategory)
-            .filter(Statement.date >= sunday)
-            .filter(Statement.date < sunday + timedelta(days=7))
+            .outerjoin(statement_sum, statement_sum.c.id == Category.id)
             .filter(MainCategory.id == main_category)
-            .group_by(Category.id)
+            .order_by(Category.id)
         )
 
         data = list()
-        for category in category_list:
-            # statement_list의 [0]번째 값에 해당하는 category 업데이트
-            amount = 0
-            for statement in statement_list:
-                if category.id == statement[0]:
-                    if category.main_category.category_type == 2 and statement[2] < 0:
-                        amount = statement[2] * -1
-                    else:
-                        amount = statement[2]
-                    break
-
-            data.append(dict(name=category.name, amount=amount))
+        for name, category_type, amount in (await db.execute(query)).all():
+            if category_type == 2 and amount < 0:
+                amount = amount * -1
+
+            data.append(dict(name=name, amount=amount))
         return data
 
 
 @router.get("/statement/total", response_model=StatementCategorySumSchema)
-async def get_statement_total(mode: int, date: date, db: Session = Depends(get_db)):
+async def get_statement_total(
+    mode: int, date: date, db: AsyncSession = Depends(get_async_db)
+):
     # 주간 합계
     if mode == 1:
         new_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -980,7 +861,7 @@ async def get_statement_total(mode: int, date: date, db: Session = Depends(get_d
         else:
             monday = new_date - timedelta(days=new_date.weekday())
 
-        db.query(Statement).filter(Statement.date >= monday).filter(
+        select(Statement).filter(Statement.date >= monday).filter(
             Statement.date <= monday + timedelta(days=6)
         )
 
@@ -989,40 +870,34 @@ async def get_statement_total(mode: int, date: date, db: Session = Depends(get_d
 
     # 카테고리별 합계
     elif mode == 3:
-        category_sum = (
-            db.query(
-                MainCategory.category_type,
-                func.sum(Statement.amount),
-                func.sum(Statement.saving),
-            )
-            .join(Category, Category.id == Statement.category_id)
-            .join(MainCategory)
-            .filter(extract("year", Statement.date) == date.year)
-            .filter(extract("month", Statement.date) == date.month)
-            .group_by(MainCategory.category_type)
-            .all()
-        )
+        days = as_days(month_range(date))
 
-        # 순수 저축 항목 합계
-        only_saving_sum = (
-            db.query(func.sum(Statement.amount))
-            .filter(extract("year", Statement.date) == date.year)
-            .filter(extract("month", Statement.date) == date.month)
-            .filter(
-                and_(
-                    MainCategory.category_type == 3,
-                    and_(Statement.category_id != 57, Statement.category_id != 58),
+        # 일별 합계 테이블에서 category_type 별로 한 번에 합산
+        category_sum = (
+            await db.execute(
+                select(
+                    MainCategory.category_type,
+                    func.sum(StatementDailyTotal.amount),
+                    func.sum(StatementDailyTotal.saving),
+                    func.sum(StatementDailyTotal.discount),
+                    # 순수 저축 항목 합계
+                    func.sum(
+                        case(
+                            (
+                                StatementDailyTotal.category_id.not_in([57, 58]),
+                                StatementDailyTotal.amount,
+                            ),
+                            else_=0,
+                        )
+                    ),
                 )
+                .select_from(StatementDailyTotal)
+                .join(Category, Category.id == StatementDailyTotal.category_id)
+                .join(MainCategory)
+                .filter(in_range(StatementDailyTotal.day, days))
+                .group_by(MainCategory.category_type)
             )
-            .first()
-        )
-
-        discount_sum = (
-            db.query(func.sum(Statement.discount))
-            .filter(extract("year", Statement.date) == date.year)
-            .filter(extract("month", Statement.date) == date.month)
-            .first()
-        )
+        ).all()
 
         data = StatementCategorySumSchema()
 
@@ -1033,9 +908,9 @@ async def get_statement_total(mode: int, date: date, db: Session = Depends(get_d
                 data.expense = i[1]
                 data.expense_saving = i[2]
             elif i[0] == 3:
-                data.saving = only_saving_sum[0] if only_saving_sum[0] else 0
+                data.saving = i[4]
 
-        data.discount = discount_sum[0] if discount_sum[0] else 0
+            data.discount += i[3]
 
         data.total = data.income + data.expense + data.saving + data.discount
         data.total_no_discount = data.income + data.expense + data.saving
@@ -1045,14 +920,29 @@ async def get_statement_total(mode: int, date: date, db: Session = Depends(get_d
 
 
 @router.get("/statement/name_list")
-async def get_statement_name_list(q: str = Query(...), db: Session = Depends(get_db)):
-    query = (
-        db.query(Statement)
+async def get_statement_name_list(
+    q: str = Query(...),
+    limit: int = Query(50, gt=0, le=200),
+    compact: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 자동완성: 이름별 최근 내역 하나씩, 메모리 인덱스에서 앞부분 검색
+    if compact:
+        await name_index.refresh(db)
+        return name_index.search(q, limit)
+
+    query = await db.scalars(
+        select(Statement)
         .join(Category, Statement.category_id == Category.id)
         .join(MainCategory)
         .join(AccountCard)
-        .filter(Statement.name.ilike(f"%{q}%"))
+        .options(
+            contains_eager(Statement.category).contains_eager(Category.main_category),
+            contains_eager(Statement.account_card),
+        )
+        .filter(name_contains(q, ignore_case=True))
         .order_by(Statement.created_at.desc())
+        .limit(limit)
     )
 
     name_dict = list()
@@ -1080,124 +970,127 @@ async def get_statement_name_list(q: str = Query(...), db: Session = Depends(get
 
 
 @router.get("/statement/calendar", response_model=list[tuple[int, int, int, str]])
-async def get_statement_calendar(date: date, db: Session = Depends(get_db)):
-    sub_query = (
-        select(Statement, MainCategory.category_type)
-        .select_from(Statement)
-        .join(Category, Statement.category_id == Category.id)
-        .join(MainCategory)
-        .filter(extract("year", Statement.date) == date.year)
-        .filter(extract("month", Statement.date) == date.month)
-        .subquery()
-    )
-
-    query = (
-        select(
-            extract("day", sub_query.c.date).label("day"),
-            sub_query.c.category_type,
-            func.sum(sub_query.c.amount),
-        )
-        .select_from(sub_query)
-        .group_by("day", sub_query.c.category_type)
-    )
-
-    result = db.execute(query).all()
-
-    for i, r in enumerate(result):
-        full_date = datetime(date.year, date.month, int(r[0])).date()
-
-        result[i] = list(r)
-
-        statement_query = (
+async def get_statement_calendar(date: date, db: AsyncSession = Depends(get_async_db)):
+    # 한 달치 내역을 한 번에 가져와 (일, category_type) 별로 묶음
+    statements = (
+        await db.execute(
             select(
+                Statement.date,
+                MainCategory.category_type,
                 Statement.name,
                 Statement.amount,
             )
             .select_from(Statement)
             .join(Category, Statement.category_id == Category.id)
             .join(MainCategory)
-            .where(extract("year", Statement.date) == full_date.year)
-            .where(extract("month", Statement.date) == full_date.month)
-            .where(extract("day", Statement.date) == full_date.day)
-            .where(MainCategory.category_type == r[1])
+            .filter(in_range(Statement.date, month_range(date)))
+            .order_by(Statement.date, Statement.id)
         )
+    ).all()
 
-        statements = db.execute(statement_query).all()
-        statement_txt = ""
-        for statement in statements:
-            statement_txt += f"{statement[0]} {format(statement[1], ',d')}\n"
+    result = dict()
+    for statement_date, category_type, name, amount in statements:
+        key = (statement_date.day, category_type)
+        if key not in result:
+            result[key] = [statement_date.day, category_type, 0, ""]
 
-        result[i].append(statement_txt)
+        result[key][2] += amount
+        result[key][3] += f"{name} {format(amount, ',d')}\n"
+
+    return [result[key] for key in sorted(result)]
+
+
+@router.get("/statement/{id}", response_model=StatementSchema)
+async def get_statement(id: int, db: AsyncSession = Depends(get_async_db)):
+    statement = await db.get(
+        Statement, id, options=schema_loader_options(Statement, StatementSchema)
+    )
+
+    if statement is None:
+        raise HTTPException(status_code=404, detail="Statement not found")
 
-    return result
+    return statement
 
 
-@router.get("/statement/{id}")
-async def get_statement(id: int, db: Session = Depends(get_db)):
-    return db.query(Statement).filter(Statement.id == id).first()
+def check_removed_category(statement: Statement, types: dict):
+    # 기존 내역의 카테고리를 다시 읽어도 없으면 잔액을 되돌릴 수 없음
+    if statement.category_id is not None and statement.category_id not in types:
+        raise HTTPException(status_code=409, detail="Statement category not found")
 
 
 @router.put("/statement/{id}")
 async def update_statement(
     id: int,
     statement_in: StatementIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    statement = db.query(Statement).filter(Statement.id == id).first()
-    statement.name = statement_in.name
-    statement.category_id = statement_in.category_id
-    statement.account_card_id = statement_in.account_card_id
-    statement.amount = statement_in.amount
-    statement.discount = statement_in.discount
-
-    if statement.category.main_category.category_type != TYPE_INCOME:
-        if statement_in.amount > 0:
-            statement.amount *= -1
-
-    statement.date = statement_in.date.replace(second=0, microsecond=0)
-    statement.saving = statement_in.saving
-    statement.description = statement_in.description
-    statement.is_fixed = statement_in.is_fixed
-    db.commit()
-    db.refresh(statement)
+    statement = await db.get(Statement, id)
+
+    if statement is None:
+        raise HTTPException(status_code=404, detail="Statement not found")
+
+    types = await db.run_sync(
+        category_types, [statement.category_id, statement_in.category_id]
+    )
+    if statement_in.category_id not in types:
+        raise HTTPException(status_code=404, detail="Category not found")
+    check_removed_category(statement, types)
+    missing = await db.run_sync(
+        missing_balance_target, [statement_in.asset_id], [statement_in.loan_id]
+    )
+    if missing:
+        raise HTTPException(status_code=404, detail=missing)
+
+    # 이전 내역이 반영했던 잔액을 되돌리고 새 값으로 다시 반영
+    balances = BalanceDeltas()
+    balances.add_removed(types.get(statement.category_id), statement)
+    balances.add_created(types[statement_in.category_id], statement_in)
+
+    set_statement_fields(statement, statement_in, types[statement_in.category_id])
+    await db.run_sync(balances.apply)
+    await db.commit()
+    await db.refresh(statement)
+
+    if balances:
+        await job_queue.enqueue(record_asset_history)
+
     return statement
 
 
 @router.delete("/statement/{id}")
-async def delete_statement(id: int, db: Session = Depends(get_db)):
-    statement = db.query(Statement).filter(Statement.id == id).first()
+async def delete_statement(id: int, db: AsyncSession = Depends(get_async_db)):
+    statement = await db.get(Statement, id)
+
+    if statement is None:
+        raise HTTPException(status_code=404, detail="Statement not found")
+
+    types = await db.run_sync(category_types, [statement.category_id])
+    check_removed_category(statement, types)
+
+    balances = BalanceDeltas()
+    balances.add_removed(types.get(statement.category_id), statement)
+
+    await db.run_sync(balances.apply)
+    await db.delete(statement)
+    await db.commit()
+
+    if balances:
+        await job_queue.enqueue(record_asset_history)
 
-    if statement.asset_id is not None:
-        asset = db.query(Asset).filter(Asset.id == statement.asset_id).first()
-        if statement.amount < 0:
-            asset.amount += statement.amount
-        else:
-            asset.amount -= statement.amount
-        db.commit()
-        db.refresh(asset)
-
-    if statement.loan_id is not None:
-        loan = db.query(Loan).filter(Loan.id == statement.loan_id).first()
-        loan.amount -= statement.amount  # 이미 - 처리 되어있음
-        db.commit()
-        db.refresh(loan)
-
-    db.delete(statement)
-    db.commit()
     return {"message": "Statement deleted successfully"}
 
 
 @router.post("/statement/{id}/message")
 async def create_statement_message(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    statement = db.query(Statement).filter(Statement.id == id).first()
+    statement = await db.get(Statement, id)
 
     if statement is None:
         raise HTTPException(status_code=404, detail="Statement not found")
 
-    message = convert_message(db, statement)
+    message = await db.run_sync(convert_message, statement)
 
     return message
 
@@ -1205,14 +1098,23 @@ async def create_statement_message(
 @router.post("/statement/{id}/alert")
 async def create_statement_alert(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    statement = db.query(Statement).filter(Statement.id == id).first()
+    statement = await db.get(Statement, id)
 
     if statement is None:
         raise HTTPException(status_code=404, detail="Statement not found")
 
-    message = convert_message(db, statement)
-    push_notification(message)
+    message = await db.run_sync(convert_message, statement)
+    await job_queue.enqueue(send_notification, message)
 
     return ""
+
+
+@router.get("/notification/stats", summary="알림 전송 현황")
+async def get_notification_stats():
+    return dict(
+        **telegram_sender.stats,
+        queue_processed=job_queue.processed,
+        queue_failed=job_queue.failed,
+    )
@@ -116,6 +116,21 @@ class StatementSchema(BaseModel):
         return self.category.main_category.category_type
 
 
+class StatementCursorPage(BaseModel):
+    items: list[StatementSchema]
+    size: int
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class StatementBatchResultSchema(BaseModel):
+    index: int
+    op: str
+    id: int | None = None
+    status: str = "ok"
+    detail: str | None = None
+
+
 class AssetHistorySchema(BaseModel):
     id: int
     amount: int
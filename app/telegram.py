@@ -0,0 +1,211 @@
+import asyncio
+import os
+import time
+import httpx
+
+# 텔레그램 알림 전송
+# - 연결을 유지하는 AsyncClient 하나를 재사용
+# - 토큰 버킷으로 채팅방당 초당 1건 제한에 맞춤
+# - 기다리는 동안 쌓인 메시지는 한 건으로 합쳐서 전송
+# - 긴 메시지는 나눠 보내고, 나눈 조각마다 토큰을 씀
+# - 전송 결과는 메시지를 보낸 쪽마다 돌려주고, 실패한 메시지는 남기지 않음
+#   (재시도는 작업 큐가 자기 메시지만 다시 보냄, 재시도를 넘기면 버려짐)
+# - 일부 조각만 보내고 실패하면 보낸 조각 수를 기억해 재시도 때 건너뜀
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds: float):
+        # 429 응답의 retry_after 만큼 비움
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class TelegramError(Exception):
+    pass
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH):
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    chunks.append(text)
+    return chunks
+
+
+class TelegramSender:
+    def __init__(
+        self,
+        token: str | None = None,
+        chat_id: str | None = None,
+        api_url: str | None = None,
+        rate: float = 1.0,
+        timeout: float = 10,
+        max_pending: int = 100,
+    ):
+        # 설정은 처음 한 번만 읽음
+        self.token = token or os.getenv("TELEGRAM_TOKEN")
+        self.chat_id = chat_id or os.getenv("TELEGRAM_CHAT_ID")
+        self.api_url = api_url or os.getenv(
+            "TELEGRAM_API_URL", "https://api.telegram.org"
+        )
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.bucket = TokenBucket(rate)
+        self.stats = dict(
+            sent=0,
+            failed=0,
+            coalesced=0,
+            dropped=0,
+            latency_total=0.0,
+            latency_max=0.0,
+        )
+        self._client = None
+        self._loop = None
+        self._pending = []
+        self._sending = False
+        self._delivered = {}  # 메시지 -> 이미 보낸 조각 수
+
+    @property
+    def client(self):
+        # 연결은 이벤트 루프에 묶여 있으므로 루프가 바뀌면 새로 만듦
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.api_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=2),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def send(self, message: str):
+        # 장애가 길어져도 대기열이 끝없이 늘지 않도록 가득 차면 바로 실패
+        if len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            raise TelegramError("텔레그램 전송 대기열이 가득 참")
+
+        # 이미 전송 중이면 대기열에 넣고 결과를 기다림 (전송 중인 쪽에서 합쳐서 보냄)
+        result = asyncio.get_running_loop().create_future()
+        self._pending.append((message, result))
+        if not self._sending:
+            await self._send_pending()
+        await result
+
+    async def _send_pending(self):
+        self._sending = True
+        try:
+            while self._pending:
+                await self.bucket.acquire()
+                batch, self._pending = self._pending, []
+                try:
+                    await self._post(self._pack(batch))
+                except Exception as e:
+                    # 실패한 묶음은 대기열에 다시 넣지 않고 보낸 쪽마다 실패를 알림
+                    # (실패 전에 모든 조각이 나간 메시지는 성공)
+                    done = [item for item in batch if self._done(item[0])]
+                    self._forget(done)
+                    self._finish(done)
+                    self._finish(batch, e)
+                    continue
+                self._forget(batch)
+                self._finish(batch)
+                self.stats["coalesced"] += len(batch) - 1
+        finally:
+            self._sending = False
+            # 취소 등으로 중단되면 남은 메시지도 실패로 알림
+            pending, self._pending = self._pending, []
+            self._finish(pending, TelegramError("텔레그램 전송 중단"))
+
+    def _pack(self, batch):
+        # 메시지마다 나눈 조각을 한도 안에서 이어 붙임 (이미 보낸 조각은 제외)
+        # 조각마다 어떤 메시지의 몇 번째 조각까지 들어 있는지 함께 반환
+        chunks = []
+        for message, _ in batch:
+            parts = split_message(message)
+            for number in range(self._delivered.get(message, 0), len(parts)):
+                part = parts[number]
+                if chunks and len(chunks[-1][0]) + len(part) + 2 <= MAX_MESSAGE_LENGTH:
+                    text, sent = chunks[-1]
+                    chunks[-1] = (f"{text}\n\n{part}", sent + [(message, number + 1)])
+                else:
+                    chunks.append((part, [(message, number + 1)]))
+        return chunks
+
+    def _done(self, message: str):
+        return self._delivered.get(message, 0) >= len(split_message(message))
+
+    def _forget(self, batch):
+        for message, _ in batch:
+            self._delivered.pop(message, None)
+        # 재시도를 넘겨 버려진 메시지가 쌓이지 않도록 오래된 것부터 정리
+        while len(self._delivered) > self.max_pending:
+            self._delivered.pop(next(iter(self._delivered)))
+
+    @staticmethod
+    def _finish(batch, error: Exception | None = None):
+        for _, result in batch:
+            if result.done():
+                continue
+            if error is None:
+                result.set_result(None)
+            else:
+                result.set_exception(error)
+
+    async def _post(self, chunks):
+        for number, (chunk, sent) in enumerate(chunks):
+            # 첫 조각의 토큰은 묶음을 꺼내기 전에 받아 둠
+            if number:
+                await self.bucket.acquire()
+            started = time.monotonic()
+            try:
+                response = await self.client.post(
+                    f"/bot{self.token}/sendMessage",
+                    json={"chat_id": self.chat_id, "text": chunk},
+                )
+                if response.status_code == 429:
+                    retry_after = response.json().get("parameters", {})
+                    self.bucket.pause(retry_after.get("retry_after", 1))
+                response.raise_for_status()
+            except Exception as e:
+                self.stats["failed"] += 1
+                raise TelegramError("텔레그램 메시지 전송 실패") from e
+            finally:
+                latency = time.monotonic() - started
+                self.stats["latency_total"] += latency
+                self.stats["latency_max"] = max(self.stats["latency_max"], latency)
+            self.stats["sent"] += 1
+            for message, count in sent:
+                self._delivered[message] = count
+
+
+telegram_sender = TelegramSender()
@@ -1,41 +1,65 @@
-import os
-import json
-import requests
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract, select
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from models import Asset, AssetHistory, Loan, Statement, Category, MainCategory
+from models import AssetHistory
 from app.consts import TYPE_OUTCOME, TYPE_SAVING, TYPE_INCOME, CURRENT_TIMEZONE
+from app import reference
+from app.networth import current_net_worth, net_worth_subquery
 
 
 load_dotenv()
 
 
 def new_asset_history(db):
-    # asset의 sum 구하기
-    asset_sum = db.query(func.sum(Asset.amount)).scalar()
-
-    if asset_sum is None:
-        asset_sum = 0
-
-    # loan의 sum 구하기
-    loan_sum = db.query(func.sum(Loan.amount)).scalar()
-
-    if loan_sum is None:
-        loan_sum = 0
+    # 자산/대출 전체 합계 대신 누적 순자산(app.networth)을 사용
+    # 누적 행이 없으면 먼저 만들고, 값은 upsert 문 안에서 읽음
+    # (동시에 실행된 작업이 늦게 끝나도 예전 값으로 덮어쓰지 않음)
+    current_net_worth(db)
+    amount = net_worth_subquery()
+
+    # 하루에 한 행만 두고 그날의 마지막 값으로 갱신 (day 기준 upsert)
+    if db.get_bind().dialect.name == "sqlite":
+        insert = sqlite.insert
+    else:
+        insert = postgresql.insert
 
-    # asset history 생성
-    new_asset_history = AssetHistory(
-        amount=asset_sum - loan_sum,
+    statement = insert(AssetHistory).values(
+        day=func.current_date(),
+        amount=amount,
         timestamp=func.now(),
+        created_at=func.now(),
     )
-    db.add(new_asset_history)
+    statement = statement.on_conflict_do_update(
+        index_elements=[AssetHistory.day],
+        set_=dict(amount=amount, timestamp=func.now(), updated_at=func.now()),
+    )
+    db.execute(statement)
     db.commit()
-    db.refresh(new_asset_history)
+
+
+def set_statement_fields(statement, statement_in, category_type):
+    statement.name = statement_in.name
+    statement.category_id = statement_in.category_id
+    statement.account_card_id = statement_in.account_card_id
+    statement.amount = statement_in.amount
+    statement.discount = statement_in.discount
+
+    # 지출일 때 마이너스
+    if category_type != TYPE_INCOME and statement_in.amount > 0:
+        statement.amount = -statement_in.amount
+
+    statement.date = statement_in.date.replace(second=0, microsecond=0)
+    statement.saving = statement_in.saving
+    statement.description = statement_in.description
+    statement.asset_id = statement_in.asset_id
+    statement.loan_id = statement_in.loan_id
+    statement.is_fixed = statement_in.is_fixed
 
 
 def convert_message(db: Session, statement):
+    # 카테고리/자산 이름과 월 합계는 app.reference 캐시에서 읽음 (DB 조회 0~1회)
     now = datetime.now(CURRENT_TIMEZONE)
     message = ""
     date = statement.date.strftime("%Y/%m/%d %H:%M")
@@ -49,42 +73,32 @@ def convert_message(db: Session, statement):
     discount = format1.format(statement.discount)
     discount_percent = format2.format(statement.discount / statement.amount * -100)
     account_card = (
-        statement.account_card.name if statement.account_card_id is not None else "없음"
-    )
-
-    sum_query = (
-        select(func.sum(Statement.amount))
-        .select_from(Statement)
-        .join(Category, Statement.category_id == Category.id)
-        .join(MainCategory)
-        .filter(extract("year", Statement.date) == now.year)
-        .filter(extract("month", Statement.date) == now.month)
-        .filter(
-            MainCategory.category_type == statement.category.main_category.category_type
-        )
+        reference.account_cards.row(db, statement.account_card_id)["name"]
+        if statement.account_card_id is not None
+        else "없음"
     )
-    sum_query = db.execute(sum_query).first()
 
-    if sum_query[0] is None:
-        type_sum = 0
+    category = reference.categories.row(db, statement.category_id)
+    main_category = reference.main_categories.row(db, category["main_category_id"])
+    category_name = f"[{main_category['name']}-{category['name']}]"
 
-    elif sum_query[0] < 0:
-        type_sum = sum_query[0] * -1
+    type_sum = reference.monthly_totals.get(db, now, main_category["category_type"])
+    if type_sum < 0:
+        type_sum = type_sum * -1
 
-    else:
-        type_sum = sum_query[0]
-
-    if statement.category.main_category.category_type == TYPE_INCOME:
+    if main_category["category_type"] == TYPE_INCOME:
         message = (
-            f"💵수입\n[{statement.category.main_category.name}-{statement.category.name}]"
+            f"💵수입\n{category_name}"
             f"\n{statement.name}\n{amount}원"
             f"\n{account_card}"
             f"\n{date}"
             f"\n월 수입 {format1.format(type_sum)}원"
         )
 
-    elif statement.category.main_category.category_type == TYPE_OUTCOME:
-        if statement.category.main_category.weekly_limit is not None:
+    elif main_category["category_type"] == TYPE_OUTCOME:
+        asset_obj = reference.assets.row(db, main_category["asset_id"])
+
+        if main_category["weekly_limit"] is not None:
             # 지출한 주의 날짜 구하기
             if statement.date.weekday() == 6:  # 일요일이면
                 sunday = statement.date
@@ -116,19 +130,13 @@ def convert_message(db: Session, statement):
             #         + weekly_sum_amount_query[1]
             #     )
 
-            asset_obj = (
-                db.query(Asset)
-                .filter(Asset.id == statement.category.main_category.asset_id)
-                .first()
-            )
-
             message = (
-                f"💳지출\n[{statement.category.main_category.name}-{statement.category.name}]"
+                f"💳지출\n{category_name}"
                 f"\n{statement.name}\n{amount}원 (할인 {discount}원 {discount_percent}%)"
                 f"\n{account_card}"
                 # f"\n{format1.format(weekly_sum_amount)}원 남음"
                 + (
-                    f"\n{asset_obj.name} {format1.format(asset_obj.amount)}원"
+                    f"\n{asset_obj['name']} {format1.format(asset_obj['amount'])}원"
                     if asset_obj
                     else ""
                 )
@@ -137,33 +145,27 @@ def convert_message(db: Session, statement):
             )
 
         else:
-            asset_obj = (
-                db.query(Asset)
-                .filter(Asset.id == statement.category.main_category.asset_id)
-                .first()
-            )
-
             message = (
-                f"💳지출\n[{statement.category.main_category.name}-{statement.category.name}]"
+                f"💳지출\n{category_name}"
                 f"\n{statement.name}\n{amount}원 (할인 {discount}원 {discount_percent}%)"
                 f"\n{account_card}"
                 f"\n{date}"
                 + (
-                    f"\n{asset_obj.name} {format1.format(asset_obj.amount)}원"
+                    f"\n{asset_obj['name']} {format1.format(asset_obj['amount'])}원"
                     if asset_obj
                     else ""
                 )
                 + f"\n월 지출 {format1.format(type_sum)}원"
             )
 
-    elif statement.category.main_category.category_type == TYPE_SAVING:
-        asset_obj = db.query(Asset).filter(Asset.id == statement.asset_id).first()
+    elif main_category["category_type"] == TYPE_SAVING:
+        asset_obj = reference.assets.row(db, statement.asset_id)
         asset_amount = None
         if asset_obj is not None:
-            asset_amount = asset_obj.amount
+            asset_amount = asset_obj["amount"]
 
         message = (
-            f"💰저축\n[{statement.category.main_category.name}-{statement.category.name}]"
+            f"💰저축\n{category_name}"
             f"\n{statement.name}\n{amount}원"
             f"\n{account_card}"
             f"\n{date}"
@@ -172,23 +174,3 @@ def convert_message(db: Session, statement):
         )
 
     return message
-
-
-def push_notification(message):
-    url = "https://api.telegram.org/bot{}/sendMessage".format(
-        os.getenv("TELEGRAM_TOKEN")
-    )
-
-    try:
-        headers = {"Content-Type": "application/json; charset=utf-8"}
-        r1 = requests.post(
-            url,
-            data=json.dumps(
-                {"chat_id": os.getenv("TELEGRAM_CHAT_ID"), "text": message}
-            ),
-            headers=headers,
-        )
-
-    except Exception as e:
-        print(e)
-        print("텔레그램 메시지 전송 실패")
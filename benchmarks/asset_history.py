@@ -0,0 +1,187 @@
+"""자산 기록 차트 조회 비용 측정 (/asset/history 년간 모드, /asset/prev)
+
+--rows 개의 기록(쓰기마다 한 행, 예전 방식)을 별도 SQLite 파일에 만들고 세 가지로 조회한다.
+
+- python: 구간의 모든 행을 읽어 파이썬 dict 로 달/날짜마다 마지막 값만 남김 (기존 코드)
+- sql: 같은 테이블에서 윈도우 함수로 달마다 마지막 행만 골라옴 (created_at 인덱스)
+- daily: 하루 한 행으로 합친 asset_histories 에서 app.history 쿼리로 조회 (현재 코드)
+
+    python -m benchmarks.asset_history --rows 1000000
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    create_engine,
+    extract,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from app.dates import as_days, year_range
+from app.history import first_and_last, monthly_history
+from models import AssetHistory
+
+metadata = MetaData()
+writes = Table(
+    "asset_history_writes",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("amount", Integer),
+    Column("created_at", DateTime),
+    Index("ix_asset_history_writes_created_at", "created_at"),
+)
+
+
+def fill(engine, rows, days):
+    start = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+    step = timedelta(days=days) / rows
+    amount = 10_000_000
+    chunk = []
+    with engine.begin() as connection:
+        for i in range(rows):
+            amount += random.randint(-5000, 5000)
+            chunk.append(dict(amount=amount, created_at=start + step * i))
+            if len(chunk) == 50_000:
+                connection.execute(insert(writes), chunk)
+                chunk = []
+        if chunk:
+            connection.execute(insert(writes), chunk)
+
+        # 하루 한 행으로 합친 테이블 (019 이후 저장 방식)
+        day = func.date(writes.c.created_at)
+        last = select(func.max(writes.c.id)).group_by(day)
+        connection.execute(
+            insert(AssetHistory).from_select(
+                ["day", "amount", "created_at"],
+                select(day, writes.c.amount, writes.c.created_at).filter(
+                    writes.c.id.in_(last)
+                ),
+            )
+        )
+
+
+def python_year(db, start, end):
+    rows = db.execute(
+        select(writes)
+        .filter(writes.c.created_at >= start, writes.c.created_at < end)
+        .order_by(writes.c.created_at)
+    ).all()
+    result = {}
+    for row in rows:
+        result[row.created_at.strftime("%Y-%m")] = row.amount
+    return list(result.items()), len(rows)
+
+
+def sql_year(db, start, end):
+    ranked = (
+        select(
+            writes.c.created_at,
+            writes.c.amount,
+            func.row_number()
+            .over(
+                partition_by=(
+                    extract("year", writes.c.created_at),
+                    extract("month", writes.c.created_at),
+                ),
+                order_by=writes.c.created_at.desc(),
+            )
+            .label("rank"),
+        )
+        .filter(writes.c.created_at >= start, writes.c.created_at < end)
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked.c.created_at, ranked.c.amount)
+        .filter(ranked.c.rank == 1)
+        .order_by(ranked.c.created_at)
+    ).all()
+    return [(row.created_at.strftime("%Y-%m"), row.amount) for row in rows], len(rows)
+
+
+def daily_year(db, start, end):
+    rows = db.execute(monthly_history(*as_days((start, end)))).all()
+    return [(day.strftime("%Y-%m"), amount) for day, amount in rows], len(rows)
+
+
+def python_week(db, start, end):
+    rows = db.execute(
+        select(writes.c.amount)
+        .filter(writes.c.created_at >= start, writes.c.created_at < end)
+        .order_by(writes.c.created_at)
+    ).all()
+    diff_sum = 0
+    for i in range(1, len(rows)):
+        diff_sum += rows[i].amount - rows[i - 1].amount
+    return diff_sum, len(rows)
+
+
+def daily_week(db, start, end):
+    first, last = db.execute(first_and_last(*as_days((start, end)))).one()
+    return (0 if first is None else last - first), 2
+
+
+def measure(func, db, start, end, repeat):
+    began = time.perf_counter()
+    for _ in range(repeat):
+        result, rows = func(db, start, end)
+    return result, rows, (time.perf_counter() - began) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", default="sqlite:///asset_history_bench.db")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    metadata.drop_all(engine)
+    AssetHistory.__table__.drop(engine, checkfirst=True)
+    metadata.create_all(engine)
+    AssetHistory.__table__.create(engine)
+
+    started = time.perf_counter()
+    fill(engine, args.rows, args.days)
+    print(f"{args.rows} rows 생성: {time.perf_counter() - started:.1f}s")
+
+    today = date.today() - timedelta(days=1)
+    year = year_range(today)
+    week_start = datetime.combine(
+        today - timedelta(days=1 + today.weekday()), datetime.min.time()
+    )
+    week = (week_start, datetime.combine(today, datetime.min.time()) + timedelta(1))
+
+    with Session(engine) as db:
+        expected = None
+        for label, func_, period in (
+            ("python", python_year, year),
+            ("sql", sql_year, year),
+            ("daily", daily_year, year),
+        ):
+            result, rows, elapsed = measure(func_, db, *period, args.repeat)
+            # 마지막 날의 값이 같은지 확인 (daily 는 하루 마지막 값이므로 동일)
+            assert expected is None or result == expected, label
+            expected = result
+            print(f"year  {label:>6}: {elapsed * 1000:8.1f}ms  {rows:>8} rows")
+
+        # 하루 한 행으로 합치면 주의 첫 값은 첫날의 마지막 값이 되므로 결과는 다를 수 있음
+        for label, func_ in (("python", python_week), ("daily", daily_week)):
+            result, rows, elapsed = measure(func_, db, *week, args.repeat)
+            print(f"week  {label:>6}: {elapsed * 1000:8.1f}ms  {rows:>8} rows")
+
+
+if __name__ == "__main__":
+    main()
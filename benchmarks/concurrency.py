@@ -0,0 +1,82 @@
+"""동기 Session vs AsyncSession 동시 처리량 비교
+
+async 핸들러 안에서 동기 Session 을 쓰면 DB 왕복 동안 이벤트 루프가 멈추므로
+동시 요청이 한 줄로 처리된다. 같은 쿼리를 두 경로로 실행해 걸린 시간을 비교한다.
+
+    ENV=local python -m benchmarks.concurrency --requests 200 --concurrency 50 --delay 0.02
+
+--delay 는 pg_sleep 으로 흉내내는 쿼리 지연(초)이다.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import get_async_db, get_db
+
+QUERY = text("SELECT pg_sleep(:delay), count(*) FROM statements")
+
+app = FastAPI()
+
+
+@app.get("/sync")
+async def sync_path(delay: float, db: Session = Depends(get_db)):
+    # 기존 방식: async 핸들러에서 동기 드라이버 호출
+    return db.execute(QUERY, {"delay": delay}).first()[1]
+
+
+@app.get("/async")
+async def async_path(delay: float, db: AsyncSession = Depends(get_async_db)):
+    return (await db.execute(QUERY, {"delay": delay})).first()[1]
+
+
+async def run(path, requests, concurrency, delay):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def call():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, params={"delay": delay})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return dict(
+        elapsed=elapsed,
+        rps=requests / elapsed,
+        p50=latencies[len(latencies) // 2],
+        p99=latencies[int(len(latencies) * 0.99) - 1],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for label, path in (("before (sync)", "/sync"), ("after (async)", "/async")):
+        result = asyncio.run(run(path, args.requests, args.concurrency, args.delay))
+        print(
+            f"{label:>14}: {result['elapsed']:.2f}s  {result['rps']:.1f} req/s  "
+            f"p50 {result['p50'] * 1000:.1f}ms  p99 {result['p99'] * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
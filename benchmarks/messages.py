@@ -0,0 +1,75 @@
+"""알림 메시지 생성(convert_message) 비용 측정
+
+최근 내역으로 메시지를 --messages 개 만들면서 걸린 시간과 메시지당 쿼리 수를 출력한다.
+uncached 는 매번 기준 정보/월 합계 캐시를 비워 캐시 도입 전과 같은 조회를 하게 한다.
+
+    ENV=local python -m benchmarks.messages --messages 10000
+"""
+
+import argparse
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import selectinload
+
+from app.cache import invalidate
+from app.utils import convert_message
+from database import SessionLocal, engine
+from models import Statement
+
+REFERENCE_TABLES = ("categories", "main_categories", "account_cards", "assets")
+
+
+def run(db, statements, count, cached):
+    queries = 0
+
+    def before_cursor_execute(*args):
+        nonlocal queries
+        queries += 1
+
+    invalidate(*REFERENCE_TABLES)
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            if not cached:
+                invalidate(*REFERENCE_TABLES)
+            convert_message(db, statements[i % len(statements)])
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return dict(elapsed=elapsed, per_message=elapsed / count, queries=queries / count)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--statements", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        statements = db.scalars(
+            select(Statement)
+            .options(selectinload(Statement.category))
+            .filter(Statement.amount != 0)
+            .order_by(Statement.id.desc())
+            .limit(args.statements)
+        ).all()
+        if not statements:
+            raise SystemExit("내역이 없습니다")
+
+        for label, cached in (("uncached", False), ("cached", True)):
+            result = run(db, statements, args.messages, cached)
+            print(
+                f"{label:>9}: {result['elapsed']:.2f}s  "
+                f"{result['per_message'] * 1e6:.0f}us/message  "
+                f"{result['queries']:.2f} queries/message"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
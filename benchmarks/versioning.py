@@ -0,0 +1,118 @@
+"""버전 정책별 내역 쓰기 처리량 비교
+
+정책(VERSIONING)은 모델 정의 시점에 적용되므로 정책마다 새 프로세스에서
+별도 SQLite 파일에 내역 --rows 개를 추가(--batch 개씩 커밋)하고 한 번씩 수정한다.
+초당 처리 건수와 함께 이력 때문에 추가로 쓰인 행 수를 출력한다.
+
+    python -m benchmarks.versioning --rows 20000 --batch 100
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+MODES = ("full", "amount", "audit", "off")
+
+
+def child(url, rows, batch):
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.orm import Session
+    from sqlalchemy_continuum import versioning_manager
+
+    from app import audit  # noqa: F401 (audit 정책 리스너 등록)
+    from database import Base
+    from models import AuditLog, Category, MainCategory, Statement
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        main_category = MainCategory(name="벤치마크", category_type=2)
+        db.add(main_category)
+        db.flush()
+        category = Category(name="벤치마크", main_category_id=main_category.id)
+        db.add(category)
+        db.commit()
+
+        def count_history():
+            tables = [versioning_manager.transaction_cls.__table__, AuditLog.__table__]
+            tables += [
+                table
+                for table in Base.metadata.sorted_tables
+                if table.name.endswith("_version")
+            ]
+            return sum(
+                db.scalar(select(func.count()).select_from(table)) for table in tables
+            )
+
+        before = count_history()
+        started = time.perf_counter()
+        ids = []
+        for start in range(0, rows, batch):
+            statements = [
+                Statement(
+                    name=f"내역{i}",
+                    category_id=category.id,
+                    amount=-1000,
+                    date=func.now(),
+                )
+                for i in range(start, min(start + batch, rows))
+            ]
+            db.add_all(statements)
+            db.commit()
+            ids += [statement.id for statement in statements]
+        inserted = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for start in range(0, len(ids), batch):
+            for statement in db.scalars(
+                select(Statement).filter(Statement.id.in_(ids[start : start + batch]))
+            ):
+                statement.amount -= 500
+            db.commit()
+        updated = time.perf_counter() - started
+
+        return dict(
+            insert_rps=rows / inserted,
+            update_rps=rows / updated,
+            history_rows=count_history() - before,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--url", default="sqlite:///versioning_bench.db")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.url, args.rows, args.batch)))
+        return
+
+    for mode in MODES:
+        env = dict(os.environ, VERSIONING=f"statements={mode}")
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.versioning", "--child"]
+            + ["--rows", str(args.rows), "--batch", str(args.batch)]
+            + ["--url", args.url],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(
+            f"{mode:>6}: insert {result['insert_rps']:8.0f}/s  "
+            f"update {result['update_rps']:8.0f}/s  "
+            f"history rows {result['history_rows']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
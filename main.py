@@ -5,6 +5,18 @@ from fastapi.templating import Jinja2Templates
 from fastapi_pagination import add_pagination
 from sqlalchemy import event
 from app.routes import router as api_router
+from app.jobs import (
+    job_queue,
+    check_net_worth,
+    compact_history,
+    prune_old_versions,
+    NET_WORTH_VERIFY_INTERVAL,
+    HISTORY_COMPACT_INTERVAL,
+    VERSION_PRUNE_INTERVAL,
+)
+from app.retention import retention_enabled, VERSION_ARCHIVE_DIR
+from app.telegram import telegram_sender
+from app.invalidation import invalidation_bus
 from fastapi.middleware.cors import CORSMiddleware
 from models import MainCategory, Category
 from database import get_db
@@ -46,6 +58,28 @@ async def startup():
         create_asset_list(db)
         create_loan_list(db)
 
+    job_queue.start()
+    job_queue.schedule(NET_WORTH_VERIFY_INTERVAL, check_net_worth)
+    job_queue.schedule(HISTORY_COMPACT_INTERVAL, compact_history)
+    # 보관 기간과 보관 경로를 모두 설정한 경우에만 오래된 버전 정리
+    if retention_enabled():
+        if VERSION_ARCHIVE_DIR:
+            job_queue.schedule(VERSION_PRUNE_INTERVAL, prune_old_versions)
+        else:
+            print("VERSION_ARCHIVE_DIR 가 없어 오래된 버전을 정리하지 않음")
+
+    # 다른 워커의 변경으로 캐시 비우기 (LISTEN)
+    if os.environ.get("ENV") != "test":
+        invalidation_bus.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # 남은 자산 기록/알림 작업을 처리한 뒤 종료
+    await job_queue.drain()
+    await invalidation_bus.stop()
+    await telegram_sender.aclose()
+
 
 @app.middleware("http")
 async def add_timeout_header(request, call_next):
@@ -0,0 +1,31 @@
+"""add statements date indexes
+
+Revision ID: 3b9d2f7c1a64
+Revises: e64f31246a4c
+Create Date: 2026-10-18 09:12:44.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3b9d2f7c1a64"
+down_revision = "e64f31246a4c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_statements_date", "statements", ["date"], unique=False)
+    op.create_index(
+        "ix_statements_category_id_date",
+        "statements",
+        ["category_id", "date"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_statements_category_id_date", table_name="statements")
+    op.drop_index("ix_statements_date", table_name="statements")
@@ -0,0 +1,41 @@
+"""add net_worth
+
+Revision ID: 5e2b7a9c4d18
+Revises: a41f8e2d6c93
+Create Date: 2026-10-18 14:21:09.518342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e2b7a9c4d18"
+down_revision = "a41f8e2d6c93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "net_worth",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("verified_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # 현재 자산/대출 합계로 채우기 (이후에는 python -m app.networth 로 검증/보정)
+    op.execute(
+        """
+        INSERT INTO net_worth (id, amount, verified_at)
+        SELECT 1,
+               (SELECT coalesce(sum(amount), 0) FROM assets)
+               - (SELECT coalesce(sum(amount), 0) FROM loans),
+               CURRENT_TIMESTAMP
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("net_worth")
@@ -0,0 +1,50 @@
+"""add statement_daily_totals
+
+Revision ID: 7c4e1d9a5b20
+Revises: 3b9d2f7c1a64
+Create Date: 2026-10-18 11:02:37.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c4e1d9a5b20"
+down_revision = "3b9d2f7c1a64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "statement_daily_totals",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("discount", sa.Integer(), nullable=False),
+        sa.Column("saving", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["category_id"], ["categories.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("day", "category_id"),
+    )
+
+    # 기존 내역으로 채우기 (이후에는 python -m app.rollup 으로 재계산 가능)
+    op.execute(
+        """
+        INSERT INTO statement_daily_totals
+            (day, category_id, amount, discount, saving, count)
+        SELECT date(date), category_id,
+               coalesce(sum(amount), 0), coalesce(sum(discount), 0),
+               coalesce(sum(saving), 0), count(*)
+        FROM statements
+        WHERE category_id IS NOT NULL
+        GROUP BY date(date), category_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("statement_daily_totals")
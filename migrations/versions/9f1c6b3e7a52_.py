@@ -0,0 +1,34 @@
+"""add audit_logs
+
+Revision ID: 9f1c6b3e7a52
+Revises: c7d3f1a8e264
+Create Date: 2026-10-18 16:12:30.448127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9f1c6b3e7a52"
+down_revision = "c7d3f1a8e264"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 추가만 하는 로그이므로 기본 키 외 인덱스는 두지 않음
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("table_name", sa.String(length=50), nullable=False),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.Column("operation_type", sa.SmallInteger(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("audit_logs")
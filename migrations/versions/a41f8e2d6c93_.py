@@ -0,0 +1,38 @@
+"""add statements name trigram index
+
+Revision ID: a41f8e2d6c93
+Revises: 7c4e1d9a5b20
+Create Date: 2026-10-18 13:26:05.517342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a41f8e2d6c93"
+down_revision = "7c4e1d9a5b20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # LIKE/ILIKE '%q%' 검색이 인덱스를 쓸 수 있도록 pg_trgm GIN 인덱스 사용
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_statements_name_trgm",
+            "statements",
+            ["name"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        )
+    else:
+        op.create_index(
+            "ix_statements_name_trgm", "statements", ["name"], unique=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_statements_name_trgm", table_name="statements")
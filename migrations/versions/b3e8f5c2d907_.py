@@ -0,0 +1,43 @@
+"""allow NULL in non-key version columns
+
+Revision ID: b3e8f5c2d907
+Revises: 9f1c6b3e7a52
+Create Date: 2026-10-18 19:42:08.317524
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b3e8f5c2d907"
+down_revision = "9f1c6b3e7a52"
+branch_labels = None
+depends_on = None
+
+# continuum 이 값을 항상 채우는 컬럼
+KEY_COLUMNS = ("id", "transaction_id", "end_transaction_id", "operation_type")
+
+
+def upgrade() -> None:
+    # amount 정책은 금액/시각 외 컬럼을 버전에 쓰지 않으므로
+    # 버전 테이블의 나머지 컬럼은 NULL 을 허용해야 함
+    inspector = sa.inspect(op.get_bind())
+    for table in inspector.get_table_names():
+        if not table.endswith("_version"):
+            continue
+        for column in inspector.get_columns(table):
+            if column["name"] in KEY_COLUMNS or column["nullable"]:
+                continue
+            op.alter_column(
+                table,
+                column["name"],
+                existing_type=column["type"],
+                nullable=True,
+                autoincrement=False,
+            )
+
+
+def downgrade() -> None:
+    # NULL 로 저장된 버전이 있을 수 있으므로 되돌리지 않음
+    pass
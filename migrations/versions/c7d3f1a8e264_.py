@@ -0,0 +1,43 @@
+"""coalesce asset_histories by day
+
+Revision ID: c7d3f1a8e264
+Revises: 5e2b7a9c4d18
+Create Date: 2026-10-18 15:03:47.126905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c7d3f1a8e264"
+down_revision = "5e2b7a9c4d18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("asset_histories", sa.Column("day", sa.Date(), nullable=True))
+
+    # 기존 기록은 하루의 마지막 행만 남김
+    op.execute("UPDATE asset_histories SET day = date(created_at)")
+    op.execute(
+        """
+        DELETE FROM asset_histories
+        WHERE day IS NOT NULL
+          AND id NOT IN (
+              SELECT max(id) FROM asset_histories
+              WHERE day IS NOT NULL
+              GROUP BY day
+          )
+        """
+    )
+
+    op.create_index(
+        op.f("ix_asset_histories_day"), "asset_histories", ["day"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_asset_histories_day"), table_name="asset_histories")
+    op.drop_column("asset_histories", "day")
@@ -3,15 +3,21 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Date,
     ForeignKey,
     Text,
     Float,
     Boolean,
+    Index,
+    JSON,
+    BigInteger,
+    SmallInteger,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, configure_mappers
 from sqlalchemy_continuum import make_versioned
 from database import Base
+from versioning import versioned, limit_versioned_columns
 
 make_versioned(user_cls=None)
 
@@ -28,7 +34,7 @@ class User(Base):
 
 
 class MainCategory(Base):
-    __versioned__ = {}
+    __versioned__ = versioned("main_categories")
     __tablename__ = "main_categories"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -41,7 +47,7 @@ class MainCategory(Base):
 
 
 class Category(Base):
-    __versioned__ = {}
+    __versioned__ = versioned("categories")
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -56,14 +62,25 @@ class AssetHistory(Base):
     __tablename__ = "asset_histories"
 
     id = Column(Integer, primary_key=True, index=True)
+    # 하루 한 행 (오래된 기간은 app.history 에서 월 단위로 압축)
+    day = Column(Date, unique=True, index=True)
     amount = Column(Integer, default=0)
     timestamp = Column(DateTime)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
 
+# 순자산(자산 합계 - 대출 합계) 누적값, id=1 한 행 (app.networth 에서 관리)
+class NetWorth(Base):
+    __tablename__ = "net_worth"
+
+    id = Column(Integer, primary_key=True)
+    amount = Column(Integer, default=0, nullable=False)
+    verified_at = Column(DateTime)
+
+
 class Asset(Base):
-    __versioned__ = {}
+    __versioned__ = versioned("assets")
     __tablename__ = "assets"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -76,7 +93,7 @@ class Asset(Base):
 
 
 class Loan(Base):
-    __versioned__ = {}
+    __versioned__ = versioned("loans")
     __tablename__ = "loans"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -94,7 +111,7 @@ class Loan(Base):
 
 # 결재 수단
 class AccountCard(Base):
-    __versioned__ = {}
+    __versioned__ = versioned("account_cards")
     __tablename__ = "account_cards"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -107,7 +124,7 @@ class AccountCard(Base):
 
 
 class Statement(Base):
-    __versioned__ = {}
+    __versioned__ = versioned("statements")
     __tablename__ = "statements"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -135,6 +152,33 @@ class Statement(Base):
     asset = relationship("Asset", backref="statements")
     loan = relationship("Loan", backref="statements")
 
+    # 날짜 범위 조회용 (version 테이블에는 복사되지 않도록 __table_args__ 로 정의)
+    # 이름 부분 검색용 trigram 인덱스 (postgresql pg_trgm, sqlite 에서는 일반 인덱스)
+    __table_args__ = (
+        Index("ix_statements_date", "date"),
+        Index("ix_statements_category_id_date", "category_id", "date"),
+        Index(
+            "ix_statements_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
+
+# 일별 / 카테고리별 내역 합계 (app.rollup 에서 관리)
+class StatementDailyTotal(Base):
+    __tablename__ = "statement_daily_totals"
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    amount = Column(Integer, default=0, nullable=False)
+    discount = Column(Integer, default=0, nullable=False)
+    saving = Column(Integer, default=0, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
 
 class Memo(Base):
     __tablename__ = "memos"
@@ -146,4 +190,19 @@ class Memo(Base):
     updated_at = Column(DateTime, onupdate=func.now())
 
 
+# 버전 정책이 audit 인 모델의 변경 이력 (추가만 하는 로그, app.audit 에서 기록)
+class AuditLog(Base):
+    __tablename__ = "audit_logs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    # continuum 과 같은 값 (0: 추가, 1: 수정, 2: 삭제)
+    operation_type = Column(SmallInteger, nullable=False)
+    # 추가는 전체 컬럼, 수정은 바뀐 컬럼의 새 값
+    data = Column(JSON)
+    created_at = Column(DateTime, default=func.now())
+
+
+limit_versioned_columns([MainCategory, Category, Asset, Loan, AccountCard, Statement])
 configure_mappers()
@@ -1,10 +1,19 @@
-from sqlalchemy import create_engine
+import asyncio
+import os
+from contextlib import contextmanager
+import asyncpg
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from database import Base
+from sqlalchemy.pool import NullPool
+from database import Base, get_async_db, SQLALCHEMY_DATABASE_URL as POSTGRES_DEFAULT_URL
 from main import app, get_db
+from app.jobs import job_queue
 from fastapi.testclient import TestClient
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 
 engine = create_engine(
@@ -12,6 +21,12 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient는 요청마다 이벤트 루프를 새로 만들기 때문에 커넥션을 풀링하지 않음
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 Base.metadata.create_all(bind=engine)
 
@@ -24,7 +39,51 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@contextmanager
+def count_queries():
+    # API 요청이 실행한 (SQL, 파라미터) 목록
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        yield statements
+    finally:
+        event.remove(
+            async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+job_queue.session_factory = TestingAsyncSessionLocal
 
 
 client = TestClient(app)
+
+
+# LISTEN/NOTIFY, 마이그레이션 스키마는 로컬 Postgres 로 확인 (없으면 건너뜀)
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL", POSTGRES_DEFAULT_URL)
+
+
+async def _reachable():
+    try:
+        connection = await asyncpg.connect(POSTGRES_URL, timeout=2)
+    except (OSError, ValueError, asyncio.TimeoutError, asyncpg.PostgresError):
+        return False
+    await connection.close()
+    return True
+
+
+requires_postgres = pytest.mark.skipif(
+    not asyncio.run(_reachable()), reason="로컬 Postgres 에 연결할 수 없음"
+)
@@ -0,0 +1,65 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 오프라인 테스트용 텔레그램 Bot API 대역
+# TELEGRAM_API_URL 을 url 로 지정하면 sendMessage 요청을 messages 에 기록
+
+
+class FakeTelegram:
+    def __init__(self, delay: float = 0, fail: int = 0, fail_on: tuple = ()):
+        self.delay = delay
+        self.fail = fail  # 처음 몇 번은 500 응답
+        self.fail_on = fail_on  # 지정한 순번(1부터)의 요청은 500 응답
+        self.messages = []
+        self.requests = 0
+        self.connections = set()  # keep-alive 확인용 (클라이언트 주소)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        telegram = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(telegram.delay)
+
+                with telegram._lock:
+                    telegram.requests += 1
+                    telegram.connections.add(self.client_address)
+                    failed = telegram.fail > 0 or telegram.requests in telegram.fail_on
+                    if failed:
+                        telegram.fail -= 1
+                    elif self.path.endswith("/sendMessage"):
+                        telegram.messages.append(json.loads(body))
+
+                status = 500 if failed else 200
+                response = json.dumps({"ok": not failed}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,8 +1,36 @@
 import pytest
 import datetime
-from . import client, app, override_get_db
-from models import MainCategory, Category, Statement, Asset, Loan
-from app.consts import TYPE_OUTCOME
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event, select, text, update
+from sqlalchemy_continuum import version_class
+from . import client, app, async_engine, engine, override_get_db, count_queries
+from models import (
+    MainCategory,
+    Category,
+    Statement,
+    StatementDailyTotal,
+    Asset,
+    Loan,
+    AccountCard,
+    AssetHistory,
+    NetWorth,
+)
+from app.consts import TYPE_OUTCOME, CURRENT_TIMEZONE
+from app.rollup import rebuild_daily_totals
+from app.networth import NET_WORTH_ID, current_net_worth, verify_net_worth
+from app.pagination import encode_cursor
+from app.history import compact_asset_history, version_history
+from app.balances import BalanceDeltas
+from app.cache import invalidate
+from app.utils import convert_message
+from app.schema import AssetSchema
+from app import reference, utils
+
+
+def latest_asset_history(db):
+    return db.query(AssetHistory).order_by(AssetHistory.day.desc()).first()
 
 
 def test_create_main_category():
@@ -155,7 +183,11 @@ def test_create_statement():
     # loan_id가 있는 경우
     db.add(
         Loan(
-            name="테스트 대출", principal=100000, interest_rate=5, total_months=12, amount=0
+            name="테스트 대출",
+            principal=100000,
+            interest_rate=5,
+            total_months=12,
+            amount=0,
         )
     )
     db.commit()
@@ -168,3 +200,1473 @@ def test_create_statement():
     data["amount"] = 500000
     data["saving"] = 300000
     data["asset_id"] = None
+
+
+def test_get_statements_cursor():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+
+    base = datetime.datetime(2023, 1, 1, 12, 0)
+    for i in range(7):
+        db.add(
+            Statement(
+                name=f"커서{i}",
+                category_id=category.id,
+                amount=-1000 * (i + 1),
+                date=base + datetime.timedelta(days=i % 3),
+            )
+        )
+    db.commit()
+
+    expected = [
+        s.id
+        for s in db.query(Statement)
+        .filter(Statement.name.like("커서%"))
+        .order_by(Statement.date.desc(), Statement.id.desc())
+    ]
+
+    ids = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(
+            "/api/statement",
+            params=dict(q="커서", sort="date", order="DESC", size=3, cursor=cursor),
+        )
+        assert response.status_code == 200
+        assert response.json()["total"] == 7
+        ids += [item["id"] for item in response.json()["items"]]
+        cursor = response.json()["next_cursor"]
+
+    assert ids == expected
+
+    # total 생략
+    response = client.get(
+        "/api/statement", params=dict(q="커서", cursor="", with_total=False)
+    )
+    assert response.json()["total"] is None
+
+    # 잘못된 커서
+    response = client.get("/api/statement", params=dict(cursor="invalid"))
+    assert response.status_code == 400
+
+    # 정렬 컬럼과 타입이 다른 값
+    for sort, value, id in (
+        ("amount", "x", 1),
+        ("name", 1, 1),
+        ("date", 1, 1),
+        ("id", 1, "1"),
+    ):
+        response = client.get(
+            "/api/statement",
+            params=dict(sort=sort, cursor=encode_cursor(value, id)),
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    # 기존 offset 모드
+    response = client.get("/api/statement", params=dict(q="커서", size=3, page=3))
+    assert response.status_code == 200
+    assert response.json()["total"] == 7
+    assert len(response.json()["items"]) == 1
+
+
+def test_get_statements_cursor_nulls():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    base = datetime.datetime(2023, 2, 1, 12, 0)
+    for i in range(5):
+        db.add(
+            Statement(
+                name=f"널커서{i}",
+                category_id=category.id,
+                amount=-1000 * (i + 1),
+                date=base,
+                created_at=base + datetime.timedelta(days=i),
+            )
+        )
+    db.commit()
+    # 기본값 없이 NULL 로 저장된 내역
+    db.execute(
+        update(Statement)
+        .where(Statement.name.in_(["널커서1", "널커서3"]))
+        .values(created_at=None)
+    )
+    db.commit()
+    db.expire_all()
+    statements = db.query(Statement).filter(Statement.name.like("널커서%")).all()
+    assert sum(s.created_at is None for s in statements) == 2
+
+    # NULL 은 가장 작은 값으로 취급해서 끝까지 이어짐
+    key = lambda s: (s.created_at is not None, s.created_at, s.id)
+    for order in ("ASC", "DESC"):
+        expected = [s.id for s in sorted(statements, key=key)]
+        if order == "DESC":
+            expected.reverse()
+
+        ids = []
+        cursor = ""
+        while cursor is not None:
+            response = client.get(
+                "/api/statement",
+                params=dict(
+                    q="널커서", sort="created_at", order=order, size=2, cursor=cursor
+                ),
+            )
+            assert response.status_code == 200
+            ids += [item["id"] for item in response.json()["items"]]
+            cursor = response.json()["next_cursor"]
+        assert ids == expected
+
+
+def test_statement_list_query_count():
+    db = next(override_get_db())
+
+    for i in range(3):
+        main_category = MainCategory(name=f"N+1 {i}", category_type=TYPE_OUTCOME)
+        db.add(main_category)
+        db.commit()
+        category = Category(name=f"N+1 {i}", main_category_id=main_category.id)
+        account_card = AccountCard(name=f"N+1 {i}", card_type=1, amount=0)
+        asset = Asset(name=f"N+1 {i}", asset_type=1, amount=0)
+        db.add_all([category, account_card, asset])
+        db.commit()
+
+        for j in range(10):
+            db.add(
+                Statement(
+                    name=f"N+1 {i}-{j}",
+                    category_id=category.id,
+                    account_card_id=account_card.id,
+                    asset_id=asset.id,
+                    amount=-100,
+                    date=datetime.datetime(2023, 2, 1),
+                )
+            )
+    db.commit()
+
+    # 페이지 크기와 상관없이 count + 목록 쿼리만 실행
+    for size in (5, 30):
+        with count_queries() as queries:
+            response = client.get("/api/statement", params=dict(q="N+1", size=size))
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == size
+        assert response.json()["items"][0]["category"]["main_category"]["name"]
+        assert len(queries) == 2
+
+    statement = db.query(Statement).filter(Statement.name == "N+1 2-9").first()
+    with count_queries() as queries:
+        response = client.get(f"/api/statement/{statement.id}")
+    assert response.status_code == 200
+    assert response.json()["category_type"] == TYPE_OUTCOME
+    assert response.json()["asset"]["name"] == "N+1 2"
+    assert len(queries) == 1
+
+    with count_queries() as queries:
+        response = client.get("/api/statement/name_list", params=dict(q="N+1"))
+    assert response.status_code == 200
+    assert len(response.json()) == 30
+    assert len(queries) == 1
+
+
+def test_statement_date_filters_use_index():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    for day in range(1, 28):
+        db.add(
+            Statement(
+                name="인덱스",
+                category_id=category.id,
+                amount=-100,
+                date=datetime.datetime(2023, 3, day, 9, 30),
+            )
+        )
+    db.commit()
+
+    with count_queries() as queries:
+        for url in (
+            "/api/statement/total?mode=3&date=2023-03-10",
+            "/api/statement/calendar?date=2023-03-10",
+            f"/api/statement/category?mode=2&date=2023-03-10&category_type={TYPE_OUTCOME}",
+        ):
+            assert client.get(url).status_code == 200
+
+    date_queries = [q for q in queries if "statements.date >=" in q[0]]
+    assert len(date_queries) > 0
+
+    with engine.connect() as connection:
+        for statement, parameters in date_queries:
+            plan = " ".join(
+                row[-1]
+                for row in connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+            )
+            assert "SCAN statements" not in plan
+            assert "INDEX ix_statements_" in plan
+
+
+def test_statement_calendar_single_query():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    main_category = category.main_category
+
+    income_main_category = MainCategory(name="달력 수입", category_type=1)
+    db.add(income_main_category)
+    db.commit()
+    income_category = Category(name="달력", main_category_id=income_main_category.id)
+    db.add(income_category)
+    db.commit()
+
+    for day in range(1, 31):
+        db.add_all(
+            [
+                Statement(
+                    name=f"달력{day}-1",
+                    category_id=category.id,
+                    amount=-1000,
+                    date=datetime.datetime(2022, 4, day, 8, 0),
+                ),
+                Statement(
+                    name=f"달력{day}-2",
+                    category_id=category.id,
+                    amount=-2500,
+                    date=datetime.datetime(2022, 4, day, 20, 0),
+                ),
+                Statement(
+                    name=f"월급{day}",
+                    category_id=income_category.id,
+                    amount=10000,
+                    date=datetime.datetime(2022, 4, day, 12, 0),
+                ),
+            ]
+        )
+    db.commit()
+
+    with count_queries() as queries:
+        response = client.get("/api/statement/calendar", params=dict(date="2022-04-15"))
+    assert response.status_code == 200
+    assert len(queries) == 1
+
+    result = response.json()
+    assert len(result) == 60
+    assert result[0] == [1, 1, 10000, "월급1 10,000\n"]
+    assert result[1] == [
+        1,
+        main_category.category_type,
+        -3500,
+        "달력1-1 -1,000\n달력1-2 -2,500\n",
+    ]
+    assert result[-1][0] == 30
+
+
+def test_statement_category_sum():
+    db = next(override_get_db())
+
+    main_category = MainCategory(name="합계 테스트", category_type=TYPE_OUTCOME)
+    empty_main_category = MainCategory(name="합계 빈 항목", category_type=TYPE_OUTCOME)
+    db.add_all([main_category, empty_main_category])
+    db.commit()
+
+    categories = [
+        Category(name=f"합계 하위{i}", main_category_id=main_category.id)
+        for i in range(30)
+    ]
+    db.add_all(categories)
+    db.commit()
+
+    # 2022-06-15 (수) 이 포함된 주는 06-12 ~ 06-18
+    for i, category in enumerate(categories[:10]):
+        db.add_all(
+            [
+                Statement(
+                    name="합계",
+                    category_id=category.id,
+                    amount=-1000 * (i + 1),
+                    discount=100,
+                    date=datetime.datetime(2022, 6, 12 + i % 7, 10, 0),
+                ),
+                # 다른 주
+                Statement(
+                    name="합계",
+                    category_id=category.id,
+                    amount=-7,
+                    date=datetime.datetime(2022, 6, 19),
+                ),
+            ]
+        )
+    db.commit()
+
+    params = dict(mode=1, date="2022-06-15", category_type=TYPE_OUTCOME)
+    with count_queries() as queries:
+        response = client.get("/api/statement/category", params=params)
+    assert response.status_code == 200
+    assert len(queries) == 1
+
+    data = {row["name"]: row for row in response.json()}
+    assert data["합계 테스트"] == dict(name="합계 테스트", amount=55000, discount=1000)
+    assert data["합계 빈 항목"] == dict(name="합계 빈 항목", amount=0, discount=0)
+    assert response.json()[-1]["name"] == "합계"
+    assert response.json()[-1]["amount"] == sum(
+        row["amount"] for row in response.json()[:-1]
+    )
+
+    with count_queries() as queries:
+        response = client.get("/api/statement/category", params=dict(params, sub=True))
+    assert len(queries) == 1
+    data = {row["name"]: row for row in response.json()}
+    assert data["합계 하위0"]["amount"] == 1000
+    assert data["합계 하위29"] == dict(name="합계 하위29", amount=0, discount=0)
+
+    with count_queries() as queries:
+        response = client.get(
+            "/api/statement/category",
+            params=dict(mode=2, date="2022-06-01", category_type=TYPE_OUTCOME),
+        )
+    assert len(queries) == 1
+    data = {row["name"]: row for row in response.json()}
+    assert data["합계 테스트"]["amount"] == 55070
+
+    with count_queries() as queries:
+        response = client.get(
+            "/api/statement/subcategory",
+            params=dict(mode=1, date="2022-06-15", main_category=main_category.id),
+        )
+    assert len(queries) == 1
+    assert len(response.json()) == 30
+    assert response.json()[1] == dict(name="합계 하위1", amount=2000)
+    assert response.json()[29] == dict(name="합계 하위29", amount=0)
+
+
+def test_statement_daily_totals():
+    db = next(override_get_db())
+    category = db.query(Category).filter(Category.name == "합계 하위0").first()
+    other_category = db.query(Category).filter(Category.name == "합계 하위1").first()
+
+    def daily_total(day, category_id):
+        db.expire_all()
+        return (
+            db.query(StatementDailyTotal)
+            .filter(StatementDailyTotal.day == day)
+            .filter(StatementDailyTotal.category_id == category_id)
+            .first()
+        )
+
+    data = {
+        "name": "롤업",
+        "category_id": category.id,
+        "amount": 3000,
+        "discount": 500,
+        "date": "2021-07-01T10:00",
+        "account_card_id": None,
+    }
+    response = client.post("/api/statement", json=data)
+    assert response.status_code == 200
+    statement_id = response.json()["id"]
+
+    total = daily_total(datetime.date(2021, 7, 1), category.id)
+    assert (total.amount, total.discount, total.count) == (-3000, 500, 1)
+
+    # 날짜 / 카테고리 / 금액 변경
+    data.update(category_id=other_category.id, amount=1000, date="2021-07-02T10:00")
+    response = client.put(f"/api/statement/{statement_id}", json=data)
+    assert response.status_code == 200
+
+    total = daily_total(datetime.date(2021, 7, 1), category.id)
+    assert (total.amount, total.discount, total.count) == (0, 0, 0)
+    total = daily_total(datetime.date(2021, 7, 2), other_category.id)
+    assert (total.amount, total.discount, total.count) == (-1000, 500, 1)
+
+    response = client.get(
+        "/api/statement/category",
+        params=dict(mode=2, date="2021-07-01", category_type=TYPE_OUTCOME, sub=True),
+    )
+    assert {"name": "합계 테스트", "amount": 1000, "discount": 500} in response.json()
+
+    response = client.delete(f"/api/statement/{statement_id}")
+    assert response.status_code == 200
+    total = daily_total(datetime.date(2021, 7, 2), other_category.id)
+    assert (total.amount, total.discount, total.count) == (0, 0, 0)
+
+    # 점진적으로 갱신한 값과 전체 재계산 결과가 같아야 함
+    def snapshot():
+        db.expire_all()
+        return {
+            (t.day, t.category_id): (t.amount, t.discount, t.saving, t.count)
+            for t in db.query(StatementDailyTotal)
+            if t.count != 0
+        }
+
+    incremental = snapshot()
+    rebuild_daily_totals(db)
+    assert snapshot() == incremental
+
+
+def test_statement_summary():
+    db = next(override_get_db())
+
+    main_category = MainCategory(name="요약 테스트", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="요약 하위", main_category_id=main_category.id)
+    db.add(category)
+    db.commit()
+
+    db.add_all(
+        [
+            Statement(
+                name="요약",
+                category_id=category.id,
+                amount=-100 * (i + 1),
+                discount=i,
+                date=datetime.datetime(2021, 3, 1 + i, 9, 0),
+            )
+            for i in range(5)
+        ]
+    )
+    db.commit()
+
+    params = dict(category_id=category.id, sort="amount", order="ASC", size=2, page=2)
+    with count_queries() as queries:
+        response = client.get("/api/statement/summary", params=params)
+    assert response.status_code == 200
+    assert len(queries) == 1
+    # 금액 오름차순: -500, -400 | -300, -200 | -100
+    assert response.json() == dict(
+        page_amount=-500,
+        page_discount=3,
+        page_saving=0,
+        total_amount=-1500,
+        total_discount=10,
+        total_saving=0,
+    )
+
+    # 목록과 같은 페이지
+    response = client.get("/api/statement", params=params)
+    assert [item["amount"] for item in response.json()["items"]] == [-300, -200]
+
+    # 같은 조건은 캐시에서
+    with count_queries() as queries:
+        response = client.get("/api/statement/summary", params=params)
+    assert len(queries) == 0
+    assert response.json()["total_amount"] == -1500
+
+    # 내역이 바뀌면 캐시가 비워짐 (-100 -> -1100)
+    statement = db.query(Statement).filter(Statement.name == "요약").first()
+    statement.amount = -1100
+    db.commit()
+    with count_queries() as queries:
+        response = client.get("/api/statement/summary", params=params)
+    assert len(queries) == 1
+    assert response.json()["total_amount"] == -2500
+    assert response.json()["page_amount"] == -700
+
+    response = client.get(
+        "/api/statement/summary",
+        params=dict(
+            category_id=category.id, date_gte="2021-03-02", date_lte="2021-03-03"
+        ),
+    )
+    assert response.json()["total_amount"] == -500
+
+
+def test_statement_summary_commit_during_query():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    statement = Statement(
+        name="요약 경합",
+        category_id=category.id,
+        amount=-100,
+        date=datetime.datetime(2021, 4, 1, 9, 0),
+    )
+    db.add(statement)
+    db.commit()
+
+    def commit_during_query(conn, cursor, sql, parameters, *args):
+        # 합계를 읽은 뒤 캐시에 넣기 전에 다른 요청이 커밋해서 캐시를 비운 경우
+        if statement.amount == -100:
+            statement.amount = -200
+            db.commit()
+
+    params = dict(q="요약 경합")
+    event.listen(async_engine.sync_engine, "after_cursor_execute", commit_during_query)
+    try:
+        response = client.get("/api/statement/summary", params=params)
+    finally:
+        event.remove(
+            async_engine.sync_engine, "after_cursor_execute", commit_during_query
+        )
+    assert response.json()["total_amount"] == -100
+
+    # 비워지기 전에 읽은 값은 저장하지 않음
+    response = client.get("/api/statement/summary", params=params)
+    assert response.json()["total_amount"] == -200
+
+
+def test_statement_name_search():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    account_card = db.query(AccountCard).first()
+
+    db.add_all(
+        [
+            Statement(
+                name=f"검색 100% 할인 {i}",
+                category_id=category.id,
+                account_card_id=account_card.id,
+                amount=-100,
+                date=datetime.datetime(2021, 5, 1, 9, 0),
+            )
+            for i in range(5)
+        ]
+        + [
+            Statement(
+                name="검색 1000 할인",
+                category_id=category.id,
+                account_card_id=account_card.id,
+                amount=-100,
+                date=datetime.datetime(2021, 5, 1, 9, 0),
+            )
+        ]
+    )
+    db.commit()
+
+    # % 는 와일드카드가 아닌 문자로 검색
+    response = client.get("/api/statement/name_list", params=dict(q="100%"))
+    assert len(response.json()) == 5
+
+    response = client.get("/api/statement/name_list", params=dict(q="검색", limit=3))
+    assert len(response.json()) == 3
+
+    response = client.get("/api/statement", params=dict(q="100% 할인"))
+    assert response.json()["total"] == 5
+
+
+def test_statement_name_autocomplete():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+
+    def add(name, amount, day):
+        db.add(
+            Statement(
+                name=name,
+                category_id=category.id,
+                amount=amount,
+                date=datetime.datetime(2021, 7, day, 9, 0),
+                created_at=datetime.datetime(2021, 7, day, 9, 0),
+            )
+        )
+
+    for day in range(1, 4):
+        add("자동완성 커피", -1000 * day, day)
+    add("자동완성 점심", -9000, 5)
+    db.commit()
+
+    params = dict(q="자동완성", compact=True)
+    response = client.get("/api/statement/name_list", params=params)
+    assert response.status_code == 200
+    data = response.json()
+    # 이름별 하나, 많이 쓴 이름 먼저, 가장 최근 내역의 금액
+    assert [row["name"] for row in data] == ["자동완성 커피", "자동완성 점심"]
+    assert data[0]["amount"] == -3000
+    assert data[0]["count"] == 3
+    assert data[0]["category_name"] == category.name
+
+    # 단어 앞부분으로도 검색, DB 조회 없음
+    with count_queries() as queries:
+        response = client.get(
+            "/api/statement/name_list", params=dict(q="점", compact=True)
+        )
+    assert len(queries) == 0
+    assert [row["name"] for row in response.json()] == ["자동완성 점심"]
+
+    # 내역이 바뀌면 해당 이름만 다시 읽음
+    statement = db.query(Statement).filter(Statement.name == "자동완성 점심").one()
+    statement.name = "자동완성 저녁"
+    db.commit()
+    with count_queries() as queries:
+        response = client.get("/api/statement/name_list", params=params)
+    assert len(queries) == 1
+    assert [row["name"] for row in response.json()] == [
+        "자동완성 커피",
+        "자동완성 저녁",
+    ]
+
+    response = client.get(
+        "/api/statement/name_list", params=dict(q="자동완성", compact=True, limit=1)
+    )
+    assert len(response.json()) == 1
+
+
+def test_import_statements():
+    db = next(override_get_db())
+    main_category = MainCategory(name="가져오기", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="가져오기 하위", main_category_id=main_category.id)
+    asset = Asset(name="가져오기 자산", asset_type=1, amount=10000)
+    loan = Loan(
+        name="가져오기 대출",
+        principal=1000,
+        interest_rate=1.0,
+        total_months=1,
+        amount=500,
+    )
+    db.add_all([category, asset, loan])
+    db.commit()
+    history_count = db.query(AssetHistory).count()
+
+    # 엑셀에서 저장한 CSV 처럼 BOM 포함, 빈 칸은 기본값
+    body = "\ufeffname,category_id,amount,discount,saving,date,asset_id,loan_id\n"
+    for i in range(2500):
+        day = f"2020-01-0{i % 3 + 1}T09:30:15"
+        body += f"가져오기{i},{category.id},1000,100,,{day},{asset.id},\n"
+    body += f"가져오기 대출,{category.id},0,,200,2020-01-01T09:30:00,,{loan.id}\n"
+
+    response = client.post("/api/statement/import", content=body.encode())
+    assert response.status_code == 200
+    assert response.json() == dict(imported=2501)
+
+    db.expire_all()
+    statements = db.query(Statement).filter(Statement.category_id == category.id)
+    assert statements.count() == 2501
+    assert statements.first().amount == -1000
+    assert statements.first().date.second == 0
+    assert db.get(Asset, asset.id).amount == 10000 - 2500 * 900
+    assert db.get(Loan, loan.id).amount == 300
+    # 자산 기록은 하루 한 행으로 합쳐짐
+    assert db.query(AssetHistory).count() <= history_count + 1
+    assert latest_asset_history(db).amount == current_net_worth(db)
+
+    totals = db.query(StatementDailyTotal).filter(
+        StatementDailyTotal.category_id == category.id
+    )
+    assert sum(total.count for total in totals) == 2501
+    assert sum(total.amount for total in totals) == -2500 * 1000
+
+    # 잘못된 줄이 있으면 전체 취소
+    row = dict(
+        name="가져오기 실패", category_id=category.id, amount=1, date="2020-02-01"
+    )
+    body = json.dumps(row) + "\n" + json.dumps(dict(row, amount="x")) + "\n"
+    response = client.post(
+        "/api/statement/import", params=dict(format="ndjson"), content=body.encode()
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("line 2:")
+    assert db.query(Statement).filter(Statement.name == "가져오기 실패").count() == 0
+
+
+def test_export_statements():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    db.add_all(
+        [
+            Statement(
+                name=f"내보내기,{i}",
+                category_id=category.id,
+                amount=-i,
+                date=datetime.datetime(2019, 8, 1 + i, 9, 0),
+            )
+            for i in range(3)
+        ]
+    )
+    db.commit()
+
+    params = dict(q="내보내기", sort="date", order="DESC")
+    response = client.get("/api/statement/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.content.decode("utf-8-sig").splitlines()
+    assert lines[0].startswith("id,date,name,category_id,category_name")
+    assert len(lines) == 4
+    assert lines[1].split(",")[1:4] == ["2019-08-03T09:00:00", '"내보내기', '2"']
+
+    response = client.get("/api/statement/export", params=dict(params, format="ndjson"))
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["내보내기,2", "내보내기,1", "내보내기,0"]
+    assert rows[0]["category_name"] == category.name
+    assert rows[0]["amount"] == -2
+
+    # 내보낸 CSV 는 그대로 가져오기 가능
+    response = client.get("/api/statement/export", params=params)
+    response = client.post("/api/statement/import", content=response.content)
+    assert response.json() == dict(imported=3)
+
+
+def test_export_import_multiline_csv():
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    db.add(
+        Statement(
+            name="여러 줄 내역",
+            category_id=category.id,
+            amount=-1000,
+            description='첫 줄\n"둘째" 줄\r\n셋째 줄',
+            date=datetime.datetime(2019, 9, 1, 9, 0),
+        )
+    )
+    db.commit()
+
+    # 따옴표 안의 줄바꿈은 한 행으로 읽음
+    params = dict(q="여러 줄 내역")
+    response = client.get("/api/statement/export", params=params)
+    response = client.post("/api/statement/import", content=response.content)
+    assert response.status_code == 200
+    assert response.json() == dict(imported=1)
+
+    descriptions = db.scalars(
+        select(Statement.description).filter(Statement.name == "여러 줄 내역")
+    ).all()
+    assert descriptions == ['첫 줄\n"둘째" 줄\r\n셋째 줄'] * 2
+
+    # 오류 줄 번호는 실제 줄 기준, 닫히지 않은 따옴표는 오류
+    body = "name,category_id,amount,description,date\n"
+    body += f'a,{category.id},1,"x\ny",2020-01-01\nb,{category.id},x,,2020-01-01\n'
+    response = client.post("/api/statement/import", content=body.encode())
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("line 4:")
+
+    body = f'name,category_id,amount,description,date\na,{category.id},1,"x\n'
+    response = client.post("/api/statement/import", content=body.encode())
+    assert response.status_code == 400
+    assert response.json()["detail"] == "line 2: unterminated quoted field"
+
+
+def test_batch_statements():
+    db = next(override_get_db())
+    main_category = MainCategory(name="일괄", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="일괄 하위", main_category_id=main_category.id)
+    asset = Asset(name="일괄 자산", asset_type=1, amount=10000)
+    db.add_all([category, asset])
+    db.commit()
+
+    def data(name, amount):
+        return dict(
+            name=name,
+            category_id=category.id,
+            amount=amount,
+            discount=100,
+            date="2018-01-01T10:00:00",
+            account_card_id=None,
+            asset_id=asset.id,
+        )
+
+    existing = Statement(
+        name="일괄 수정 전",
+        category_id=category.id,
+        amount=-500,
+        date=datetime.datetime(2018, 1, 1),
+    )
+    deleted = Statement(
+        name="일괄 삭제",
+        category_id=category.id,
+        amount=-2000,
+        asset_id=asset.id,
+        date=datetime.datetime(2018, 1, 1),
+    )
+    db.add_all([existing, deleted])
+    db.commit()
+    deleted_id = deleted.id
+    history_count = db.query(AssetHistory).count()
+
+    items = [
+        dict(op="create", data=data("일괄 추가1", 1000)),
+        dict(op="create", data=data("일괄 추가2", 3000)),
+        dict(op="update", id=existing.id, data=data("일괄 수정 후", 700)),
+        dict(op="delete", id=deleted.id),
+    ]
+    response = client.post("/api/statement/batch", json=items)
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == ["ok"] * 4
+    assert results[2]["id"] == existing.id
+    assert db.get(Statement, results[0]["id"]).amount == -1000
+
+    db.expire_all()
+    assert db.get(Statement, existing.id).name == "일괄 수정 후"
+    assert db.get(Statement, existing.id).amount == -700
+    assert db.get(Statement, deleted_id) is None
+    # 추가: -(1000-100) -(3000-100), 수정(자산 연결): -(700-100), 삭제: 되돌림 +2000
+    assert db.get(Asset, asset.id).amount == 10000 - 900 - 2900 - 600 + 2000
+    # 자산 기록은 하루 한 행으로 합쳐짐
+    assert db.query(AssetHistory).count() <= history_count + 1
+    assert latest_asset_history(db).amount == current_net_worth(db)
+
+    # 하나라도 실패하면 전체 취소
+    items = [
+        dict(op="create", data=data("일괄 취소", 1000)),
+        dict(op="delete", id=deleted_id),
+    ]
+    response = client.post("/api/statement/batch", json=items)
+    assert response.status_code == 400
+    assert [result["status"] for result in response.json()["detail"]] == [
+        "ok",
+        "error",
+    ]
+    assert db.query(Statement).filter(Statement.name == "일괄 취소").count() == 0
+
+
+def test_concurrent_balance_updates():
+    db = next(override_get_db())
+    main_category = MainCategory(name="동시성", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="동시성 하위", main_category_id=main_category.id)
+    asset = Asset(name="동시성 자산", asset_type=1, amount=100000)
+    loan = Loan(
+        name="동시성 대출",
+        principal=100000,
+        interest_rate=1.0,
+        total_months=12,
+        payment_amount=1000,
+        amount=100000,
+    )
+    db.add_all([category, asset, loan])
+    db.commit()
+
+    data = dict(
+        name="동시성",
+        category_id=category.id,
+        amount=1000,
+        discount=100,
+        date="2017-01-01T10:00:00",
+        account_card_id=None,
+        asset_id=asset.id,
+    )
+
+    def write(i):
+        if i % 2:
+            return client.post(f"/api/loan/{loan.id}/payment").status_code
+        return client.post("/api/statement", json=data).status_code
+
+    writers = 40
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        status_codes = list(executor.map(write, range(writers)))
+    assert status_codes == [200] * writers
+
+    db.expire_all()
+    assert db.get(Asset, asset.id).amount == 100000 - (writers // 2) * 900
+    assert db.get(Loan, loan.id).amount == 100000 - (writers // 2) * 1000
+    assert db.get(Loan, loan.id).current_month == writers // 2
+
+    # 수정하면 이전 금액과의 차이만큼 반영
+    statement = db.query(Statement).filter(Statement.name == "동시성").first()
+    response = client.put(
+        f"/api/statement/{statement.id}", json=dict(data, amount=3000)
+    )
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.get(Asset, asset.id).amount == 100000 - (writers // 2) * 900 - 2000
+
+    # 삭제하면 되돌림
+    response = client.delete(f"/api/statement/{statement.id}")
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.get(Asset, asset.id).amount == 100000 - (writers // 2 - 1) * 900
+
+
+def test_net_worth_running_total():
+    def full_sum():
+        db.expire_all()
+        assets = sum(asset.amount for asset in db.query(Asset))
+        loans = sum(loan.amount for loan in db.query(Loan))
+        return assets - loans
+
+    def latest_history():
+        db.expire_all()
+        return latest_asset_history(db).amount
+
+    db = next(override_get_db())
+
+    # 자산/대출 추가, 수정, 삭제
+    asset = client.post(
+        "/api/asset", json=dict(name="순자산 자산", asset_type=1, amount=70000)
+    ).json()
+    loan = client.post(
+        "/api/loan",
+        json=dict(
+            name="순자산 대출",
+            principal=30000,
+            interest_rate=1.0,
+            total_months=10,
+            payment_amount=3000,
+            amount=30000,
+        ),
+    ).json()
+    assert current_net_worth(db) == full_sum()
+
+    client.put(
+        f"/api/asset/{asset['id']}",
+        json=dict(name="순자산 자산", asset_type=1, amount=50000),
+    )
+    client.post(f"/api/loan/{loan['id']}/payment")
+    assert current_net_worth(db) == full_sum()
+    assert latest_history() == full_sum()
+
+    # 내역으로 바뀐 잔액
+    main_category = MainCategory(name="순자산", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="순자산 하위", main_category_id=main_category.id)
+    db.add(category)
+    db.commit()
+    response = client.post(
+        "/api/statement",
+        json=dict(
+            name="순자산",
+            category_id=category.id,
+            amount=1000,
+            discount=0,
+            date="2017-01-01T10:00:00",
+            account_card_id=None,
+            asset_id=asset["id"],
+            loan_id=loan["id"],
+            saving=2000,
+        ),
+    )
+    assert response.status_code == 200
+    assert current_net_worth(db) == full_sum()
+    assert latest_history() == full_sum()
+
+    client.delete(f"/api/asset/{asset['id']}")
+    assert current_net_worth(db) == full_sum()
+
+    # 누적값을 거치지 않은 변경은 검증 작업이 바로잡음
+    expected = full_sum()
+    db.execute(update(Loan).where(Loan.id == loan["id"]).values(amount=0))
+    db.commit()
+    assert verify_net_worth(db) == full_sum() - expected
+    assert current_net_worth(db) == full_sum()
+    assert verify_net_worth(db) == 0
+
+
+def test_unknown_balance_target():
+    db = next(override_get_db())
+    main_category = MainCategory(name="없는 자산", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="없는 자산 하위", main_category_id=main_category.id)
+    asset = Asset(name="있는 자산", asset_type=1, amount=10000)
+    db.add_all([category, asset])
+    db.commit()
+    net_worth = current_net_worth(db)
+
+    def data(**kwargs):
+        return dict(
+            dict(
+                name="없는 자산 내역",
+                category_id=category.id,
+                amount=5000,
+                date="2017-02-01T10:00:00",
+                account_card_id=None,
+            ),
+            **kwargs,
+        )
+
+    # 없는 자산/대출은 404, 잔액과 순자산은 그대로
+    response = client.post("/api/statement", json=data(asset_id=424242))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Asset not found"
+    response = client.post("/api/statement", json=data(loan_id=424242, saving=100))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Loan not found"
+    assert current_net_worth(db) == net_worth
+
+    statement = client.post("/api/statement", json=data(asset_id=asset.id)).json()
+    net_worth = current_net_worth(db)
+    response = client.put(
+        f"/api/statement/{statement['id']}", json=data(asset_id=424242)
+    )
+    assert response.status_code == 404
+    db.expire_all()
+    assert db.get(Asset, asset.id).amount == 5000
+    assert current_net_worth(db) == net_worth
+
+    response = client.post(
+        "/api/statement/batch",
+        json=[dict(op="create", data=data()), dict(op="create", data=data(loan_id=0))],
+    )
+    assert response.status_code == 400
+    assert [result["detail"] for result in response.json()["detail"]] == [
+        None,
+        "Loan not found",
+    ]
+
+    body = "name,category_id,amount,date,asset_id\n"
+    body += f"가져오기,{category.id},1000,2020-01-01,{asset.id}\n"
+    body += f"가져오기,{category.id},1000,2020-01-01,424242\n"
+    response = client.post("/api/statement/import", content=body.encode())
+    assert response.status_code == 404
+    assert response.json()["detail"] == "line 3: Unknown asset 424242"
+
+    # 없는 id 의 변경분은 순자산에 더하지 않음
+    balances = BalanceDeltas()
+    balances.assets[424242] += 1000
+    balances.assets[asset.id] += 1000
+    assert balances.apply(db) == {(Asset, asset.id): 6000}
+    db.commit()
+    assert current_net_worth(db) == net_worth + 1000
+    assert db.query(Statement).filter(Statement.name == "없는 자산 내역").count() == 1
+
+
+def test_update_statement_unknown_category():
+    db = next(override_get_db())
+    main_category = MainCategory(name="없는 카테고리", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="없는 카테고리 하위", main_category_id=main_category.id)
+    db.add(category)
+    db.commit()
+
+    data = dict(
+        name="없는 카테고리 내역",
+        category_id=category.id,
+        amount=3000,
+        date="2017-03-01T10:00:00",
+        account_card_id=None,
+    )
+    statement = client.post("/api/statement", json=data).json()
+    assert statement["amount"] == -3000
+
+    # 없는 카테고리로 수정하면 404, 내역은 그대로
+    response = client.put(
+        f"/api/statement/{statement['id']}", json=dict(data, category_id=424242)
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Category not found"
+    db.expire_all()
+    saved = db.get(Statement, statement["id"])
+    assert (saved.category_id, saved.amount) == (category.id, -3000)
+
+
+def test_negative_expense_reversed():
+    db = next(override_get_db())
+    main_category = MainCategory(name="음수 지출", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="음수 지출 하위", main_category_id=main_category.id)
+    asset = Asset(name="음수 지출 자산", asset_type=1, amount=10000)
+    db.add_all([category, asset])
+    db.commit()
+
+    def asset_amount():
+        db.expire_all()
+        return db.get(Asset, asset.id).amount
+
+    data = dict(
+        name="음수 지출",
+        category_id=category.id,
+        amount=-3000,
+        discount=500,
+        date="2017-04-01T10:00:00",
+        account_card_id=None,
+        asset_id=asset.id,
+    )
+    # 음수로 입력해도 양수로 입력한 것과 같게 저장/반영
+    statement = client.post("/api/statement", json=data).json()
+    assert statement["amount"] == -3000
+    assert asset_amount() == 10000 - 2500
+
+    # 수정(같은 금액)과 삭제는 정확히 되돌림
+    response = client.put(f"/api/statement/{statement['id']}", json=data)
+    assert response.status_code == 200
+    assert asset_amount() == 10000 - 2500
+    client.delete(f"/api/statement/{statement['id']}")
+    assert asset_amount() == 10000
+
+
+def test_asset_history_coalesced():
+    db = next(override_get_db())
+    asset = Asset(name="기록 자산", asset_type=1, amount=1000)
+    db.add(asset)
+    db.commit()
+
+    for amount in (2000, 3000, 4000):
+        response = client.put(
+            f"/api/asset/{asset.id}",
+            json=dict(name="기록 자산", asset_type=1, amount=amount),
+        )
+        assert response.status_code == 200
+
+    # 같은 날 여러 번 기록해도 한 행, 값은 마지막 순자산
+    db.expire_all()
+    today = latest_asset_history(db)
+    assert db.query(AssetHistory).filter(AssetHistory.day == today.day).count() == 1
+    assert today.amount == current_net_worth(db)
+
+
+def test_compact_asset_history():
+    db = next(override_get_db())
+    days = [
+        datetime.date(2001, 1, 3),
+        datetime.date(2001, 1, 20),
+        datetime.date(2001, 1, 31),
+        datetime.date(2001, 2, 1),
+        datetime.date(2001, 2, 14),
+        datetime.date(2001, 4, 1),
+        datetime.date(2001, 4, 2),
+    ]
+    db.add_all(
+        [AssetHistory(day=day, amount=i, created_at=day) for i, day in enumerate(days)]
+    )
+    db.commit()
+
+    # 3개월 이전(2001-04-01 전)은 달마다 마지막 행만 남김
+    assert compact_asset_history(db, months=3, today=datetime.date(2001, 7, 10)) == 3
+    remaining = db.query(AssetHistory).filter(
+        AssetHistory.day < datetime.date(2002, 1, 1)
+    )
+    assert [(row.day, row.amount) for row in remaining.order_by(AssetHistory.day)] == [
+        (datetime.date(2001, 1, 31), 2),
+        (datetime.date(2001, 2, 14), 4),
+        (datetime.date(2001, 4, 1), 5),
+        (datetime.date(2001, 4, 2), 6),
+    ]
+
+    # 다시 실행해도 변화 없음
+    assert compact_asset_history(db, months=3, today=datetime.date(2001, 7, 10)) == 0
+
+
+def test_asset_history_buckets():
+    db = next(override_get_db())
+    values = {
+        datetime.date(2003, 3, 1): 100,
+        datetime.date(2003, 3, 2): 150,
+        datetime.date(2003, 3, 5): 130,
+        datetime.date(2003, 3, 31): 170,
+        datetime.date(2003, 4, 1): 200,
+        datetime.date(2003, 11, 20): 300,
+    }
+    db.add_all(
+        [
+            AssetHistory(day=day, amount=amount, created_at=day)
+            for day, amount in values.items()
+        ]
+    )
+    db.commit()
+
+    # 2003-03-05(수)가 있는 주: 일요일(3/2)부터
+    response = client.get("/api/asset/history", params=dict(date="2003-03-05"))
+    assert response.json() == [
+        dict(name="2003-03-02", value=150),
+        dict(name="2003-03-05", value=130),
+    ]
+
+    response = client.get("/api/asset/history", params=dict(date="2003-03-05", mode=2))
+    assert [row["name"] for row in response.json()] == [
+        "2003-03-01",
+        "2003-03-02",
+        "2003-03-05",
+        "2003-03-31",
+    ]
+
+    # 년간 모드는 달마다 마지막 값
+    response = client.get("/api/asset/history", params=dict(date="2003-06-01", mode=3))
+    assert response.json() == [
+        dict(name="2003-03", value=170),
+        dict(name="2003-04", value=200),
+        dict(name="2003-11", value=300),
+    ]
+
+    with count_queries() as statements:
+        response = client.get(
+            "/api/asset/history", params=dict(date="2003-06-01", mode=3)
+        )
+    assert len(statements) == 1
+
+
+def test_asset_prev():
+    db = next(override_get_db())
+    today = datetime.datetime.now(CURRENT_TIMEZONE).date()
+    week_start = today - datetime.timedelta(days=1 + today.weekday())
+    # 이번 주 기록을 두 개로 맞춤 (이전 테스트에서 오늘 기록이 있을 수 있음)
+    db.query(AssetHistory).filter(AssetHistory.day >= week_start).delete()
+    db.add_all(
+        [
+            AssetHistory(day=week_start, amount=1000, created_at=week_start),
+            AssetHistory(day=today, amount=1800, created_at=today),
+        ]
+    )
+    db.commit()
+
+    response = client.get("/api/asset/prev")
+    assert response.status_code == 200
+    assert response.json() == dict(
+        total_asset=current_net_worth(db), diff_asset=1800 - 1000
+    )
+
+
+def test_asset_version_history():
+    db = next(override_get_db())
+    asset = client.post(
+        "/api/asset", json=dict(name="버전 자산", asset_type=1, amount=100)
+    ).json()
+    for amount, description in (
+        (200, None),
+        (200, "금액 그대로"),
+        (300, None),
+        (250, None),
+    ):
+        response = client.put(
+            f"/api/asset/{asset['id']}",
+            json=dict(
+                name="버전 자산",
+                asset_type=1,
+                amount=amount,
+                description=description,
+            ),
+        )
+        assert response.status_code == 200
+
+    # 버전마다 날짜를 흩어 놓음
+    AssetVersion = version_class(Asset)
+    versions = db.scalars(
+        select(AssetVersion)
+        .filter(AssetVersion.id == asset["id"])
+        .order_by(AssetVersion.transaction_id)
+    ).all()
+    assert len(versions) == 5
+    days = [
+        datetime.datetime(2004, 1, 1, 9),
+        datetime.datetime(2004, 1, 2, 9),
+        datetime.datetime(2004, 1, 2, 10),
+        datetime.datetime(2004, 1, 3, 9),
+        datetime.datetime(2004, 1, 3, 10),
+    ]
+    for version, day in zip(versions, days):
+        version.created_at = days[0]
+        version.updated_at = None if day == days[0] else day
+    db.commit()
+
+    response = client.get(f"/api/asset/{asset['id']}/history")
+    assert response.json() == [
+        dict(date="2004-01-01", amount=100),
+        dict(date="2004-01-02", amount=200),
+        dict(date="2004-01-03", amount=250),
+    ]
+
+    rows = db.execute(version_history(Asset, asset["id"], limit=2)).all()
+    assert [(day.day, amount) for day, amount in rows] == [(2, 200), (3, 250)]
+
+    assert client.get("/api/asset/0/history").status_code == 404
+
+
+def test_statement_message_uses_cache():
+    db = next(override_get_db())
+    asset = Asset(name="메시지 자산", asset_type=1, amount=50000)
+    db.add(asset)
+    db.commit()
+    main_category = MainCategory(
+        name="메시지", category_type=TYPE_OUTCOME, asset_id=asset.id
+    )
+    db.add(main_category)
+    db.commit()
+    category = Category(name="메시지 하위", main_category_id=main_category.id)
+    db.add(category)
+    db.commit()
+
+    now = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M")
+    data = dict(
+        name="메시지 내역",
+        category_id=category.id,
+        amount=1000,
+        date=now,
+        account_card_id=None,
+    )
+    id = client.post("/api/statement", json=data).json()["id"]
+
+    response = client.post(f"/api/statement/{id}/message")
+    month_sum = int(response.json().split("월 지출 ")[1][:-1].replace(",", ""))
+    assert "[메시지-메시지 하위]" in response.json()
+    assert "메시지 자산 50,000원" in response.json()
+
+    # 캐시가 채워진 뒤에는 내역 조회 외에 쿼리 없음
+    with count_queries() as queries:
+        response = client.post(f"/api/statement/{id}/message")
+    assert len(queries) == 1
+
+    # 새 내역은 월 합계에 바로 반영 (다시 읽지 않음)
+    client.post("/api/statement", json=dict(data, amount=500))
+    with count_queries() as queries:
+        response = client.post(f"/api/statement/{id}/message")
+    assert len(queries) == 1
+    assert f"월 지출 {month_sum + 500:,}원" in response.json()
+
+    # 자산 잔액이 바뀌면 자산만 다시 읽음
+    client.post("/api/statement", json=dict(data, asset_id=asset.id))
+    with count_queries() as queries:
+        response = client.post(f"/api/statement/{id}/message")
+    assert len(queries) == 2
+    assert "메시지 자산 49,000원" in response.json()
+
+
+def test_reference_all_cached():
+    db = next(override_get_db())
+    client.post(
+        "/api/main-category",
+        json=dict(name="기준 정보", category_type=TYPE_OUTCOME, weekly_limit=0),
+    )
+    main_category = db.query(MainCategory).filter_by(name="기준 정보").one()
+    client.post(
+        "/api/category",
+        json=dict(name="기준 정보 하위", main_category_id=main_category.id),
+    )
+    asset = client.post(
+        "/api/asset", json=dict(name="기준 정보 자산", asset_type=1, amount=1000)
+    ).json()
+
+    paths = [
+        "/api/main-category/all",
+        "/api/category/all",
+        "/api/account-card/all",
+        "/api/asset/all",
+    ]
+    bodies = [client.get(path).content for path in paths]
+    with count_queries() as statements:
+        assert [client.get(path).content for path in paths] == bodies
+    assert statements == []
+
+    categories = json.loads(bodies[1])
+    category = next(row for row in categories if row["name"] == "기준 정보 하위")
+    assert category["main_category_name"] == "기준 정보"
+    assert category["type"] == TYPE_OUTCOME
+
+    # 상위 카테고리를 고치면 두 목록 모두 다시 읽음
+    client.put(
+        f"/api/main-category/{main_category.id}",
+        json=dict(name="기준 정보2", category_type=TYPE_OUTCOME, weekly_limit=0),
+    )
+    categories = client.get("/api/category/all").json()
+    category = next(row for row in categories if row["name"] == "기준 정보 하위")
+    assert category["main_category_name"] == "기준 정보2"
+
+    # 내역으로 바뀐 자산 잔액도 반영
+    response = client.post(
+        "/api/statement",
+        json=dict(
+            name="기준 정보",
+            category_id=category["id"],
+            amount=300,
+            date="2019-01-01T10:00:00",
+            account_card_id=None,
+            asset_id=asset["id"],
+        ),
+    )
+    assert response.status_code == 200
+    assets = client.get("/api/asset/all").json()
+    assert next(row for row in assets if row["id"] == asset["id"])["amount"] == 700
+
+
+def test_reference_reload_on_miss():
+    db = next(override_get_db())
+    main_category = MainCategory(name="다른 워커", category_type=TYPE_OUTCOME)
+    asset = Asset(name="다른 워커 자산", asset_type=1, amount=10000)
+    db.add_all([main_category, asset])
+    db.commit()
+    reference.categories.get(db)
+
+    # 다른 워커가 추가한 카테고리 (이 프로세스의 캐시는 아직 모름)
+    with engine.begin() as connection:
+        category_id = connection.execute(
+            text(
+                "INSERT INTO categories (name, main_category_id)"
+                " VALUES ('다른 워커 하위', :id) RETURNING id"
+            ),
+            dict(id=main_category.id),
+        ).scalar()
+    assert category_id not in reference.categories.cached()
+
+    # 없는 id 는 한 번 다시 읽어서 찾음
+    data = dict(
+        name="다른 워커 내역",
+        category_id=category_id,
+        amount=1000,
+        date="2017-05-01T10:00:00",
+        account_card_id=None,
+        asset_id=asset.id,
+    )
+    response = client.post("/api/statement", json=data)
+    assert response.status_code == 200
+    statement = db.get(Statement, response.json()["id"])
+    assert "[다른 워커-다른 워커 하위]" in convert_message(db, statement)
+
+    # 다시 읽어도 카테고리가 없으면 잔액을 되돌리지 않고 실패
+    with engine.begin() as connection:
+        connection.execute(
+            text("DELETE FROM categories WHERE id = :id"), dict(id=category_id)
+        )
+    invalidate("categories")
+    response = client.delete(f"/api/statement/{statement.id}")
+    assert response.status_code == 409
+    db.expire_all()
+    assert db.get(Asset, asset.id).amount == 9000
+    assert db.get(Statement, statement.id) is not None
+
+
+def test_json_cache_version():
+    cache = reference.JsonCache(AssetSchema, "json_cache_test")
+
+    async def load():
+        # 읽는 도중에 커밋이 일어난 경우
+        invalidate("json_cache_test")
+        return []
+
+    assert asyncio.run(cache.get(load)) == b"[]"
+    assert cache.version == 1
+    assert cache._body is None
+
+
+def test_monthly_totals_version():
+    totals = reference.MonthlyTotals()
+    day = datetime.date(2016, 5, 1)
+
+    class ReadDuringCommit:
+        # 읽는 도중에 커밋이 일어나 변경분이 적용된 경우
+        def execute(self, query):
+            totals.apply({(day, 0): dict(amount=-500)})
+            return [(TYPE_OUTCOME, -1000)]
+
+    assert totals.get(ReadDuringCommit(), day, TYPE_OUTCOME) == -1000
+    assert totals.version == 1
+    assert totals._months == {}
+
+    class Read:
+        def execute(self, query):
+            return [(TYPE_OUTCOME, -1500)]
+
+    assert totals.get(Read(), day, TYPE_OUTCOME) == -1500
+    assert totals._months[2016, 5][TYPE_OUTCOME] == -1500
+
+
+def test_asset_history_reads_net_worth_in_upsert(monkeypatch):
+    db = next(override_get_db())
+    amount = current_net_worth(db)
+    db.commit()
+
+    # 값을 읽은 뒤 upsert 전에 다른 작업이 순자산을 바꾼 상황
+    def read_then_change(db):
+        result = current_net_worth(db)
+        other = next(override_get_db())
+        other.execute(
+            update(NetWorth)
+            .where(NetWorth.id == NET_WORTH_ID)
+            .values(amount=NetWorth.amount + 1000)
+        )
+        other.commit()
+        other.close()
+        return result
+
+    monkeypatch.setattr(utils, "current_net_worth", read_then_change)
+    try:
+        utils.new_asset_history(db)
+        db.expire_all()
+        assert latest_asset_history(db).amount == amount + 1000
+    finally:
+        db.execute(
+            update(NetWorth).where(NetWorth.id == NET_WORTH_ID).values(amount=amount)
+        )
+        db.commit()
+        utils.new_asset_history(db)
+        db.close()
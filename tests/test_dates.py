@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from app.dates import day_range, week_range, month_range, year_range, MONDAY
+
+
+def test_day_range():
+    assert day_range(date(2023, 12, 31)) == (
+        datetime(2023, 12, 31),
+        datetime(2024, 1, 1),
+    )
+
+
+def test_week_range():
+    # 2023-05-17 은 수요일
+    assert week_range(date(2023, 5, 17)) == (
+        datetime(2023, 5, 14),
+        datetime(2023, 5, 21),
+    )
+    assert week_range(date(2023, 5, 14)) == (
+        datetime(2023, 5, 14),
+        datetime(2023, 5, 21),
+    )
+    assert week_range(date(2023, 5, 17), MONDAY) == (
+        datetime(2023, 5, 15),
+        datetime(2023, 5, 22),
+    )
+
+
+def test_month_range():
+    assert month_range(date(2024, 2, 10)) == (
+        datetime(2024, 2, 1),
+        datetime(2024, 3, 1),
+    )
+    assert month_range(date(2023, 12, 31)) == (
+        datetime(2023, 12, 1),
+        datetime(2024, 1, 1),
+    )
+
+
+def test_year_range():
+    assert year_range(date(2023, 7, 1)) == (datetime(2023, 1, 1), datetime(2024, 1, 1))
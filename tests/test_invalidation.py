@@ -0,0 +1,184 @@
+import asyncio
+import datetime
+import uuid
+import asyncpg
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.invalidation import CHANNEL, InvalidationBus, WORKER_ID
+from models import Category
+from . import client, engine, override_get_db, POSTGRES_URL, requires_postgres
+
+
+class Recorder:
+    def __init__(self):
+        self.invalidated = []
+        self.expired = 0
+
+    def invalidate(self, *tables):
+        self.invalidated.append(set(tables))
+
+    def expire(self):
+        self.expired += 1
+
+
+def new_bus(recorder, **kwargs):
+    return InvalidationBus(
+        on_invalidate=recorder.invalidate, on_expire=recorder.expire, **kwargs
+    )
+
+
+async def wait_for(condition, timeout=5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_fallback_ttl_without_listener():
+    # LISTEN 연결이 없으면 ttl 마다 모든 캐시를 비움
+    async def run():
+        recorder = Recorder()
+        bus = new_bus(recorder, dsn="postgresql://user:pw@127.0.0.1:1/none", ttl=0.05)
+        bus.start()
+        await asyncio.sleep(0.3)
+        await bus.stop()
+        return bus, recorder
+
+    bus, recorder = asyncio.run(run())
+    assert not bus.connected
+    assert recorder.expired >= 4
+    assert recorder.invalidated == []
+
+
+@requires_postgres
+def test_notify_between_workers():
+    channel = f"cache_invalidation_test_{uuid.uuid4().hex[:8]}"
+    engine = create_engine(POSTGRES_URL)
+
+    def commit(tables, rollback=False):
+        with Session(engine) as db:
+            # publish_changed_tables 와 같은 형식으로 테스트용 채널에 NOTIFY
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                dict(channel=channel, payload=f"{WORKER_ID}:{','.join(tables)}"),
+            )
+            if rollback:
+                db.rollback()
+            else:
+                db.commit()
+
+    async def run():
+        other, own = Recorder(), Recorder()
+        other_bus = new_bus(other, dsn=POSTGRES_URL, channel=channel)
+        own_bus = new_bus(own, dsn=POSTGRES_URL, channel=channel, worker_id=WORKER_ID)
+        other_bus.start()
+        own_bus.start()
+        await wait_for(lambda: other_bus.connected and own_bus.connected)
+
+        commit(["main_categories", "categories"], rollback=True)
+        commit(["categories", "main_categories"])
+        await wait_for(lambda: other.invalidated)
+        await asyncio.sleep(0.1)
+
+        await other_bus.stop()
+        await own_bus.stop()
+        return other, own
+
+    other, own = asyncio.run(run())
+    engine.dispose()
+
+    # 롤백된 알림은 전달되지 않음, 보낸 워커 자신은 건너뜀
+    assert other.invalidated == [{"categories", "main_categories"}]
+    assert own.invalidated == []
+
+
+@requires_postgres
+def test_publish_on_commit(monkeypatch):
+    # 세션 커밋 시 변경 테이블이 NOTIFY 됨
+    from app import invalidation
+
+    channel = f"cache_invalidation_test_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(invalidation, "CHANNEL", channel)
+    engine = create_engine(POSTGRES_URL)
+
+    async def run():
+        recorder = Recorder()
+        bus = new_bus(recorder, dsn=POSTGRES_URL, channel=channel, worker_id="other")
+        bus.start()
+        await wait_for(lambda: bus.connected)
+
+        with Session(engine) as db:
+            db.info["changed_tables"] = {"account_cards"}
+            db.info["daily_total_deltas"] = [{}]
+            db.execute(text("SELECT 1"))
+            db.commit()
+        await wait_for(lambda: recorder.invalidated)
+
+        await bus.stop()
+        return recorder
+
+    recorder = asyncio.run(run())
+    engine.dispose()
+    assert recorder.invalidated == [{"account_cards", "statement_daily_totals"}]
+
+
+@requires_postgres
+def test_listener_reconnect():
+    channel = f"cache_invalidation_test_{uuid.uuid4().hex[:8]}"
+
+    async def run():
+        recorder = Recorder()
+        bus = new_bus(recorder, dsn=POSTGRES_URL, channel=channel, ttl=30)
+        bus.start()
+        await wait_for(lambda: bus.connected)
+        expired = recorder.expired
+
+        # 서버에서 LISTEN 연결을 끊음
+        admin = await asyncpg.connect(POSTGRES_URL)
+        await admin.execute(
+            """
+            SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+            WHERE pid <> pg_backend_pid() AND query LIKE $1
+            """,
+            f'%LISTEN "{channel}"%',
+        )
+        await admin.close()
+
+        await wait_for(lambda: bus.reconnects == 1)
+        await wait_for(lambda: bus.connected)
+        await bus.stop()
+        return recorder, expired
+
+    recorder, expired = asyncio.run(run())
+    # 끊기면 바로 비우고, 다시 연결하면 한 번 더 비움
+    assert recorder.expired >= expired + 2
+
+
+def test_remote_statements_reload_name_index():
+    # 다른 워커가 추가한 내역은 이 프로세스의 세션 이벤트를 거치지 않음
+    db = next(override_get_db())
+    category = db.query(Category).first()
+    params = dict(q="원격 워커", compact=True)
+    assert client.get("/api/statement/name_list", params=params).json() == []
+
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO statements (name, category_id, amount, date, created_at)"
+                " VALUES (:name, :category_id, -1000, :date, :date)"
+            ),
+            dict(
+                name="원격 워커 내역",
+                category_id=category.id,
+                date=datetime.datetime(2021, 8, 1, 9, 0),
+            ),
+        )
+    assert client.get("/api/statement/name_list", params=params).json() == []
+
+    # 다른 워커의 statements 알림을 받으면 인덱스를 다시 읽음
+    bus = InvalidationBus(dsn="postgresql://user:pw@127.0.0.1:1/none")
+    bus._notify(None, 0, CHANNEL, "other:statements")
+    assert bus.received == 1
+    response = client.get("/api/statement/name_list", params=params)
+    assert [row["name"] for row in response.json()] == ["원격 워커 내역"]
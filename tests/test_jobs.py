@@ -0,0 +1,105 @@
+import asyncio
+import time
+from fastapi.testclient import TestClient
+from . import app, override_get_db
+from .fake_telegram import FakeTelegram
+from models import MainCategory, Category, AssetHistory
+from app.consts import TYPE_INCOME
+from app import jobs
+from app.jobs import job_queue
+from app.telegram import telegram_sender
+
+
+def setup_statement_data(name):
+    db = next(override_get_db())
+    main_category = MainCategory(name=name, category_type=TYPE_INCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name=f"{name} 하위", main_category_id=main_category.id)
+    db.add(category)
+    db.commit()
+
+    return db, dict(
+        name=name,
+        category_id=category.id,
+        amount=1000,
+        date="2016-01-01T10:00:00",
+        account_card_id=None,
+        is_alert=True,
+    )
+
+
+def test_notification_off_request_path(monkeypatch):
+    db, data = setup_statement_data("작업 큐")
+    history_count = db.query(AssetHistory).count()
+
+    with FakeTelegram(delay=1) as telegram:
+        monkeypatch.setattr(telegram_sender, "api_url", telegram.url)
+
+        # startup 에서 워커 시작, shutdown 에서 남은 작업 처리
+        with TestClient(app) as client:
+            assert job_queue.running
+
+            started = time.monotonic()
+            response = client.post("/api/statement", json=data)
+            assert response.status_code == 200
+            assert time.monotonic() - started < 1
+            assert telegram.messages == []
+
+        assert not job_queue.running
+        assert len(telegram.messages) == 1
+        assert "작업 큐" in telegram.messages[0]["text"]
+
+    # 알림만 있는 경우 자산 기록은 하지 않음
+    assert db.query(AssetHistory).count() == history_count
+
+
+def test_notification_retry(monkeypatch):
+    db, data = setup_statement_data("작업 큐 재시도")
+    monkeypatch.setattr(job_queue, "backoff", 0.01)
+    monkeypatch.setattr(telegram_sender.bucket, "rate", 100)
+    processed, failed = job_queue.processed, job_queue.failed
+
+    with FakeTelegram(fail=2) as telegram:
+        monkeypatch.setattr(telegram_sender, "api_url", telegram.url)
+        with TestClient(app) as client:
+            assert client.post("/api/statement", json=data).status_code == 200
+
+        assert telegram.requests == 3
+        assert len(telegram.messages) == 1
+        text = telegram.messages[0]["text"]
+    assert job_queue.processed == processed + 1
+    assert job_queue.failed == failed
+
+    # 재시도 횟수를 넘기면 실패로 기록
+    with FakeTelegram(fail=10) as telegram:
+        monkeypatch.setattr(telegram_sender, "api_url", telegram.url)
+        with TestClient(app) as client:
+            assert client.post("/api/statement", json=data).status_code == 200
+
+        assert telegram.requests == job_queue.retries + 1
+    assert job_queue.failed == failed + 1
+
+    # 버려진 메시지는 다음 알림에 붙지 않음
+    with FakeTelegram() as telegram:
+        monkeypatch.setattr(telegram_sender, "api_url", telegram.url)
+        with TestClient(app) as client:
+            assert client.post("/api/statement", json=data).status_code == 200
+
+        assert [message["text"] for message in telegram.messages] == [text]
+
+
+def test_prune_old_versions_loops_in_job(monkeypatch):
+    calls = []
+
+    def fake_prune(db):
+        calls.append(db)
+        return dict(pruned={}, remaining=len(calls) < 3)
+
+    async def no_enqueue(*args, **kwargs):
+        raise AssertionError("작업 안에서 큐에 다시 넣지 않음")
+
+    monkeypatch.setattr(jobs, "prune_versions", fake_prune)
+    monkeypatch.setattr(job_queue, "enqueue", no_enqueue)
+    asyncio.run(jobs.prune_old_versions())
+    assert len(calls) == 3
@@ -0,0 +1,144 @@
+import asyncio
+import time
+import pytest
+from .fake_telegram import FakeTelegram
+from app.telegram import TelegramError, TelegramSender, TokenBucket, split_message
+
+
+def test_token_bucket():
+    async def acquire(count):
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 처음 2개는 바로, 이후 초당 20개
+    assert asyncio.run(acquire(2)) < 0.04
+    assert asyncio.run(acquire(6)) >= 0.19
+
+
+def test_split_message():
+    text = "\n".join(["가" * 100] * 100)
+    chunks = split_message(text, limit=1000)
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert "\n".join(chunks) == text
+    assert split_message("a" * 2500, limit=1000) == ["a" * 1000] * 2 + ["a" * 500]
+
+
+def test_sender():
+    with FakeTelegram() as telegram:
+        sender = TelegramSender(
+            token="token", chat_id="chat", api_url=telegram.url, rate=5
+        )
+
+        async def run():
+            for i in range(3):
+                await sender.send(f"메시지 {i}")
+            # 전송 중에 들어온 메시지는 합쳐서 한 번에
+            await asyncio.gather(*[sender.send(f"묶음 {i}") for i in range(10)])
+            await sender.aclose()
+
+        asyncio.run(run())
+
+    texts = [message["text"] for message in telegram.messages]
+    assert texts[:3] == ["메시지 0", "메시지 1", "메시지 2"]
+    assert texts[3] == "\n\n".join(f"묶음 {i}" for i in range(10))
+    assert len(texts) == 4
+    assert telegram.messages[0]["chat_id"] == "chat"
+
+    # 연결 재사용
+    assert len(telegram.connections) == 1
+
+    assert sender.stats["sent"] == 4
+    assert sender.stats["coalesced"] == 9
+    assert sender.stats["failed"] == 0
+    assert sender.stats["latency_max"] > 0
+
+
+def test_sender_failure():
+    with FakeTelegram(fail=2) as telegram:
+        sender = TelegramSender(token="token", api_url=telegram.url, rate=100)
+
+        async def run():
+            # 첫 메시지는 바로, 전송 중에 들어온 두 메시지는 묶어서 보내고
+            # 묶인 메시지는 모두 실패를 돌려받음
+            results = await asyncio.gather(
+                *[sender.send(f"실패 {i}") for i in range(3)], return_exceptions=True
+            )
+            assert all(isinstance(result, TelegramError) for result in results)
+            # 실패한 메시지는 다음 전송에 붙지 않음 (재시도는 작업 큐에서)
+            await sender.send("성공")
+            await sender.aclose()
+
+        asyncio.run(run())
+
+    assert [message["text"] for message in telegram.messages] == ["성공"]
+    assert sender.stats["failed"] == 2
+    assert sender.stats["sent"] == 1
+
+
+def test_sender_pending_limit():
+    with FakeTelegram(delay=0.2) as telegram:
+        sender = TelegramSender(
+            token="token", api_url=telegram.url, rate=100, max_pending=3
+        )
+
+        async def run():
+            # 첫 메시지를 보내는 동안 max_pending 개까지만 대기열에 넣음
+            results = await asyncio.gather(
+                *[sender.send(f"메시지 {i}") for i in range(6)],
+                return_exceptions=True,
+            )
+            await sender.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+    errors = [isinstance(result, TelegramError) for result in results]
+    assert errors == [False] * 4 + [True] * 2
+    assert sender.stats["dropped"] == 2
+    assert [message["text"] for message in telegram.messages] == [
+        "메시지 0",
+        "메시지 1\n\n메시지 2\n\n메시지 3",
+    ]
+    assert not sender._pending
+
+
+def test_sender_rate_per_chunk():
+    # 10000자 메시지는 세 조각, 조각마다 토큰을 씀 (초당 10개)
+    message = "\n".join(["가" * 1000] * 10)
+    with FakeTelegram() as telegram:
+        sender = TelegramSender(token="token", api_url=telegram.url, rate=10)
+
+        async def run():
+            started = time.monotonic()
+            await sender.send(message)
+            elapsed = time.monotonic() - started
+            await sender.aclose()
+            return elapsed
+
+        assert asyncio.run(run()) >= 0.19
+
+    assert [m["text"] for m in telegram.messages] == split_message(message)
+
+
+def test_sender_resume_chunks():
+    message = "\n".join(["가" * 1000] * 10)
+    with FakeTelegram(fail_on=(2,)) as telegram:
+        sender = TelegramSender(token="token", api_url=telegram.url, rate=100)
+
+        async def run():
+            # 첫 조각만 보내고 두 번째 조각에서 실패
+            with pytest.raises(TelegramError):
+                await sender.send(message)
+            # 재시도는 보내지 못한 조각부터
+            await sender.send(message)
+            await sender.aclose()
+
+        asyncio.run(run())
+
+    assert telegram.requests == 4
+    assert [m["text"] for m in telegram.messages] == split_message(message)
+    assert sender.stats["sent"] == 3
+    assert not sender._delivered
@@ -0,0 +1,252 @@
+import gzip
+import json
+import datetime
+import os
+import subprocess
+import sys
+import uuid
+import pytest
+from . import client, override_get_db, POSTGRES_URL, requires_postgres
+from sqlalchemy import create_engine, make_url, select, text, update
+from sqlalchemy_continuum import version_class, versioning_manager
+from models import Asset, AuditLog, Category, MainCategory
+from app.retention import prune_versions
+from app.consts import TYPE_OUTCOME
+import versioning
+
+
+def test_parse_policies():
+    assert versioning.parse_policies("") == {}
+    assert versioning.parse_policies(" statements=audit, assets=amount,") == {
+        "statements": "audit",
+        "assets": "amount",
+    }
+    with pytest.raises(ValueError):
+        versioning.parse_policies("statements=minimal")
+
+
+def test_versioning_policies():
+    # 정책은 모델 정의 시점에 적용되므로 새 프로세스에서 확인
+    code = """
+import json
+from sqlalchemy_continuum import version_class
+from sqlalchemy_continuum.utils import is_versioned
+from models import Asset, AccountCard, Loan, Statement
+
+print(json.dumps(dict(
+    assets=sorted(version_class(Asset).__table__.columns.keys()),
+    loans=len(version_class(Loan).__table__.columns),
+    account_cards=bool(is_versioned(AccountCard)),
+    statements=bool(is_versioned(Statement)),
+)))
+"""
+    env = dict(
+        os.environ, VERSIONING="assets=amount,account_cards=off,statements=audit"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+
+    assert result["assets"] == [
+        "amount",
+        "created_at",
+        "end_transaction_id",
+        "id",
+        "operation_type",
+        "transaction_id",
+        "updated_at",
+    ]
+    assert result["loans"] > len(result["assets"])
+    assert result["account_cards"] is False
+    assert result["statements"] is False
+
+
+@requires_postgres
+def test_amount_policy_on_migrated_schema():
+    # create_all 로 만든 테스트 스키마와 달리 마이그레이션 스키마에서 확인
+    # (amount 정책이 쓰지 않는 버전 컬럼이 NOT NULL 이면 INSERT 가 실패)
+    schema = f"versioning_test_{uuid.uuid4().hex[:8]}"
+    url = make_url(POSTGRES_URL).update_query_dict(
+        {"options": f"-csearch_path={schema}"}
+    )
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+
+    code = """
+import datetime
+import sys
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy_continuum import version_class
+from app.consts import TYPE_OUTCOME
+from models import Category, MainCategory, Statement
+
+url, migrations = sys.argv[1:]
+config = Config()
+config.set_main_option("script_location", migrations)
+config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+command.upgrade(config, "head")
+
+with Session(create_engine(url)) as db:
+    main_category = MainCategory(name="amount", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.flush()
+    category = Category(name="amount", main_category_id=main_category.id)
+    db.add(category)
+    db.flush()
+    db.add(Statement(name="amount", category_id=category.id, amount=-1000,
+                     date=datetime.datetime(2020, 1, 1)))
+    db.commit()
+    print(db.scalars(select(version_class(Statement).amount)).all())
+"""
+    migrations = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+    try:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                code,
+                url.render_as_string(hide_password=False),
+                migrations,
+            ],
+            env=dict(os.environ, VERSIONING="statements=amount"),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        engine.dispose()
+    assert output.splitlines()[-1] == "[-1000]"
+
+
+def test_audit_log(monkeypatch):
+    monkeypatch.setitem(versioning.VERSIONING_POLICIES, "statements", "audit")
+    db = next(override_get_db())
+    main_category = MainCategory(name="감사", category_type=TYPE_OUTCOME)
+    db.add(main_category)
+    db.commit()
+    category = Category(name="감사 하위", main_category_id=main_category.id)
+    db.add(category)
+    db.commit()
+
+    data = dict(
+        name="감사",
+        category_id=category.id,
+        amount=1000,
+        date="2018-01-01T10:00:00",
+        account_card_id=None,
+    )
+    statement = client.post("/api/statement", json=data).json()
+    client.put(f"/api/statement/{statement['id']}", json=dict(data, amount=2000))
+    client.delete(f"/api/statement/{statement['id']}")
+
+    logs = (
+        db.query(AuditLog)
+        .filter(
+            AuditLog.table_name == "statements",
+            AuditLog.row_id == statement["id"],
+        )
+        .order_by(AuditLog.id)
+        .all()
+    )
+    assert [log.operation_type for log in logs] == [0, 1, 2]
+    assert logs[0].data["name"] == "감사"
+    assert logs[0].data["date"] == "2018-01-01T10:00:00"
+    # 수정은 바뀐 컬럼만
+    assert logs[1].data["amount"] == -2000
+    assert "name" not in logs[1].data
+
+
+def test_prune_versions(tmp_path):
+    db = next(override_get_db())
+    asset = client.post(
+        "/api/asset", json=dict(name="보관 자산", asset_type=1, amount=100)
+    ).json()
+    for amount in (200, 300, 400):
+        client.put(
+            f"/api/asset/{asset['id']}",
+            json=dict(name="보관 자산", asset_type=1, amount=amount),
+        )
+
+    AssetVersion = version_class(Asset)
+    Transaction = versioning_manager.transaction_cls
+    versions = db.scalars(
+        select(AssetVersion)
+        .filter(AssetVersion.id == asset["id"])
+        .order_by(AssetVersion.transaction_id)
+    ).all()
+    assert len(versions) == 4
+    transaction_ids = [version.transaction_id for version in versions]
+
+    # 세 번째 버전까지의 트랜잭션은 2년 전, 마지막 버전은 지금
+    old = datetime.datetime.now() - datetime.timedelta(days=730)
+    db.execute(
+        update(Transaction)
+        .where(Transaction.id <= transaction_ids[2])
+        .values(issued_at=old)
+    )
+    db.commit()
+
+    # 배치 하나에 두 행씩, 한 번에 최대 세 배치
+    pruned = 0
+    while True:
+        result = prune_versions(
+            db, archive_dir=str(tmp_path), batch_size=2, max_batches=3, days=365
+        )
+        pruned += result["pruned"]["assets_version"]
+        if not result["remaining"]:
+            break
+    assert pruned >= 2
+
+    # 네 번째 버전이 가리키는 세 번째 트랜잭션은 남음
+    transactions = db.scalars(
+        select(Transaction.id).filter(Transaction.id.in_(transaction_ids))
+    ).all()
+    assert transactions == transaction_ids[2:]
+
+    db.expire_all()
+    remaining = db.scalars(
+        select(AssetVersion.amount)
+        .filter(AssetVersion.id == asset["id"])
+        .order_by(AssetVersion.transaction_id)
+    ).all()
+    assert remaining == [300, 400]
+
+    # 지운 행은 실행마다 gzip JSON Lines 파일로 보관
+    def archived(table):
+        rows = []
+        for path in sorted(tmp_path.glob(f"{table}-*.jsonl.gz")):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                rows += [json.loads(line) for line in f]
+        return rows
+
+    rows = archived("assets_version")
+    assert [row["amount"] for row in rows if row["id"] == asset["id"]] == [100, 200]
+    rows = archived("transaction")
+    assert {row["id"] for row in rows} >= set(transaction_ids[:2])
+
+    # 최신 버전은 보관 기간과 상관없이 남음
+    result = prune_versions(db, archive_dir=str(tmp_path), days=365)
+    assert result["pruned"]["assets_version"] == 0
+    assert client.get(f"/api/asset/{asset['id']}/history").json()[-1]["amount"] == 400
+
+
+def test_prune_versions_opt_in(tmp_path):
+    db = next(override_get_db())
+    # 보관 기간을 설정하지 않으면 지우지 않음
+    assert prune_versions(db, archive_dir=str(tmp_path), days=None) == dict(
+        pruned={}, remaining=False
+    )
+    # 보관 경로 없이는 지우지 않음
+    with pytest.raises(ValueError):
+        prune_versions(db, archive_dir=None, days=365)
@@ -0,0 +1,54 @@
+import os
+
+# 모델(테이블)별 변경 이력 정책
+# - off: 기록하지 않음
+# - full: sqlalchemy-continuum 버전 테이블에 모든 컬럼 (기본값)
+# - amount: 버전 테이블에 금액/시각만, 다른 컬럼만 바뀐 수정은 버전을 만들지 않음
+# - audit: 버전 테이블 대신 audit_logs 에 flush 마다 한 번에 추가 (app.audit)
+#
+# VERSIONING="statements=audit,account_cards=off,assets=amount"
+
+OFF = "off"
+FULL = "full"
+AMOUNT = "amount"
+AUDIT = "audit"
+POLICIES = (OFF, FULL, AMOUNT, AUDIT)
+
+# amount 정책에서 버전에 남기는 컬럼
+AMOUNT_COLUMNS = ("id", "amount", "created_at", "updated_at")
+
+
+def parse_policies(value: str):
+    policies = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        table, _, policy = item.partition("=")
+        policy = policy.strip()
+        if policy not in POLICIES:
+            raise ValueError(f"알 수 없는 버전 정책: {item}")
+        policies[table.strip()] = policy
+    return policies
+
+
+VERSIONING_POLICIES = parse_policies(os.getenv("VERSIONING", ""))
+
+
+def policy(table: str):
+    return VERSIONING_POLICIES.get(table, FULL)
+
+
+def versioned(table: str):
+    # 모델의 __versioned__ 옵션
+    if policy(table) in (OFF, AUDIT):
+        return {"versioning": False}
+    return {}
+
+
+def limit_versioned_columns(classes):
+    # amount 정책의 exclude 목록 (컬럼이 정의된 뒤, configure_mappers 전에 호출)
+    for cls in classes:
+        if policy(cls.__tablename__) == AMOUNT:
+            cls.__versioned__["exclude"] = [
+                column.key
+                for column in cls.__table__.columns
+                if column.key not in AMOUNT_COLUMNS
+            ]